@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Icon/screenshot cache: cold vs parallel vs warm fetches, revalidation, eviction.
+
+Fetches the icons and screenshots of ``--apps`` app details from the local
+stand-in server (which serves image bytes with ETags and shares every eighth
+icon) through ``AssetCache`` and reports, per phase, wall time, image
+requests and bytes downloaded:
+
+- ``cold_serial`` / ``cold_parallel``: empty cache, 1 vs ``--workers`` threads;
+- ``warm``: same URLs again (no requests at all);
+- ``stale``: TTL 0, so every URL is revalidated (304, no body bytes);
+- ``offline``: TTL 0 with a failing transport, so every URL falls back to
+  its stale local copy;
+- ``capped``: ``--cap-kb`` size cap; the cache stays under it and evicted
+  URLs are downloaded again transparently.
+
+    python3 benchmarks/bench_assets.py --apps 50 --latency 0.02 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_assets import AssetCache, thumbnail_backend
+from linglong_store_api import LinglongStoreClient
+from linglong_transport import HttpTransport, TransportError
+
+
+class OfflineTransport:
+    """Fails every request, as with no network."""
+
+    def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        raise TransportError(f"offline: {url}", url=url)
+
+
+def phase(cache: AssetCache, store: MockStore, details: List[Any]) -> Dict[str, Any]:
+    before = store.asset_count
+    start = time.perf_counter()
+    results = cache.prefetch_apps(details)
+    elapsed = time.perf_counter() - start
+    statuses: Dict[str, int] = {}
+    for result in results.values():
+        statuses[result.status] = statuses.get(result.status, 0) + 1
+    stats = cache.stats()
+    return {
+        "urls": len(results),
+        "wall_ms": round(elapsed * 1000, 1),
+        "image_requests": store.asset_count - before,
+        "statuses": statuses,
+        "objects": stats["objects"],
+        "disk_bytes": stats["bytes"],
+        "all_ok": all(result.ok for result in results.values()),
+        "_results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the content-addressed asset cache")
+    parser.add_argument("--apps", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="injected server latency in seconds")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--cap-kb", type=int, default=1024, help="size cap for the eviction phase")
+    args = parser.parse_args()
+
+    with MockStoreServer(MockStore(args.apps, args.latency, assets=True)) as server:
+        store = server.store
+        client = LinglongStoreClient(base_url=server.base_url, cache=False, singleflight=False)
+        details = list(client.get_app_details([app["appId"] for app in store.apps[:args.apps]]).values())
+        transport = HttpTransport()
+
+        with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as directory, \
+                tempfile.TemporaryDirectory() as capped_dir:
+            serial = phase(AssetCache(serial_dir, transport=transport, max_workers=1), store, details)
+            parallel_cache = AssetCache(directory, transport=transport, max_workers=args.workers)
+            parallel = phase(parallel_cache, store, details)
+            warm = phase(AssetCache(directory, transport=transport, max_workers=args.workers), store, details)
+            stale_cache = AssetCache(directory, ttl=0, transport=transport, max_workers=args.workers)
+            stale = phase(stale_cache, store, details)
+            stale["bytes_downloaded"] = stale_cache.stats()["bytes_downloaded"]
+            offline_cache = AssetCache(directory, ttl=0, transport=OfflineTransport(), max_workers=args.workers)
+            offline = phase(offline_cache, store, details)
+            offline["stats_stale"] = offline_cache.stats()["stale"]
+            capped_cache = AssetCache(capped_dir, max_bytes=args.cap_kb * 1024, transport=transport,
+                                      max_workers=args.workers)
+            capped = phase(capped_cache, store, details)
+            first = details[0].screenshots[0]
+            refetched = capped_cache.fetch(first)
+
+            same_bytes = all(
+                open(serial["_results"][url].path, "rb").read() == open(result.path, "rb").read()
+                for url, result in parallel["_results"].items()
+            )
+
+    phases = {
+        "cold_serial": serial, "cold_parallel": parallel, "warm": warm, "stale": stale, "offline": offline,
+        "capped": capped,
+    }
+    for item in phases.values():
+        item.pop("_results")
+    checks = {
+        "all_ok": all(item["all_ok"] for item in phases.values()) and refetched.ok,
+        "same_bytes": same_bytes,
+        "deduplicated": parallel["objects"] < parallel["urls"],
+        "warm_no_requests": warm["image_requests"] == 0 and warm["statuses"] == {"hit": warm["urls"]},
+        "stale_revalidated": stale["statuses"] == {"revalidated": stale["urls"]} and stale["bytes_downloaded"] == 0,
+        "offline_stale_fallback": offline["statuses"] == {"stale": offline["urls"]}
+        and offline["stats_stale"] == offline["urls"],
+        "cap_respected": capped["disk_bytes"] <= args.cap_kb * 1024,
+    }
+    results = {
+        "config": {"apps": args.apps, "latency_s": args.latency, "workers": args.workers, "cap_kb": args.cap_kb},
+        "phases": phases,
+        "parallel_speedup": round(serial["wall_ms"] / parallel["wall_ms"], 2) if parallel["wall_ms"] else None,
+        "evicted_url_refetch": refetched.status,
+        "thumbnail_backend": thumbnail_backend(),
+        "checks": checks,
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
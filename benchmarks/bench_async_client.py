@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exercise and time ``AsyncLinglongStoreClient`` against a local asyncio
+stand-in server.
+
+The stand-in serves the same synthetic catalog as ``mock_store_server`` from
+``asyncio.start_server``. Responses alternate between Content-Length and
+chunked framing, are gzip-compressed when asked, and after a few requests a
+connection reads the next request and closes without answering, as a server
+dropping an idle keep-alive connection does, so the pool's stale-connection
+retry is exercised.
+
+The script first checks that every async method returns exactly what the
+synchronous client returns, plus timeout handling, then compares N serial
+synchronous calls against the same calls gathered concurrently. It also
+checks that the stand-in really sent gzip and chunked bodies, that pooled
+connections were reused, that a fixed run of sequential requests survives
+every dropped connection by retrying on a new one, and that gathering beat
+the serial run.
+
+    python3 benchmarks/bench_async_client.py --latency 0.05 --calls 32
+
+Exits non-zero if any check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_async import AsyncHttpTransport, AsyncLinglongStoreClient
+from linglong_store_api import LinglongStoreClient
+from linglong_transport import TransportError
+
+
+class AsyncStandInServer:
+    """Minimal HTTP/1.1 server on asyncio streams routing to a ``MockStore``."""
+
+    def __init__(self, store: MockStore, requests_per_connection: int = 5) -> None:
+        self.store = store
+        self.requests_per_connection = requests_per_connection
+        self.stall_paths = {"/stall"}
+        self.served = 0
+        self.connections = 0
+        self.dropped = 0
+        self.gzipped = 0
+        self.chunked = 0
+        self._server: Any = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def __aenter__(self) -> "AsyncStandInServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            for _ in range(self.requests_per_connection):
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                raw = await reader.readexactly(length) if length else b""
+                parts = urlsplit(target)
+                if parts.path in self.stall_paths:
+                    # Never answer; wait for the client to give up and hang up.
+                    await reader.read()
+                    return
+                if self.store.latency:
+                    await asyncio.sleep(self.store.latency)
+                self.store.count_request()
+                self.served += 1
+                status, payload = self.store.route(method, parts.path, parse_qs(parts.query), json.loads(raw) if raw else None)
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                head = [f"HTTP/1.1 {status} OK", "Content-Type: application/json;charset=UTF-8"]
+                if "gzip" in headers.get("accept-encoding", "") and self.served % 2:
+                    body = gzip.compress(body)
+                    head.append("Content-Encoding: gzip")
+                    self.gzipped += 1
+                if self.served % 3 == 0:
+                    head.append("Transfer-Encoding: chunked")
+                    self.chunked += 1
+                    middle = len(body) // 2
+                    framed = b"".join(
+                        b"%x\r\n%s\r\n" % (len(piece), piece) for piece in (body[:middle], body[middle:]) if piece
+                    ) + b"0\r\n\r\n"
+                else:
+                    head.append(f"Content-Length: {len(body)}")
+                    framed = body
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + framed)
+                await writer.drain()
+            # Take the next request on this kept-alive connection and hang up
+            # without answering: the client must retry on a new connection.
+            if await reader.readline():
+                self.dropped += 1
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _parity(sync_client: LinglongStoreClient, results: Dict[str, Any]) -> List[Tuple[str, bool]]:
+    return [
+        ("categories", results["categories"] == sync_client.get_categories()),
+        ("web_categories", results["web_categories"] == sync_client.get_categories(use_web=True)),
+        ("category_count", results["category_count"] == sync_client.get_category_app_count("03")),
+        ("search", results["search"] == sync_client.search_apps_simple(name="app 1", page_size=20)),
+        ("search_by_category_name", results["search_by_category_name"] == sync_client.search_apps_simple(category_name="网络应用", page_size=5)),
+        ("detail", results["detail"] == sync_client.get_app_detail("org.example.app00007")),
+        ("details", dict(results["details"]) == dict(sync_client.get_app_details(results["detail_ids"]))),
+        ("details_missing", results["details"].missing == ["org.example.missing"]),
+    ]
+
+
+async def sequential_drops(server: AsyncStandInServer, rounds: int = 3) -> Dict[str, Any]:
+    """Sequential requests past several per-connection limits on one pooled stream."""
+    count = server.requests_per_connection * rounds + 1
+    before = {"connections": server.connections, "dropped": server.dropped}
+    ok = 0
+    errors: List[str] = []
+    async with AsyncLinglongStoreClient(base_url=server.base_url, cache=False, max_concurrency=1) as client:
+        for i in range(count):
+            try:
+                await client.get_app_detail(f"org.example.app{i:05d}")
+                ok += 1
+            except TransportError as exc:
+                errors.append(str(exc))
+    return {
+        "requests": count,
+        "succeeded": ok,
+        "errors": errors,
+        "new_connections": server.connections - before["connections"],
+        "dropped": server.dropped - before["dropped"],
+        "rounds": rounds,
+    }
+
+
+async def run_async(base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    detail_ids = [f"org.example.app{i:05d}" for i in range(0, 60, 2)] + ["org.example.missing"]
+    async with AsyncLinglongStoreClient(base_url=base_url, cache=False, max_concurrency=args.concurrency) as client:
+        categories, web_categories, category_count, search, by_name, detail, details = await asyncio.gather(
+            client.get_categories(),
+            client.get_categories(use_web=True),
+            client.get_category_app_count("03"),
+            client.search_apps_simple(name="app 1", page_size=20),
+            client.search_apps_simple(category_name="网络应用", page_size=5),
+            client.get_app_detail("org.example.app00007"),
+            client.get_app_details(detail_ids, chunk_size=7),
+        )
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get_app_detail(f"org.example.app{i:05d}") for i in range(args.calls)))
+        gathered = time.perf_counter() - start
+
+    timed_out = False
+    transport = AsyncHttpTransport(timeout=0.2)
+    try:
+        await transport.request("GET", f"{base_url}/stall")
+    except TransportError:
+        timed_out = True
+    finally:
+        await transport.aclose()
+
+    return {
+        "categories": categories,
+        "web_categories": web_categories,
+        "category_count": category_count,
+        "search": search,
+        "search_by_category_name": by_name,
+        "detail": detail,
+        "details": details,
+        "detail_ids": detail_ids,
+        "gathered_seconds": gathered,
+        "timeout_raised": timed_out,
+    }
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    store = MockStore(args.apps, args.latency, etags=False)
+    async with AsyncStandInServer(store) as server:
+        drops = await sequential_drops(server)
+        results = await run_async(server.base_url, args)
+        served = server.served
+        stand_in = {
+            "connections": server.connections,
+            "dropped": server.dropped,
+            "gzipped": server.gzipped,
+            "chunked": server.chunked,
+        }
+
+    with MockStoreServer(MockStore(args.apps, args.latency, etags=False)) as sync_server:
+        sync_client = LinglongStoreClient(base_url=sync_server.base_url, transport="http", cache=False)
+        checks = _parity(sync_client, results)
+        start = time.perf_counter()
+        for i in range(args.calls):
+            sync_client.get_app_detail(f"org.example.app{i:05d}")
+        serial = time.perf_counter() - start
+
+    checks.append(("timeout", results["timeout_raised"]))
+    checks.append(("gzip_and_chunked_served", stand_in["gzipped"] > 0 and stand_in["chunked"] > 0))
+    checks.append(("connections_reused", stand_in["connections"] < served))
+    # Each exhausted connection drops one request, which the client must
+    # retry on a fresh connection: one connection per round plus the first.
+    checks.append((
+        "dropped_connections_retried",
+        not drops["errors"]
+        and drops["succeeded"] == drops["requests"]
+        and drops["dropped"] == drops["rounds"]
+        and drops["new_connections"] == drops["rounds"] + 1,
+    ))
+    if args.latency > 0:
+        checks.append(("gather_faster_than_serial", results["gathered_seconds"] < serial))
+    failed = [name for name, ok in checks if not ok]
+    report = {
+        "checks": {name: ok for name, ok in checks},
+        "requests_served": served,
+        "stand_in": stand_in,
+        "sequential_drops": drops,
+        "calls": args.calls,
+        "latency_s": args.latency,
+        "max_concurrency": args.concurrency,
+        "sync_serial_s": round(serial, 3),
+        "async_gather_s": round(results["gathered_seconds"], 3),
+        "speedup": round(serial / results["gathered_seconds"], 1) if results["gathered_seconds"] else None,
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if failed:
+        print(f"FAILED: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check and time AsyncLinglongStoreClient against an asyncio stand-in server")
+    parser.add_argument("--apps", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="injected server latency in seconds")
+    parser.add_argument("--calls", type=int, default=32, help="detail calls for the serial vs gathered timing")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure response-cache hit latency against a local stand-in server.
+
+Reports network (no cache), warm in-process hits, cold on-disk hits (a fresh
+``ResponseCache`` per lookup, as in a new CLI process) and ETag revalidation.
+
+    python3 benchmarks/bench_cache.py --iterations 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_cache import ResponseCache
+from linglong_store_api import LinglongStoreClient
+from linglong_transport import HttpTransport
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the on-disk response cache")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--apps", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="injected server latency in seconds")
+    args = parser.parse_args()
+
+    transport = HttpTransport()
+    with tempfile.TemporaryDirectory() as cache_dir, MockStoreServer(MockStore(args.apps, args.latency)) as server:
+        def search(client: LinglongStoreClient) -> None:
+            client.search_apps_simple(name="app", page_size=20)
+
+        network = LinglongStoreClient(base_url=server.base_url, transport=transport, cache=False)
+        warm = LinglongStoreClient(base_url=server.base_url, transport=transport, cache=ResponseCache(cache_dir))
+        refresh = LinglongStoreClient(base_url=server.base_url, transport=transport, cache=ResponseCache(cache_dir), refresh=True)
+
+        results = {
+            "network": summarize(time_calls(lambda: search(network), args.iterations)),
+            "warm_hit": summarize(time_calls(lambda: search(warm), args.iterations)),
+            "cold_disk_hit": summarize(time_calls(
+                lambda: search(LinglongStoreClient(base_url=server.base_url, transport=transport, cache=ResponseCache(cache_dir))),
+                args.iterations,
+            )),
+            "revalidate_304": summarize(time_calls(lambda: search(refresh), args.iterations)),
+        }
+        results["server_requests"] = server.store.request_count
+        results["server_not_modified"] = server.store.not_modified_count
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resident daemon: per-command latency with and without ``linglong_daemon``.
+
+Starts the local stand-in server and a daemon on a private socket, then
+runs the same CLI commands as fresh subprocesses twice, forwarded to the
+daemon and with ``LINGLONG_STORE_DAEMON=off``. Reports per-command
+wall-time statistics for both, the socket round trip measured from an
+already-running process (no interpreter startup), and checks that:
+
+- forwarded and in-process runs print the same stdout and exit codes;
+- concurrent clients are served or declined as busy, and a call made while
+  a slow command runs is declined at once instead of queueing;
+- streaming commands (``--ndjson``, ``--all``) and callers with other
+  proxy settings are left to run locally;
+- a request from changed scripts is refused and stops the stale daemon,
+  after which the CLI falls back to running in-process.
+
+    python3 benchmarks/bench_daemon.py --iterations 30 --latency 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import _common
+from _common import summarize, time_calls
+from mock_store_server import MockStore, MockStoreServer
+
+import linglong_daemon
+
+
+STORE_API = os.path.join(_common.SCRIPTS_DIR, "linglong_store_api.py")
+CATEGORY_SEARCH = os.path.join(_common.SCRIPTS_DIR, "linglong_category_search.py")
+
+
+def commands(store: MockStore) -> Dict[str, List[str]]:
+    app_ids = [app["appId"] for app in store.apps[:5]]
+    return {
+        "search": [STORE_API, "app00"],
+        "search_json": [STORE_API, "app01", "--json"],
+        "detail_batch": [STORE_API, "--detail", *app_ids],
+        "missing_app": [STORE_API, "--detail", "org.example.missing"],
+        "categories": [CATEGORY_SEARCH, "categories"],
+    }
+
+
+def cli(argv: List[str], env: Dict[str, str]) -> Tuple[float, int, str]:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *argv], env=env, capture_output=True, text=True)
+    return time.perf_counter() - start, proc.returncode, proc.stdout
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark CLI latency through the resident daemon")
+    parser.add_argument("--apps", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.02, help="injected server latency in seconds")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent clients for the fan-in check")
+    args = parser.parse_args()
+
+    with MockStoreServer(MockStore(args.apps, args.latency)) as server, tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "run", "daemon.sock")
+        os.environ.update({
+            "LINGLONG_STORE_BASE_URL": server.base_url,
+            "XDG_CACHE_HOME": os.path.join(directory, "cache"),
+            linglong_daemon.SOCKET_ENV: path,
+        })
+        os.environ.pop(linglong_daemon.DAEMON_ENV, None)
+        on_env = dict(os.environ)
+        off_env = dict(os.environ, **{linglong_daemon.DAEMON_ENV: "off"})
+
+        started = linglong_daemon.start(path, idle_timeout=60)
+        if started is None:
+            print(json.dumps({"error": "daemon did not start"}))
+            return 1
+
+        per_command: Dict[str, Any] = {}
+        same_output = True
+        for name, argv in commands(server.store).items():
+            cli(argv, on_env)  # warm both the daemon and the disk cache
+            daemon_runs = [cli(argv, on_env) for _ in range(args.iterations)]
+            local_runs = [cli(argv, off_env) for _ in range(args.iterations)]
+            same_output &= {run[1:] for run in daemon_runs} == {run[1:] for run in local_runs}
+            per_command[name] = {
+                "daemon": summarize([run[0] for run in daemon_runs]),
+                "in_process": summarize([run[0] for run in local_runs]),
+            }
+
+        round_trip = summarize(time_calls(
+            lambda: linglong_daemon.request("store_api", ["app00"], path), args.iterations * 10, warmup=5
+        ))
+        with ThreadPoolExecutor(args.clients) as pool:
+            replies = list(pool.map(
+                lambda i: linglong_daemon.request("store_api", [f"app{i % 10:02d}", "--json"], path),
+                range(args.clients * 4),
+            ))
+            # A slow command holds the daemon; a second caller is declined at
+            # once instead of queueing behind it.
+            server.store.latency = 1.0
+            slow = pool.submit(linglong_daemon.request, "store_api", ["app42", "--no-cache"], path)
+            time.sleep(0.3)
+            busy_start = time.perf_counter()
+            busy = linglong_daemon.request("store_api", ["app00"], path)
+            busy_seconds = time.perf_counter() - busy_start
+            slow_reply = slow.result()
+            timeout_start = time.perf_counter()
+            timed_out = linglong_daemon.request("store_api", ["app43", "--no-cache"], path, timeout=0.2)
+            timeout_seconds = time.perf_counter() - timeout_start
+            time.sleep(1.0)  # let the abandoned command finish
+            server.store.latency = args.latency
+        served = linglong_daemon.running(path)
+        os.environ["https_proxy"] = "http://127.0.0.1:9"
+        proxied = linglong_daemon.request("store_api", ["app00"], path)
+        del os.environ["https_proxy"]
+        streaming = [
+            linglong_daemon.request("category_search", ["search", "app", "--all", "--ndjson"], path),
+            linglong_daemon.request("store_api", ["app00", "--ndj"], path),
+        ]
+
+        stale = linglong_daemon._exchange({
+            "op": "run", "v": linglong_daemon.PROTOCOL_VERSION, "command": "store_api",
+            "argv": ["app00"], "cwd": os.getcwd(), "env": linglong_daemon.environment(), "code": 0,
+        }, path)
+        deadline = time.monotonic() + 5
+        while linglong_daemon.running(path) is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stale_stopped = linglong_daemon.running(path) is None
+        fallback = cli(commands(server.store)["search"], on_env)
+        linglong_daemon.stop(path)
+
+    speedups = {
+        name: round(item["in_process"]["p50_ms"] / item["daemon"]["p50_ms"], 2)
+        for name, item in per_command.items() if item["daemon"]["p50_ms"]
+    }
+    checks = {
+        "same_output": same_output,
+        # Busy replies (None) make those callers run locally.
+        "concurrent_clients_answered": all(reply is None or reply["exit"] == 0 for reply in replies)
+        and any(reply is not None for reply in replies),
+        "busy_declined_at_once": busy is None and busy_seconds < 0.5
+        and slow_reply is not None and slow_reply["exit"] == 0,
+        "client_gives_up_after_timeout": timed_out is None and timeout_seconds < 0.5,
+        "streaming_runs_locally": streaming == [None, None],
+        "other_proxy_runs_locally": proxied is None,
+        "stale_refused": not stale.get("ok") and stale_stopped,
+        "falls_back_in_process": fallback[1] == 0 and "app00" in fallback[2],
+    }
+    results = {
+        "config": {"apps": args.apps, "latency_s": args.latency, "iterations": args.iterations},
+        "commands": per_command,
+        "p50_speedup": speedups,
+        "socket_round_trip": round_trip,
+        "requests_served": served["served"] if served else None,
+        "busy_replies": sum(reply is None for reply in replies),
+        "checks": checks,
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark the installed-app parser against the previous line-scraping code.
+
+Generates a synthetic ``ll-cli list`` listing (ANSI-coloured header, app names
+with spaces, some containing "ID", runtimes and bases) plus its ``--json``
+equivalent, then times the legacy regex scraper, the text parser and the JSON
+parser on the same fixture.
+
+    python3 benchmarks/bench_installed_parser.py --lines 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+from typing import Dict, List
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+
+from linglong_installed import parse_installed_output
+
+
+WORDS = ["Photo", "Editor", "Music", "Player", "Office", "Terminal", "Browser", "ID", "Card", "Studio"]
+
+
+def synthetic_listing(lines: int, seed: int = 7) -> Dict[str, str]:
+    rng = random.Random(seed)
+    rows: List[str] = ["\x1b[1mID                                  名称                     版本          渠道      模块      描述\x1b[0m"]
+    items = []
+    for i in range(lines):
+        if i % 50 == 0:
+            app_id, kind, module = f"org.deepin.Runtime{i:05d}", "runtime", "binary"
+        elif i % 97 == 0:
+            app_id, kind, module = f"org.deepin.base{i:05d}", "base", "binary"
+        else:
+            app_id, kind, module = f"com.example.app{i:05d}", "app", "binary" if i % 3 else "develop"
+        name = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+        version = f"{rng.randint(0, 9)}.{rng.randint(0, 20)}.{rng.randint(0, 99)}.{rng.randint(0, 9)}"
+        description = f"{name} for Linglong, build {rng.randint(1, 999)}"
+        rows.append(f"{app_id:<36}{name:<25}{version:<14}main      {module:<10}{description}")
+        items.append({
+            "id": app_id, "name": name, "version": version, "arch": ["x86_64"],
+            "channel": "main", "module": module, "kind": kind, "description": description,
+        })
+    return {"text": "\n".join(rows) + "\n", "json": json.dumps(items, ensure_ascii=False)}
+
+
+def legacy_parse(content: str) -> List[Dict[str, str]]:
+    """The scraping loop previously duplicated in the update checker."""
+    content = re.sub(r'\x1b\[[0-9;]*m', '', content)
+    app_list = []
+    for line in content.split('\n'):
+        if not line.strip() or 'ID' in line or '名称' in line:
+            continue
+        app_match = re.match(r'([a-z][a-z0-9.-]+)', line)
+        if app_match:
+            version_match = re.search(r'\b(\d+\.\d+[\d\.]*)\b', line)
+            if version_match:
+                app_list.append({"appId": app_match.group(1), "arch": "x86_64", "version": version_match.group(1)})
+    return app_list
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ll-cli list parsing on a synthetic listing")
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    fixture = synthetic_listing(args.lines)
+    legacy = legacy_parse(fixture["text"])
+    parsed_text = parse_installed_output(fixture["text"])
+    parsed_json = parse_installed_output(fixture["json"])
+    expected = {(item["id"], item["version"]) for item in json.loads(fixture["json"])}
+    columns = ("app_id", "version", "name", "channel", "module", "description")
+
+    results = {
+        "lines": args.lines,
+        "legacy": summarize(time_calls(lambda: legacy_parse(fixture["text"]), args.iterations)),
+        "text": summarize(time_calls(lambda: parse_installed_output(fixture["text"]), args.iterations)),
+        "json": summarize(time_calls(lambda: parse_installed_output(fixture["json"]), args.iterations)),
+        "rows": {
+            "legacy": len(legacy),
+            "legacy_correct": sum(1 for r in legacy if (r["appId"], r["version"]) in expected),
+            "text": len(parsed_text),
+            "json": len(parsed_json),
+        },
+        "text_matches_json": [[getattr(r, c) for c in columns] for r in parsed_text]
+        == [[getattr(r, c) for c in columns] for r in parsed_json],
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
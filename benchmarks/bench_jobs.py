@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ll-cli job scheduler: ordering, concurrency, bounded logs and events.
+
+Drives ``JobRunner`` with a generated fake ``ll-cli`` (a Python script)
+that logs start/end times, prints ``\\r`` progress bars and behaves by ref:
+
+- ``*verbose*`` writes ``--log-mb`` MB of output (ring buffer stays bounded);
+- ``*fail*`` exits 1 after a stderr message (explicit dependents are skipped);
+- ``*hang*`` sleeps past ``--timeout`` (killed, reported as a timeout);
+- ``*orphan*`` leaves a child holding stdout open and exits.
+
+Checks that runtimes finish before any app starts, that no more than
+``--concurrency`` jobs overlap, that a skipped dependent never starts, and
+that the concurrent run beats a serial one.
+
+    python3 benchmarks/bench_jobs.py --apps 12 --concurrency 4 --delay 0.2
+
+Exits non-zero if any check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import stat
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+
+from linglong_jobs import Job, JobRunner, make_jobs
+
+
+FAKE_LL_CLI = r'''#!{python}
+import os, subprocess, sys, time
+
+action, ref = sys.argv[1], sys.argv[2]
+log = os.environ["FAKE_LL_LOG"]
+delay = float(os.environ.get("FAKE_LL_DELAY", "0.1"))
+
+
+def mark(event):
+    fd = os.open(log, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+    os.write(fd, f"{{event}} {{ref}} {{time.time():.6f}}\n".encode())
+    os.close(fd)
+
+
+mark("start")
+if "hang" in ref:
+    time.sleep(3600)
+if "orphan" in ref:
+    subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+for step in range(0, 101, 10):
+    sys.stdout.write(f"\rDownloading {{ref}} {{step}}%")
+    sys.stdout.flush()
+    time.sleep(delay / 11)
+sys.stdout.write("\n")
+if "verbose" in ref:
+    line = ("x" * 99 + "\n").encode()
+    chunk = line * 1000
+    for _ in range(int(float(os.environ.get("FAKE_LL_LOG_MB", "1")) * 10)):
+        sys.stdout.buffer.write(chunk)
+    sys.stdout.buffer.write(b"last line\n")
+    sys.stdout.flush()
+mark("end")
+if "fail" in ref:
+    sys.stderr.write(f"error: {{action}} {{ref}} failed\n")
+    sys.exit(1)
+print(f"{{action}} {{ref}} done")
+'''
+
+
+def write_fake_cli(directory: str) -> str:
+    path = os.path.join(directory, "ll-cli")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(FAKE_LL_CLI.format(python=sys.executable))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+def read_log(path: str) -> Dict[str, Dict[str, float]]:
+    times: Dict[str, Dict[str, float]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            event, ref, ts = line.split()
+            times.setdefault(ref, {})[event] = float(ts)
+    return times
+
+
+def max_overlap(times: Dict[str, Dict[str, float]]) -> int:
+    edges: List[Tuple[float, int]] = []
+    for item in times.values():
+        if "start" in item and "end" in item:
+            edges += [(item["start"], 1), (item["end"], -1)]
+    current = peak = 0
+    for _, delta in sorted(edges, key=lambda edge: (edge[0], edge[1])):
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def run(cli: str, jobs: List[Job], concurrency: int, timeout: float, buffer_bytes: int, log: str) -> Dict[str, Any]:
+    events: List[Dict[str, Any]] = []
+    if os.path.exists(log):
+        os.unlink(log)
+    runner = JobRunner(cli, concurrency=concurrency, buffer_bytes=buffer_bytes, timeout=timeout, on_event=events.append)
+    start = time.perf_counter()
+    result = runner.run(jobs)
+    return {"result": result, "events": events, "wall": time.perf_counter() - start, "times": read_log(log)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Exercise the ll-cli job scheduler with a fake ll-cli")
+    parser.add_argument("--apps", type=int, default=12)
+    parser.add_argument("--runtimes", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=0.2, help="fake ll-cli run time in seconds")
+    parser.add_argument("--log-mb", type=float, default=20, help="output of the verbose job in MB")
+    parser.add_argument("--buffer-kb", type=int, default=64, help="ring buffer size per stream")
+    parser.add_argument("--timeout", type=float, default=3.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cli = write_fake_cli(directory)
+        log = os.path.join(directory, "calls.log")
+        os.environ.update({"FAKE_LL_LOG": log, "FAKE_LL_DELAY": str(args.delay), "FAKE_LL_LOG_MB": str(args.log_mb)})
+        buffer_bytes = args.buffer_kb * 1024
+
+        def plain_jobs() -> List[Job]:
+            refs = [f"org.example.Runtime{i}" for i in range(args.runtimes)]
+            refs += [f"org.example.app{i:03d}" for i in range(args.apps)]
+            return make_jobs(refs)
+
+        serial = run(cli, plain_jobs(), 1, args.timeout, buffer_bytes, log)
+        concurrent = run(cli, plain_jobs(), args.concurrency, args.timeout, buffer_bytes, log)
+        times = concurrent["times"]
+        runtime_end = max((t["end"] for ref, t in times.items() if "Runtime" in ref), default=0.0)
+        app_start = min((t["start"] for ref, t in times.items() if "Runtime" not in ref), default=float("inf"))
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        special = make_jobs(["org.example.verbose", "org.example.fail", "org.example.hang", "org.example.orphan"])
+        special.append(Job("org.example.needs-fail", depends_on=["org.example.fail"]))
+        edge = run(cli, special, args.concurrency, args.timeout, buffer_bytes, log)
+        rss_growth_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+        jobs = {job.id: job for job in edge["result"].jobs}
+        verbose = jobs["org.example.verbose"]
+        progress = [e["percent"] for e in concurrent["events"] if e["type"] == "progress" and e["job"] == "org.example.app000"]
+
+        checks = {
+            "all_succeeded": serial["result"].ok and concurrent["result"].ok,
+            "runtimes_before_apps": runtime_end <= app_start,
+            "concurrency_respected": max_overlap(times) <= args.concurrency,
+            "concurrency_used": max_overlap(times) == min(args.concurrency, args.apps),
+            "serial_one_at_a_time": max_overlap(serial["times"]) == 1,
+            "faster_than_serial": args.concurrency < 2 or args.apps < 2 or concurrent["wall"] < serial["wall"],
+            "ring_buffer_bounded": len(verbose.stdout) <= buffer_bytes,
+            # ru_maxrss is in KiB; buffering the whole log would add --log-mb MB.
+            "rss_bounded": rss_growth_kb < args.log_mb * 1024 / 2,
+            "log_fully_read": verbose.stdout.total_bytes > args.log_mb * 1_000_000
+            and verbose.stdout.tail(2)[0] == "last line",
+            "progress_events": progress == sorted(progress) and progress[-1:] == [100.0],
+            "failure_reported": jobs["org.example.fail"].state == "failed"
+            and "failed" in jobs["org.example.fail"].error,
+            "dependent_skipped": jobs["org.example.needs-fail"].state == "skipped"
+            and "org.example.needs-fail" not in edge["times"],
+            "timeout_killed": jobs["org.example.hang"].state == "failed" and "超时" in jobs["org.example.hang"].error,
+            "orphan_finished": jobs["org.example.orphan"].state == "succeeded"
+            and jobs["org.example.orphan"].duration < args.timeout,
+        }
+        results = {
+            "config": {"apps": args.apps, "runtimes": args.runtimes, "concurrency": args.concurrency, "delay_s": args.delay},
+            "serial_wall_s": round(serial["wall"], 3),
+            "concurrent_wall_s": round(concurrent["wall"], 3),
+            "speedup": round(serial["wall"] / concurrent["wall"], 2),
+            "max_overlap": max_overlap(times),
+            "verbose_job": {
+                "output_bytes": verbose.stdout.total_bytes,
+                "buffered_bytes": len(verbose.stdout),
+                "dropped_lines": verbose.stdout.dropped_lines,
+                "rss_growth_kb": rss_growth_kb,
+            },
+            "edge_cases": edge["result"].summary(),
+            "checks": checks,
+        }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    failed = [name for name, ok in checks.items() if not ok]
+    if failed:
+        print(f"FAILED: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-record memory footprint of the search result types.
+
+Compares, at N records decoded from synthetic ``getSearchAppList`` pages:
+
+- ``legacy``: the previous eager dataclasses (every field copied into a
+  per-instance ``__dict__``);
+- ``lazy``: slotted ``AppSummary`` views wrapping the response records;
+- ``batch``: the columnar ``AppBatch``.
+
+Two footprints are reported (bytes per record, via ``tracemalloc``):
+
+- ``over_response``: what the records add while the decoded pages are still
+  alive, the streaming/CLI case (``iter_search_apps`` -> dicts -> output);
+- ``retained``: what stays allocated after the pages are dropped, the case of
+  keeping a full-catalog result around.
+
+Lazy views keep their raw dicts alive, so their retained size is the
+response record itself; ``AppBatch`` is the type to hold on to.
+
+    python3 benchmarks/bench_record_memory.py --records 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+from mock_store_server import build_catalog
+
+from linglong_store_api import AppBatch, extract_app_items, format_app_list, summaries_to_dicts
+
+
+@dataclass
+class LegacyAppSummary:
+    app_id: Optional[str]
+    name: Optional[str]
+    version: Optional[str]
+    arch: Optional[str]
+    description: Optional[str]
+    repo_name: Optional[str]
+    icon: Optional[str] = None
+
+
+def legacy_format(items: List[Dict[str, Any]]) -> List[LegacyAppSummary]:
+    return [
+        LegacyAppSummary(
+            app_id=item.get("appId"),
+            name=item.get("zhName") or item.get("name"),
+            version=item.get("version"),
+            arch=item.get("arch"),
+            description=item.get("description"),
+            repo_name=item.get("repoName"),
+            icon=item.get("icon"),
+        )
+        for item in items
+    ]
+
+
+def legacy_dicts(items: List[LegacyAppSummary]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "appId": item.app_id,
+            "name": item.name,
+            "version": item.version,
+            "arch": item.arch,
+            "description": item.description,
+            "repoName": item.repo_name,
+        }
+        for item in items
+    ]
+
+
+def page_bodies(records: int, page_size: int) -> List[bytes]:
+    catalog = build_catalog(records)
+    return [
+        json.dumps({"code": 200, "data": {"records": catalog[i:i + page_size]}}, ensure_ascii=False).encode("utf-8")
+        for i in range(0, records, page_size)
+    ]
+
+
+def decode(bodies: List[bytes]) -> List[Dict[str, Any]]:
+    return [json.loads(body) for body in bodies]
+
+
+def build(kind: str, pages: List[Dict[str, Any]]) -> Any:
+    if kind == "legacy":
+        return [record for page in pages for record in legacy_format(extract_app_items(page))]
+    if kind == "lazy":
+        return [record for page in pages for record in format_app_list(extract_app_items(page))]
+    batch = AppBatch()
+    for page in pages:
+        batch.extend_raw(extract_app_items(page))
+    return batch
+
+
+def measure(fn: Callable[[], Any]) -> int:
+    """Bytes still allocated by ``fn``'s result once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Per-record memory of AppSummary variants")
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = page_bodies(args.records, args.page_size)
+    pages = decode(bodies)
+    response_bytes = measure(lambda: decode(bodies))
+    to_dicts = {
+        "legacy": legacy_dicts,
+        "lazy": summaries_to_dicts,
+        "batch": lambda batch: batch.to_dicts(),
+    }
+
+    results: Dict[str, Any] = {
+        "records": args.records,
+        "response_bytes_per_record": round(response_bytes / args.records, 1),
+    }
+    reference = None
+    for kind in ("legacy", "lazy", "batch"):
+        over_response = measure(lambda: build(kind, pages))
+
+        def retained() -> Any:
+            return build(kind, decode(bodies))
+
+        records = build(kind, pages)
+        rows = to_dicts[kind](records)
+        if reference is None:
+            reference = rows
+        results[kind] = {
+            "over_response_bytes_per_record": round(over_response / args.records, 1),
+            "retained_bytes_per_record": round(measure(retained) / args.records, 1),
+            "build": summarize(time_calls(lambda: build(kind, pages), args.iterations)),
+            "to_dicts": summarize(time_calls(lambda: to_dicts[kind](records), args.iterations)),
+            "rows_match_legacy": rows == reference,
+        }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0 if all(results[kind]["rows_match_legacy"] for kind in ("lazy", "batch")) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end scenario suite against the local stand-in store.
+
+Runs fixed, reproducible workloads through ``LinglongStoreClient`` and
+``LinglongUpdateChecker`` (response cache off, so every iteration reaches
+the server) and reports p50/p99 latency, throughput and upstream requests
+per iteration as JSON:
+
+- ``search``: one ``search_apps_simple`` page;
+- ``category_pagination``: every page of one category via ``search_all_apps``;
+- ``update_check``: the checker pipeline for ``--installed`` refs (a third
+  outdated), from installed records to report, without ``ll-cli``;
+- ``batch_detail``: ``get_app_details`` for ``--detail-ids`` apps.
+
+``--output`` stores the result; ``--baseline`` compares p50 against an
+earlier result and exits 1 when a scenario is slower by more than
+``--tolerance`` (a ratio), for CI regression checks.
+
+    python3 benchmarks/bench_scenarios.py --apps 2000 --latency 0.02 --output base.json
+    python3 benchmarks/bench_scenarios.py --apps 2000 --latency 0.02 --baseline base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+from mock_store_server import CATEGORY_NAMES, MockStore, MockStoreServer
+
+from linglong_installed import InstalledApp
+from linglong_store_api import LinglongStoreClient
+from linglong_transport import TRANSPORT_NAMES, get_transport
+from linglong_update_checker import LinglongUpdateChecker
+
+
+SCENARIOS = ("search", "category_pagination", "update_check", "batch_detail")
+
+
+def installed_refs(store: MockStore, count: int) -> List[InstalledApp]:
+    """``count`` installed apps from the catalog; every third one is outdated."""
+    refs = []
+    for i, app in enumerate(store.apps[:count]):
+        version = "0.0.0.1" if i % 3 == 0 else app["version"]
+        refs.append(InstalledApp(app["appId"], version, app["arch"]))
+    return refs
+
+
+def update_check(client: LinglongStoreClient, installed: List[InstalledApp]) -> Callable[[], Any]:
+    def run() -> Any:
+        checker = LinglongUpdateChecker(client=client)
+        checker.installed = installed
+        # The checker reports progress on stdout; keep the JSON output clean.
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = checker.call_update_check_api(checker.extract_installed_apps())
+            report = checker.generate_report(result, echo=False)
+        if not report or report["updateable_count"] != (len(installed) + 2) // 3:
+            raise RuntimeError(f"unexpected update report: {report and report['updateable_count']}")
+        return report
+
+    return run
+
+
+def build_scenarios(client: LinglongStoreClient, store: MockStore, args: argparse.Namespace) -> Dict[str, Callable[[], Any]]:
+    category_id = CATEGORY_NAMES[0][0]
+    installed = installed_refs(store, args.installed)
+    detail_ids = [app["appId"] for app in store.apps[:args.detail_ids]]
+
+    def search() -> Any:
+        return client.search_apps_simple(name="app", page_size=20)
+
+    def category_pagination() -> Any:
+        batch = client.search_all_apps(category_id=category_id, page_size=args.page_size)
+        if len(batch) != sum(1 for app in store.apps if app["categoryId"] == category_id):
+            raise RuntimeError(f"category pagination returned {len(batch)} apps")
+        return batch
+
+    def batch_detail() -> Any:
+        details = client.get_app_details(detail_ids)
+        if len(details) != len(detail_ids):
+            raise RuntimeError(f"batch detail returned {len(details)} of {len(detail_ids)} apps")
+        return details
+
+    return {
+        "search": search,
+        "category_pagination": category_pagination,
+        "update_check": update_check(client, installed),
+        "batch_detail": batch_detail,
+    }
+
+
+def run_scenario(fn: Callable[[], Any], store: MockStore, iterations: int) -> Dict[str, Any]:
+    fn()  # warm-up: connection pool, category index
+    before = store.request_count
+    start = time.perf_counter()
+    samples = time_calls(fn, iterations, warmup=0)
+    elapsed = time.perf_counter() - start
+    result = summarize(samples)
+    result["requests_per_iteration"] = round((store.request_count - before) / iterations, 2)
+    result["upstream_requests_per_s"] = round((store.request_count - before) / elapsed, 1) if elapsed else 0.0
+    return result
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Any]:
+    """p50 ratio (current / baseline) per scenario present in both runs."""
+    verdict: Dict[str, Any] = {}
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or not previous.get("p50_ms"):
+            continue
+        ratio = current["p50_ms"] / previous["p50_ms"]
+        verdict[name] = {"p50_ratio": round(ratio, 3), "regressed": ratio > 1 + tolerance}
+    return verdict
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the store scenario suite against a local mock server")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--apps", type=int, default=2000, help="synthetic catalog size")
+    parser.add_argument("--latency", type=float, default=0.02, help="injected server latency in seconds")
+    parser.add_argument("--page-size", type=int, default=50, help="page size for category_pagination")
+    parser.add_argument("--installed", type=int, default=500, help="installed refs for update_check")
+    parser.add_argument("--detail-ids", type=int, default=100, help="apps requested by batch_detail")
+    parser.add_argument("--transport", choices=TRANSPORT_NAMES, default="http")
+    parser.add_argument("--output", metavar="FILE", help="also write the JSON result to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="earlier --output to compare p50 against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown ratio (default: 0.25)")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    results: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "config": {
+            "apps": args.apps,
+            "latency_s": args.latency,
+            "iterations": args.iterations,
+            "page_size": args.page_size,
+            "installed": args.installed,
+            "detail_ids": args.detail_ids,
+            "transport": args.transport,
+        },
+        "scenarios": {},
+    }
+    with MockStoreServer(MockStore(args.apps, args.latency)) as server:
+        client = LinglongStoreClient(
+            base_url=server.base_url, transport=get_transport(args.transport), cache=False, singleflight=False
+        )
+        scenarios = build_scenarios(client, server.store, args)
+        for name in names:
+            results["scenarios"][name] = run_scenario(scenarios[name], server.store, args.iterations)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline: Optional[Dict[str, Any]] = json.load(f)
+        results["comparison"] = compare(results, baseline or {}, args.tolerance)
+        if any(item["regressed"] for item in results["comparison"].values()):
+            status = 1
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
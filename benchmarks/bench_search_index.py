@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Measure local full-text index sync and query latency.
+
+Syncs a synthetic catalog from the local stand-in server, then times ranked
+queries (Latin prefix, CJK phrase, exact appId, category filter) and an
+unchanged re-sync.
+
+    python3 benchmarks/bench_search_index.py --apps 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_search_index import SearchIndex
+from linglong_store_api import LinglongStoreClient
+
+
+QUERIES = {
+    "latin_prefix": ("exam", None),
+    "cjk_phrase": ("示例应用", None),
+    "app_id": ("org.example.app00042", None),
+    "multi_term": ("example 42", None),
+    "category": (None, "网络应用"),
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the local full-text search index")
+    parser.add_argument("--apps", type=int, default=3000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, MockStoreServer(MockStore(args.apps)) as server:
+        client = LinglongStoreClient(base_url=server.base_url, cache=False)
+        with SearchIndex(os.path.join(tmp, "index.sqlite")) as index:
+            start = time.perf_counter()
+            first = index.sync(client)
+            results["initial_sync_s"] = round(time.perf_counter() - start, 3)
+            results["apps"] = first.total
+            resync = index.sync(client)
+            results["unchanged_resync"] = resync.as_dict()
+            for label, (query, category) in QUERIES.items():
+                results[label] = summarize(
+                    time_calls(lambda: index.search(query, category=category, limit=20), args.iterations)
+                )
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request coalescing: upstream calls and wall time for bursts of identical calls.
+
+Each round fires ``--threads`` concurrent ``get_app_detail`` calls for the
+same app (plus the same number of ``get_categories`` calls) against a slow
+local stand-in server, with and without ``SingleFlight``. The response cache
+is disabled so only coalescing can save requests. A cross-process round
+starts ``--processes`` workers in ``shared`` mode on one lock directory.
+
+Also checks that every caller got an equal result and its own copy.
+
+    python3 benchmarks/bench_singleflight.py --threads 8 --latency 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_singleflight import SingleFlight
+from linglong_store_api import LinglongStoreClient
+from linglong_transport import HttpTransport
+
+
+APP_ID = "org.example.app00001"
+
+
+def burst(client: LinglongStoreClient, threads: int) -> List[Any]:
+    with ThreadPoolExecutor(max_workers=threads * 2) as pool:
+        details = [pool.submit(client.get_app_detail, APP_ID, True) for _ in range(threads)]
+        categories = [pool.submit(client.get_categories) for _ in range(threads)]
+        return [future.result() for future in details + categories]
+
+
+def isolated(results: List[Any]) -> bool:
+    """Equal results, but no two callers share an object."""
+    half = len(results) // 2
+    groups = (results[:half], results[half:])
+    equal = all(item == group[0] for group in groups for item in group)
+    return equal and len({id(item) for item in results}) == len(results)
+
+
+def run_threads(base_url: str, store: MockStore, threads: int, rounds: int, flight: Optional[SingleFlight]) -> Dict[str, Any]:
+    client = LinglongStoreClient(
+        base_url=base_url, transport=HttpTransport(), cache=False, singleflight=flight if flight is not None else False
+    )
+    before = store.request_count
+    ok = True
+    start = time.perf_counter()
+    for _ in range(rounds):
+        ok = isolated(burst(client, threads)) and ok
+    elapsed = time.perf_counter() - start
+    result = {
+        "calls": rounds * threads * 2,
+        "server_requests": store.request_count - before,
+        "wall_ms_per_round": round(elapsed / rounds * 1000, 1),
+        "results_isolated": ok,
+    }
+    if flight is not None:
+        result["stats"] = flight.stats()
+    return result
+
+
+def _worker(base_url: str, lock_dir: str, barrier: Any, queue: Any) -> None:
+    flight = SingleFlight(lock_dir)
+    client = LinglongStoreClient(base_url=base_url, transport=HttpTransport(), cache=False, singleflight=flight)
+    barrier.wait()
+    detail = client.get_app_detail(APP_ID)
+    queue.put((detail.app_id, flight.stats()["shared"]))
+
+
+def run_processes(base_url: str, store: MockStore, processes: int) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(processes)
+    queue = ctx.Queue()
+    before = store.request_count
+    with tempfile.TemporaryDirectory() as lock_dir:
+        workers = [ctx.Process(target=_worker, args=(base_url, lock_dir, barrier, queue)) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        outcomes = [queue.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join()
+    return {
+        "processes": processes,
+        "server_requests": store.request_count - before,
+        "shared": sum(shared for _, shared in outcomes),
+        "results_match": all(app_id == APP_ID for app_id, _ in outcomes),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark single-flight request coalescing")
+    parser.add_argument("--threads", type=int, default=8, help="identical concurrent calls per endpoint")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--apps", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1, help="injected server latency in seconds")
+    args = parser.parse_args()
+
+    with MockStoreServer(MockStore(args.apps, args.latency)) as server:
+        store = server.store
+        results = {
+            "uncoalesced": run_threads(server.base_url, store, args.threads, args.rounds, None),
+            "in_process": run_threads(server.base_url, store, args.threads, args.rounds, SingleFlight()),
+            "cross_process": run_processes(server.base_url, store, args.processes),
+        }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    ok = (
+        results["uncoalesced"]["results_isolated"]
+        and results["in_process"]["results_isolated"]
+        and results["cross_process"]["results_match"]
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Telemetry spool: install-path latency, batching and recovery after failures.
+
+Records ``--records`` installs/uninstalls into a temporary spool (several
+writer threads at once) and reports the per-record append latency, which is
+all an install pays. Then:
+
+- the store answers 503 for the first ``--outage`` requests, so the first
+  flush gives up and leaves everything spooled;
+- a second flush (the "next run") drains the spool in batches;
+- the server must have received every record exactly once, with at most
+  ``--batch-size`` items per request.
+
+A torn trailing line (crash mid-append) is written before flushing and
+must be ignored. Finally one batch holds a record the store refuses with
+HTTP 200 and envelope code 400: that batch must be dropped without retries,
+and the batches after it still delivered.
+
+    python3 benchmarks/bench_telemetry.py --records 2000 --batch-size 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, List
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_store_api import LinglongStoreClient
+from linglong_telemetry import TelemetrySpool
+
+
+def record_all(spool: TelemetrySpool, count: int, writers: int) -> List[float]:
+    def record(i: int) -> float:
+        start = time.perf_counter()
+        if i % 4 == 3:
+            spool.record_uninstall(f"org.example.app{i:05d}", version="1.0.0.0", arch="x86_64")
+        else:
+            spool.record_install(f"org.example.app{i:05d}", name=f"App {i}", version="1.0.0.1", arch="x86_64")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        return list(pool.map(record, range(count)))
+
+
+def delivered(store: MockStore) -> Dict[str, Any]:
+    added = [item["appId"] for body in store.installed_records for item in body.get("addedItems", [])]
+    removed = [item["appId"] for body in store.installed_records for item in body.get("removedItems", [])]
+    sizes = [len(body.get("addedItems", [])) + len(body.get("removedItems", [])) for body in store.installed_records]
+    return {"added": added, "removed": removed, "requests": len(sizes), "max_items": max(sizes, default=0)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the telemetry spool against a local mock server")
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--writers", type=int, default=8, help="concurrent recording threads")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--outage", type=int, default=3, help="requests answered 503 before the store recovers")
+    parser.add_argument("--durable", action="store_true", help="fsync every append")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, MockStoreServer(MockStore(10)) as server:
+        store = server.store
+        client = LinglongStoreClient(base_url=server.base_url, cache=False, singleflight=False)
+        spool = TelemetrySpool(directory, visitor_id="bench-visitor", durable=args.durable)
+
+        samples = record_all(spool, args.records, args.writers)
+        with open(os.path.join(directory, "spool.jsonl"), "ab") as f:
+            f.write(b'{"id":"torn","action":"inst')
+
+        store.fail_installed_records = args.outage
+        start = time.perf_counter()
+        failed = spool.flush(client, batch_size=args.batch_size, attempts=args.outage, backoff=0.01)
+        failed_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        drained = spool.flush(client, batch_size=args.batch_size, attempts=2, backoff=0.01)
+        drained_ms = (time.perf_counter() - start) * 1000
+
+        received = delivered(store)
+
+        # One refused record: its batch is dropped after one request, later batches go through.
+        store.reject_app_ids.add("org.example.bad")
+        spool.record_install("org.example.bad", version="1.0.0.1", arch="x86_64")
+        for i in range(args.batch_size * 2):
+            spool.record_install(f"org.example.late{i:05d}", version="1.0.0.1", arch="x86_64")
+        before = len(store.installed_records)
+        rejected = spool.flush(client, batch_size=args.batch_size, attempts=3, backoff=0.01)
+        late_requests = len(store.installed_records) - before
+        rejected_ok = (
+            rejected.rejected == args.batch_size
+            and rejected.sent == args.batch_size + 1
+            and rejected.pending == 0
+            and rejected.requests == 1 + late_requests
+            and spool.pending() == 0
+        )
+        expected_removed = sum(1 for i in range(args.records) if i % 4 == 3)
+        ok = (
+            failed.sent == 0
+            and failed.pending == args.records
+            and drained.sent == args.records
+            and drained.pending == 0
+            and spool.pending() == 0
+            and len(received["added"]) == args.records - expected_removed
+            and len(received["removed"]) == expected_removed
+            and len(set(received["added"] + received["removed"])) == args.records
+            and received["max_items"] <= args.batch_size
+        )
+        results = {
+            "records": args.records,
+            "record_latency": summarize(samples),
+            "outage_flush": {**asdict(failed), "wall_ms": round(failed_ms, 1)},
+            "recovery_flush": {**asdict(drained), "wall_ms": round(drained_ms, 1)},
+            "rejected_flush": asdict(rejected),
+            "server": {"requests": received["requests"], "max_items_per_request": received["max_items"]},
+            "delivered_exactly_once": ok,
+            "rejected_dropped_without_retry": rejected_ok,
+        }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0 if ok and rejected_ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
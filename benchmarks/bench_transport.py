@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compare the pooled http.client transport against the curl fallback.
+
+Starts a local stand-in store server and issues the same search/detail calls
+through ``LinglongStoreClient`` with each backend.
+
+    python3 benchmarks/bench_transport.py --iterations 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_store_api import LinglongStoreClient
+from linglong_transport import CurlTransport, HttpTransport
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark store transports against a local stand-in server")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--apps", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="injected server latency in seconds")
+    args = parser.parse_args()
+
+    results = {}
+    with MockStoreServer(MockStore(args.apps, args.latency)) as server:
+        for transport in (HttpTransport(), CurlTransport()):
+            client = LinglongStoreClient(base_url=server.base_url, transport=transport, cache=False)
+            results[transport.name] = {
+                "search": summarize(time_calls(lambda: client.search_apps_simple(name="app", page_size=20), args.iterations)),
+                "detail": summarize(time_calls(lambda: client.get_app_detail("org.example.app00001"), args.iterations)),
+            }
+            transport.close()
+
+    http_p50 = results["http"]["search"]["p50_ms"]
+    curl_p50 = results["curl"]["search"]["p50_ms"]
+    results["speedup_search_p50"] = round(curl_p50 / http_p50, 1) if http_p50 else None
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
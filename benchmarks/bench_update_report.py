@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scaling benchmark for the update report join.
+
+Builds synthetic installed lists (apps plus runtimes, several modules per
+app) with a fixed share of pending updates and times the report stage at
+growing sizes. The indexed join should grow linearly (constant time per
+ref); the previous implementation rescanned the update list for every
+updateable app.
+
+    python3 benchmarks/bench_update_report.py --sizes 1000,2500,5000,10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Dict, List, Tuple
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+
+from linglong_installed import InstalledApp
+from linglong_update_report import build_report
+
+
+def synthetic_refs(count: int, update_ratio: float) -> Tuple[List[InstalledApp], List[Dict[str, Any]]]:
+    installed = []
+    updates = []
+    step = max(1, int(round(1 / update_ratio))) if update_ratio > 0 else 0
+    for i in range(count):
+        runtime = i % 10 == 0
+        app_id = f"org.deepin.Runtime{i:05d}" if runtime else f"com.example.app{i // 2:05d}"
+        module = "binary" if i % 2 == 0 else "develop"
+        installed.append(InstalledApp(app_id, f"1.0.{i % 50}", "x86_64", module=module, kind="runtime" if runtime else "app"))
+        if step and i % step == 0:
+            updates.append({"appId": app_id, "arch": "x86_64", "module": module, "version": f"1.1.{i % 50}", "categoryName": "系统工具"})
+    return installed, updates
+
+
+def legacy_report(installed: List[InstalledApp], updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The previous generate_report: per-app linear scan and three list filters."""
+    updateable_apps = {app["appId"]: app["version"] for app in updates}
+    app_list = []
+    for app in installed:
+        app_list.append({
+            "appId": app.app_id,
+            "version": app.version,
+            "is_runtime": app.is_runtime,
+            "needs_update": app.app_id in updateable_apps,
+            "new_version": updateable_apps.get(app.app_id, ""),
+        })
+    app_list.sort(key=lambda x: (not x["needs_update"], x["appId"]))
+    lines = []
+    for app in app_list:
+        if app["needs_update"]:
+            info = next((u for u in updates if u["appId"] == app["appId"]), None)
+            lines.append(f'{app["appId"]} {info["categoryName"] if info else ""}')
+    return {
+        "runtime_count": sum(1 for app in app_list if app["is_runtime"]),
+        "updateable_apps": [app for app in app_list if app["needs_update"]],
+        "up_to_date_apps": [app for app in app_list if not app["needs_update"]],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the update report join at growing installed-list sizes")
+    parser.add_argument("--sizes", default="1000,2500,5000,10000")
+    parser.add_argument("--update-ratio", type=float, default=0.3)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    rows = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        installed, updates = synthetic_refs(size, args.update_ratio)
+        report = build_report(installed, updates)
+        row: Dict[str, Any] = {
+            "refs": size,
+            "updates": len(updates),
+            "updateable": report.updateable_count,
+            "join": summarize(time_calls(lambda: build_report(installed, updates), args.iterations)),
+            "render_json": summarize(time_calls(report.render_json, args.iterations)),
+        }
+        row["join_us_per_ref"] = round(row["join"]["p50_ms"] * 1000 / size, 3)
+        if not args.skip_legacy:
+            row["legacy"] = summarize(time_calls(lambda: legacy_report(installed, updates), max(1, args.iterations // 5)))
+            row["legacy_us_per_ref"] = round(row["legacy"]["p50_ms"] * 1000 / size, 3)
+        rows.append(row)
+    print(json.dumps(rows, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
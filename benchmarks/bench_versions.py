@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Version ordering and the local version index vs server-side update checks.
+
+- ``ordering``: sorts ``--versions`` synthetic dotted versions as strings,
+  by ``version_key``, and as ``Version`` objects parsed once up front;
+  counts how many positions string order gets wrong and times each step.
+- ``index``: builds a ``VersionIndex`` of ``--apps`` x ``--per-app`` records
+  and times ``newest_compatible`` lookups.
+- ``update_check``: for ``--installed`` apps on the local stand-in server,
+  compares ``check_updates_batch`` (server-side) with a cold local check
+  (``sync`` fetches the version lists) and a warm one from the saved index,
+  and checks that all three find the same updates.
+
+    python3 benchmarks/bench_versions.py --versions 100000 --installed 500 --latency 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from operator import attrgetter
+from typing import Any, Dict, List, Set, Tuple
+
+import _common  # noqa: F401  (adds the skill scripts to sys.path)
+from _common import summarize, time_calls
+from mock_store_server import MockStore, MockStoreServer
+
+from linglong_store_api import LinglongStoreClient
+from linglong_versions import Version, VersionIndex, version_key
+
+
+def synthetic_versions(count: int, rng: random.Random) -> List[str]:
+    return [
+        ".".join(str(rng.randint(0, 12)) for _ in range(rng.choice((3, 4))))
+        for _ in range(count)
+    ]
+
+
+def timed(fn: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def update_set(updates: List[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+    return {(str(update["appId"]), str(update["version"])) for update in updates}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark version ordering and local update resolution")
+    parser.add_argument("--versions", type=int, default=100_000, help="strings to sort in the ordering phase")
+    parser.add_argument("--apps", type=int, default=2000, help="apps in the synthetic index")
+    parser.add_argument("--per-app", type=int, default=20, help="versions per app in the synthetic index")
+    parser.add_argument("--installed", type=int, default=500, help="installed apps for the update check")
+    parser.add_argument("--latency", type=float, default=0.02, help="injected server latency in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    versions = synthetic_versions(args.versions, rng)
+    by_string, string_ms = timed(lambda: sorted(versions))
+    by_key, key_ms = timed(lambda: sorted(versions, key=version_key))
+    parsed, parse_ms = timed(lambda: [Version(v) for v in versions])
+    by_parsed, presorted_ms = timed(lambda: sorted(parsed, key=attrgetter("key")))
+    ordering = {
+        "count": len(versions),
+        "string_sort_ms": string_ms,
+        "version_key_sort_ms": key_ms,
+        "parse_once_ms": parse_ms,
+        "sort_parsed_ms": presorted_ms,
+        "string_order_wrong_positions": sum(
+            1 for a, b in zip(by_string, by_key) if version_key(a) != version_key(b)
+        ),
+    }
+
+    records = [
+        {"appId": f"org.example.app{i:05d}", "version": version, "arch": arch, "channel": "main", "module": "binary"}
+        for i in range(args.apps)
+        for version in synthetic_versions(args.per_app // 2, rng)
+        for arch in ("x86_64", "arm64")
+    ]
+    index, build_ms = timed(lambda: VersionIndex(records))
+    queries = [(f"org.example.app{rng.randrange(args.apps):05d}", rng.choice(versions)) for _ in range(10_000)]
+    position = iter(range(10 ** 9))
+
+    def lookup() -> None:
+        app_id, current = queries[next(position) % len(queries)]
+        index.newest_compatible(app_id, current, arch="x86_64", module="binary")
+
+    index_phase = {
+        "records": len(records),
+        "build_ms": build_ms,
+        "newest_compatible": summarize(time_calls(lookup, len(queries))),
+    }
+
+    store = MockStore(max(args.apps, args.installed), args.latency)
+    with MockStoreServer(store) as server, tempfile.TemporaryDirectory() as directory:
+        client = LinglongStoreClient(base_url=server.base_url, cache=False, singleflight=False)
+        items = [
+            {"appId": app["appId"], "arch": "x86_64", "version": "1.0.0.0", "channel": "main", "module": "binary"}
+            for app in store.apps[:args.installed]
+        ]
+        before = store.request_count
+        remote, remote_ms = timed(lambda: client.check_updates_batch(items))
+        remote_requests = store.request_count - before
+
+        path = os.path.join(directory, "versions.json")
+        local_index = VersionIndex()
+        before = store.request_count
+        errors, sync_ms = timed(lambda: local_index.sync(client, [item["appId"] for item in items]))
+        sync_requests = store.request_count - before
+        cold, cold_ms = timed(lambda: local_index.check_updates(items))
+        local_index.save(path)
+
+        before = store.request_count
+        warm_index, load_ms = timed(lambda: VersionIndex.load(path))
+        warm, warm_ms = timed(lambda: warm_index.check_updates(items))
+        warm_requests = store.request_count - before
+        stale_after_load = warm_index.stale(item["appId"] for item in items)
+
+    update_check = {
+        "installed": len(items),
+        "server_check_ms": remote_ms,
+        "server_requests": remote_requests,
+        "cold_sync_ms": sync_ms,
+        "cold_sync_requests": sync_requests,
+        "cold_resolve_ms": cold_ms,
+        "warm_load_ms": load_ms,
+        "warm_resolve_ms": warm_ms,
+        "warm_requests": warm_requests,
+        "updates": len(warm),
+    }
+    checks = {
+        "key_order_differs_from_string_order": ordering["string_order_wrong_positions"] > 0,
+        "parsed_matches_key_order": [v.key for v in by_parsed] == [version_key(v) for v in by_key],
+        "sync_ok": not errors,
+        "local_matches_server": update_set(cold) == update_set(list(remote)) == update_set(warm),
+        "warm_offline": warm_requests == 0 and not stale_after_load,
+    }
+    results = {
+        "config": {"versions": args.versions, "apps": args.apps, "per_app": args.per_app,
+                   "installed": args.installed, "latency_s": args.latency},
+        "ordering": ordering,
+        "index": index_phase,
+        "update_check": update_check,
+        "checks": checks,
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for storeapi.linyaps.org.cn used by the benchmarks.
+
+Serves a synthetic catalog over plain HTTP/1.1 with keep-alive so transports
+can be compared without touching the live API. With ``assets=True`` (``--assets``)
+the catalog's icon and screenshot URLs point at this server, which serves
+PNG-like bytes for them; every eighth icon is shared, like a default icon.
+
+    python3 benchmarks/mock_store_server.py --port 8765 --apps 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+CATEGORY_NAMES = [
+    ("01", "办公学习"),
+    ("02", "系统工具"),
+    ("03", "开发编程"),
+    ("04", "影音娱乐"),
+    ("05", "图形图像"),
+    ("06", "游戏娱乐"),
+    ("07", "网络应用"),
+    ("08", "阅读翻译"),
+]
+# Served by /web/categories?lang=en.
+CATEGORY_NAMES_EN = {
+    "01": "Office & Learning",
+    "02": "System Tools",
+    "03": "Development",
+    "04": "Audio & Video",
+    "05": "Graphics",
+    "06": "Games",
+    "07": "Network",
+    "08": "Reading & Translation",
+}
+
+
+def build_catalog(app_count: int, arch: str = "x86_64") -> List[Dict[str, Any]]:
+    apps = []
+    for i in range(app_count):
+        category_id, category_name = CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+        apps.append({
+            "appId": f"org.example.app{i:05d}",
+            "name": f"Example App {i}",
+            "zhName": f"示例应用 {i}",
+            "version": f"1.{i % 10}.{i % 7}.{i % 3}",
+            "arch": arch,
+            "module": "binary",
+            "channel": "main",
+            "repoName": "stable",
+            "categoryId": category_id,
+            "categoryName": category_name,
+            "description": f"Synthetic application number {i} used for benchmarks.",
+            "icon": f"https://example.invalid/icons/app{i:05d}.png",
+            "devName": "Example Dev",
+            "size": str(1024 * 1024 * (1 + i % 50)),
+            "appScreenshotList": [
+                {"screenshotKey": f"https://example.invalid/shots/app{i:05d}-{n}.png"} for n in range(2)
+            ],
+        })
+    return apps
+
+
+class MockStore:
+    def __init__(self, app_count: int = 200, latency: float = 0.0, etags: bool = True, assets: bool = False) -> None:
+        self.apps = build_catalog(app_count)
+        self.assets = assets
+        self.asset_count = 0
+        self.by_id = {app["appId"]: app for app in self.apps}
+        self.latency = latency
+        self.etags = etags
+        self.request_count = 0
+        self.not_modified_count = 0
+        # SaveInstalledRecordVO bodies received; fail_installed_records > 0 answers 503 that many times.
+        self.installed_records: List[Dict[str, Any]] = []
+        self.fail_installed_records = 0
+        # Bodies naming one of these app ids get HTTP 200 with envelope code 400.
+        self.reject_app_ids: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.request_count += 1
+
+    def count_asset(self) -> None:
+        with self._lock:
+            self.asset_count += 1
+
+    def serve_assets_from(self, base_url: str) -> None:
+        """Point icon/screenshot URLs at ``base_url`` instead of example.invalid."""
+        for app in self.apps:
+            app["icon"] = app["icon"].replace("https://example.invalid", base_url)
+            for shot in app["appScreenshotList"]:
+                shot["screenshotKey"] = shot["screenshotKey"].replace("https://example.invalid", base_url)
+
+    @staticmethod
+    def asset(path: str) -> Optional[bytes]:
+        """Deterministic image bytes for /icons/appNNNNN.png and /shots/appNNNNN-N.png."""
+        name = path.rsplit("/", 1)[-1]
+        if path.startswith("/icons/app") and name.endswith(".png"):
+            index = int(name[3:-4])
+            seed, size = (f"default-{index % 8}" if index % 8 == 0 else name), 4 * 1024
+        elif path.startswith("/shots/app") and name.endswith(".png"):
+            seed, size = name, 48 * 1024
+        else:
+            return None
+        block = hashlib.sha256(seed.encode("utf-8")).digest()
+        return b"\x89PNG\r\n\x1a\n" + (block * (size // len(block)))[: size - 8]
+
+    def count_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified_count += 1
+
+    def categories(self, lang: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = []
+        for category_id, category_name in CATEGORY_NAMES:
+            if lang == "en":
+                category_name = CATEGORY_NAMES_EN[category_id]
+            count = sum(1 for app in self.apps if app["categoryId"] == category_id)
+            rows.append({"categoryId": category_id, "categoryName": category_name, "count": count, "categoryCount": count})
+        return rows
+
+    def search(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        page_no = max(int(body.get("pageNo") or 1), 1)
+        page_size = max(int(body.get("pageSize") or 20), 1)
+        name = str(body.get("name") or body.get("zhName") or "").lower()
+        category_id = body.get("categoryId")
+        matches = [
+            app
+            for app in self.apps
+            if (not category_id or app["categoryId"] == category_id)
+            and (not name or name in app["name"].lower() or name in app["zhName"].lower() or name in app["appId"])
+        ]
+        start = (page_no - 1) * page_size
+        records = matches[start:start + page_size]
+        pages = (len(matches) + page_size - 1) // page_size
+        return {"code": 200, "data": {"records": records, "total": len(matches), "size": page_size, "current": page_no, "pages": pages}}
+
+    def detail(self, body: List[Dict[str, Any]]) -> Dict[str, Any]:
+        data = {}
+        for item in body:
+            app = self.by_id.get(item.get("appId"))
+            if app is not None:
+                data[app["appId"]] = [app]
+        return {"code": 200, "data": data}
+
+    def versions(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Older releases plus the current one, for x86_64 and arm64 and a develop module."""
+        app = self.by_id.get(body.get("appId"))
+        records: List[Dict[str, Any]] = []
+        if app is not None:
+            for arch in ("x86_64", "arm64"):
+                for version in dict.fromkeys(("0.9.0.0", "1.0.0.0", app["version"])):
+                    records.append(dict(app, arch=arch, version=version))
+            records.append(dict(app, module="develop"))
+        arch = body.get("arch")
+        if arch:
+            records = [record for record in records if record["arch"] == arch]
+        page_no = max(int(body.get("pageNo") or 1), 1)
+        page_size = max(int(body.get("pageSize") or 20), 1)
+        start = (page_no - 1) * page_size
+        return {"code": 200, "data": {"records": records[start:start + page_size], "total": len(records)}}
+
+    def check_updates(self, body: List[Dict[str, Any]]) -> Dict[str, Any]:
+        updates = []
+        for item in body:
+            app = self.by_id.get(item.get("appId"))
+            if app is not None and app["version"] != item.get("version"):
+                updates.append({
+                    "appId": app["appId"],
+                    "arch": item.get("arch") or app["arch"],
+                    "version": app["version"],
+                    "categoryName": app["categoryName"],
+                })
+        return {"code": 200, "data": updates}
+
+    def category_count(self, category_id: Optional[str]) -> Dict[str, Any]:
+        count = sum(1 for app in self.apps if app["categoryId"] == category_id)
+        return {"code": 200, "data": count}
+
+    def save_installed_record(self, body: Dict[str, Any]) -> Tuple[int, Any]:
+        with self._lock:
+            if self.fail_installed_records > 0:
+                self.fail_installed_records -= 1
+                return 503, {"code": 503, "msg": "unavailable"}
+            items = body.get("addedItems", []) + body.get("removedItems", [])
+            if any(item.get("appId") in self.reject_app_ids for item in items):
+                return 200, {"code": 400, "msg": "invalid record"}
+            self.installed_records.append(body)
+        return 200, {"code": 200, "data": None}
+
+    def route(self, method: str, path: str, query: Dict[str, List[str]], body: Any) -> Tuple[int, Any]:
+        if method == "GET" and path == "/visit/getDisCategoryList":
+            return 200, {"code": 200, "data": self.categories()}
+        if method == "GET" and path == "/web/categories":
+            return 200, {"code": 200, "data": self.categories((query.get("lang") or [None])[0])}
+        if method == "GET" and path == "/web/getCategoryAppCount":
+            return 200, self.category_count((query.get("categoryId") or [None])[0])
+        if method == "POST" and path == "/visit/getSearchAppList":
+            return 200, self.search(body or {})
+        if method == "POST" and path == "/app/getAppDetail":
+            return 200, self.detail(body or [])
+        if method == "POST" and path == "/visit/getSearchAppVersionList":
+            return 200, self.versions(body or {})
+        if method == "POST" and path == "/app/appCheckUpdate":
+            return 200, self.check_updates(body or [])
+        if method == "POST" and path == "/app/saveInstalledRecord":
+            return self.save_installed_record(body or {})
+        return 404, {"code": 404, "msg": f"no route for {method} {path}"}
+
+
+def make_handler(store: MockStore):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _handle(self, method: str) -> None:
+            parts = urlsplit(self.path)
+            if store.assets and method == "GET" and parts.path.startswith(("/icons/", "/shots/")):
+                self._send_asset(parts.path)
+                return
+            store.count_request()
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                self._send(400, {"code": 400, "msg": "invalid JSON"})
+                return
+            if store.latency:
+                time.sleep(store.latency)
+            status, payload = store.route(method, parts.path, parse_qs(parts.query), body)
+            self._send(status, payload)
+
+        def _send(self, status: int, payload: Any) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            etag = f'"{hashlib.sha1(data).hexdigest()}"' if store.etags and status == 200 else None
+            if etag and self.headers.get("If-None-Match") == etag:
+                store.count_not_modified()
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json;charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_asset(self, path: str) -> None:
+            store.count_asset()
+            if store.latency:
+                time.sleep(store.latency)
+            data = store.asset(path)
+            if data is None:
+                self._send(404, {"code": 404, "msg": f"no asset {path}"})
+                return
+            etag = f'"{hashlib.sha1(data).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                store.count_not_modified()
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            self._handle("GET")
+
+        def do_POST(self) -> None:
+            self._handle("POST")
+
+    return Handler
+
+
+class MockStoreServer:
+    """Run a ``MockStore`` on a background thread; usable as a context manager."""
+
+    def __init__(self, store: Optional[MockStore] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.store = store or MockStore()
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.store))
+        self.httpd.daemon_threads = True
+        if self.store.assets:
+            self.store.serve_assets_from(self.base_url)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockStoreServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockStoreServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Linglong store API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--apps", type=int, default=200, help="synthetic catalog size")
+    parser.add_argument("--latency", type=float, default=0.0, help="injected per-request latency in seconds")
+    parser.add_argument("--assets", action="store_true", help="serve icon/screenshot URLs from this server")
+    args = parser.parse_args()
+
+    server = MockStoreServer(MockStore(args.apps, args.latency, assets=args.assets), args.host, args.port)
+    print(f"serving {args.apps} apps on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
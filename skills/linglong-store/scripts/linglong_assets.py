@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache for app icons and screenshots.
+
+``AssetCache`` downloads ``AppSummary.icon``, ``AppDetail.icon`` and
+``AppDetail.screenshots`` URLs concurrently and returns local file paths, so
+showing the same images again costs no bandwidth. Layout under
+``$XDG_CACHE_HOME/linglong-store/assets``:
+
+- ``objects/<h[:2]>/<sha256>.<ext>``: image bytes, named by content hash, so
+  the same image behind different URLs is stored once;
+- ``urls/<sha256(url)>.json``: which object a URL resolved to, with its
+  ``ETag``/``Last-Modified`` validators and last validation time;
+- ``thumbs/<sha256>-<w>x<h>.png``: pre-scaled thumbnails (optional backend).
+
+Stale URLs are revalidated with ``If-None-Match``/``If-Modified-Since``; a
+``304`` keeps the stored object. Objects and thumbnails are bounded by size
+and evicted least-recently-used first; a URL whose object was evicted is
+simply downloaded again.
+
+Thumbnails use Pillow when it is importable, else ImageMagick (``magick`` or
+``convert``) when it is on ``PATH``; without either ``thumbnail`` stays
+``None`` and callers fall back to the full image.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+try:
+    from PIL import Image
+except ImportError:  # optional: ImageMagick or no thumbnails
+    Image = None  # type: ignore[assignment]
+
+from linglong_cache import HOUR, cache_home
+from linglong_singleflight import SingleFlight
+from linglong_store_api import LinglongStoreClient
+from linglong_transport import TransportError, get_transport
+
+
+DEFAULT_ASSET_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_ASSET_TTL = 7 * 24 * HOUR
+DEFAULT_PREFETCH_WORKERS = 8
+MAX_REDIRECTS = 5
+
+# Leading bytes -> file extension, so viewers that go by name open the file.
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"\x00\x00\x01\x00", ".ico"),
+)
+_KNOWN_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico", ".bmp")
+
+
+def sniff_extension(data: bytes, url: str = "") -> str:
+    for signature, ext in _SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    head = data[:512].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return ".svg"
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    return ext if ext in _KNOWN_EXTENSIONS else ".bin"
+
+
+@dataclass
+class AssetResult:
+    """Where one URL ended up.
+
+    ``status`` is ``hit`` (fresh local copy), ``revalidated`` (304),
+    ``downloaded``, ``stale`` (expired local copy returned because the
+    request failed; ``error`` says why) or ``error``; ``path`` is ``None``
+    only on error.
+    """
+
+    url: str
+    path: Optional[str] = None
+    sha256: str = ""
+    size: int = 0
+    status: str = "error"
+    error: str = ""
+    thumbnail: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None
+
+
+class AssetCache:
+    """Size-bounded, content-addressed image cache with parallel prefetch.
+
+    Args:
+        directory: cache root (default: ``$XDG_CACHE_HOME/linglong-store/assets``).
+        max_bytes: size cap for objects plus thumbnails.
+        ttl: seconds before a URL is revalidated.
+        transport: ``get_transport()`` name or instance.
+        max_workers: concurrent downloads in ``prefetch``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = DEFAULT_ASSET_MAX_BYTES,
+        ttl: float = DEFAULT_ASSET_TTL,
+        transport: Any = None,
+        max_workers: int = DEFAULT_PREFETCH_WORKERS,
+    ) -> None:
+        self.directory = directory or os.path.join(cache_home(), "assets")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.transport = transport if transport is not None and not isinstance(transport, str) else get_transport(transport)
+        self.max_workers = max(1, max_workers)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+        self._stats = {"hit": 0, "revalidated": 0, "downloaded": 0, "stale": 0, "error": 0, "bytes_downloaded": 0}
+
+    # -- paths -------------------------------------------------------------
+
+    def _url_path(self, url: str) -> str:
+        return os.path.join(self.directory, "urls", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _object_path(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.directory, "objects", sha256[:2], sha256 + ext)
+
+    def _thumb_path(self, sha256: str, size: Tuple[int, int]) -> str:
+        return os.path.join(self.directory, "thumbs", f"{sha256}-{size[0]}x{size[1]}.png")
+
+    # -- lookups -----------------------------------------------------------
+
+    def _read_record(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._url_path(url), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        path = self._object_path(record.get("sha256", ""), record.get("ext", ""))
+        if not record.get("sha256") or not os.path.exists(path):
+            return None  # object evicted: treat as a miss
+        record["path"] = path
+        return record
+
+    def _write_record(self, url: str, record: Dict[str, Any]) -> None:
+        data = {key: value for key, value in record.items() if key != "path"}
+        self._atomic_write(self._url_path(url), json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    def _atomic_write(self, path: str, data: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def path_for(self, url: str) -> Optional[str]:
+        """Local path of ``url`` if it is cached (fresh or not), without network I/O."""
+        record = self._read_record(url)
+        return record["path"] if record else None
+
+    # -- fetching ----------------------------------------------------------
+
+    def fetch(self, url: str, *, refresh: bool = False, thumbnail: Optional[Tuple[int, int]] = None) -> AssetResult:
+        """Local copy of ``url``, downloading or revalidating it when needed.
+
+        ``refresh`` revalidates even a fresh entry. Never raises for network
+        errors: a stale local copy is returned if there is one (``stale``),
+        otherwise an ``error`` result.
+        """
+        result = self._flight.do(SingleFlight.key("asset", url, refresh), lambda: self._fetch(url, refresh))
+        if thumbnail and result.ok:
+            # The result may be shared with coalesced callers: copy, don't mutate.
+            result = replace(result, thumbnail=self.thumbnail(result.path, thumbnail))
+        with self._lock:
+            self._stats[result.status] += 1
+        return result
+
+    def _fetch(self, url: str, refresh: bool) -> AssetResult:
+        record = self._read_record(url)
+        # Freshness follows this cache's TTL, measured from the last validation.
+        if record is not None and not refresh and time.time() - record.get("validated_at", 0) < self.ttl:
+            os.utime(record["path"])  # mtime doubles as the LRU clock
+            return AssetResult(url, record["path"], record["sha256"], record.get("size", 0), "hit")
+
+        headers = {"Accept": "image/*,*/*;q=0.8"}
+        if record is not None:
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                headers["If-Modified-Since"] = record["last_modified"]
+        try:
+            response = self._get(url, headers)
+        except TransportError as exc:
+            if record is not None:
+                # Offline or failing CDN: the stale copy beats no image.
+                return AssetResult(url, record["path"], record["sha256"], record.get("size", 0), "stale", str(exc))
+            return AssetResult(url, error=str(exc))
+
+        now = time.time()
+        if response.status == 304 and record is not None:
+            record["validated_at"] = now
+            for name in ("etag", "last-modified"):
+                if response.headers.get(name):
+                    record[name.replace("-", "_")] = response.headers[name]
+            self._write_record(url, record)
+            os.utime(record["path"])
+            return AssetResult(url, record["path"], record["sha256"], record.get("size", 0), "revalidated")
+        if response.status != 200 or not response.body:
+            return AssetResult(url, error=f"unexpected HTTP {response.status} for {url}")
+
+        body = response.body
+        sha256 = hashlib.sha256(body).hexdigest()
+        ext = sniff_extension(body, url)
+        path = self._object_path(sha256, ext)
+        added = 0
+        try:
+            if os.path.exists(path):
+                os.utime(path)  # same bytes behind another URL: stored once
+            else:
+                self._atomic_write(path, body)
+                added = len(body)
+            self._write_record(url, {
+                "url": url,
+                "sha256": sha256,
+                "ext": ext,
+                "size": len(body),
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "validated_at": now,
+            })
+        except OSError as exc:
+            return AssetResult(url, error=f"cannot store {url}: {exc}")
+        with self._lock:
+            self._stats["bytes_downloaded"] += len(body)
+        if added:
+            self._account(added)
+        return AssetResult(url, path, sha256, len(body), "downloaded")
+
+    def _get(self, url: str, headers: Dict[str, str]) -> Any:
+        """GET following redirects (the transports return 3xx as-is)."""
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self.transport.request("GET", url, headers=headers)
+            location = response.headers.get("location")
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return response
+        raise TransportError(f"too many redirects for {url}", url=url)
+
+    def prefetch(
+        self,
+        urls: Iterable[str],
+        *,
+        refresh: bool = False,
+        thumbnail: Optional[Tuple[int, int]] = None,
+    ) -> Dict[str, AssetResult]:
+        """Fetch many URLs concurrently; returns ``{url: AssetResult}`` in input order."""
+        unique = list(dict.fromkeys(url for url in urls if url))
+        if not unique:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique))) as pool:
+            results = pool.map(lambda url: self.fetch(url, refresh=refresh, thumbnail=thumbnail), unique)
+            return dict(zip(unique, results))
+
+    def prefetch_apps(
+        self,
+        apps: Iterable[Any],
+        *,
+        screenshots: bool = True,
+        refresh: bool = False,
+        thumbnail: Optional[Tuple[int, int]] = None,
+    ) -> Dict[str, AssetResult]:
+        """Icons (and screenshots) of ``AppSummary``/``AppDetail`` records."""
+        urls: List[str] = []
+        for app in apps:
+            urls.append(getattr(app, "icon", None) or "")
+            if screenshots:
+                urls.extend(getattr(app, "screenshots", None) or [])
+        return self.prefetch(urls, refresh=refresh, thumbnail=thumbnail)
+
+    # -- thumbnails --------------------------------------------------------
+
+    def thumbnail(self, path: str, size: Tuple[int, int]) -> Optional[str]:
+        """Cached PNG no larger than ``size`` (aspect kept), or ``None`` without a backend."""
+        sha256 = os.path.splitext(os.path.basename(path))[0]
+        target = self._thumb_path(sha256, size)
+        if os.path.exists(target):
+            os.utime(target)
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-", suffix=".png")
+        os.close(fd)
+        try:
+            if not _scale(path, tmp, size):
+                return None
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        self._account(os.path.getsize(target))
+        return target
+
+    # -- size cap ----------------------------------------------------------
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        files = []
+        for sub in ("objects", "thumbs"):
+            for root, _, names in os.walk(os.path.join(self.directory, sub)):
+                for name in names:
+                    if name.startswith(".tmp-"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._approx_bytes += added
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop least-recently-used objects and thumbnails until the cache fits.
+
+        Thumbnails of an evicted object go with it. Returns the number of
+        removed files.
+        """
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        # Same headroom as the response cache, so writes do not rescan each time.
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            if os.path.basename(os.path.dirname(path)) != "thumbs":
+                sha256 = os.path.splitext(os.path.basename(path))[0]
+                thumbs = os.path.join(self.directory, "thumbs")
+                for name in _listdir(thumbs):
+                    if name.startswith(sha256 + "-"):
+                        try:
+                            total -= os.path.getsize(os.path.join(thumbs, name))
+                            os.unlink(os.path.join(thumbs, name))
+                            removed += 1
+                        except OSError:
+                            pass
+        with self._lock:
+            self._approx_bytes = total
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._approx_bytes = 0
+        for sub in ("objects", "urls", "thumbs"):
+            shutil.rmtree(os.path.join(self.directory, sub), ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        files = self._files()
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            "directory": self.directory,
+            "objects": sum(1 for _, _, path in files if os.sep + "objects" + os.sep in path),
+            "urls": len(_listdir(os.path.join(self.directory, "urls"))),
+            "bytes": sum(size for _, size, _ in files),
+            "max_bytes": self.max_bytes,
+            "thumbnails": thumbnail_backend(),
+        })
+        return stats
+
+
+def _listdir(path: str) -> List[str]:
+    try:
+        return [name for name in os.listdir(path) if not name.startswith(".tmp-")]
+    except OSError:
+        return []
+
+
+def thumbnail_backend() -> Optional[str]:
+    """``pillow``, ``magick``, ``convert`` or ``None``."""
+    if Image is not None:
+        return "pillow"
+    for tool in ("magick", "convert"):
+        if shutil.which(tool):
+            return tool
+    return None
+
+
+def _scale(source: str, target: str, size: Tuple[int, int]) -> bool:
+    backend = thumbnail_backend()
+    if backend == "pillow":
+        try:
+            with Image.open(source) as image:
+                image.thumbnail(size)
+                image.save(target, "PNG")
+            return True
+        except (OSError, ValueError):
+            return False
+    if backend is None:
+        return False
+    # "WxH>" only shrinks; [0] takes the first frame of GIF/ICO files.
+    cmd = [backend, f"{source}[0]", "-thumbnail", f"{size[0]}x{size[1]}>", f"png:{target}"]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """``"320x180"`` -> ``(320, 180)``."""
+    width, sep, height = text.lower().partition("x")
+    try:
+        size = (int(width), int(height or width))
+    except ValueError:
+        raise ValueError(f"invalid thumbnail size: {text} (expected WIDTHxHEIGHT)") from None
+    if min(size) <= 0 or (sep and not height):
+        raise ValueError(f"invalid thumbnail size: {text} (expected WIDTHxHEIGHT)")
+    return size
+
+
+_default_lock = threading.Lock()
+_default_assets: Optional[AssetCache] = None
+
+
+def get_asset_cache() -> AssetCache:
+    """Return the process-wide asset cache."""
+    global _default_assets
+    with _default_lock:
+        if _default_assets is None:
+            _default_assets = AssetCache()
+        return _default_assets
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Download Linglong app icons/screenshots into the local asset cache")
+    parser.add_argument("urls", nargs="*", help="image URLs to cache")
+    parser.add_argument("--detail", nargs="+", metavar="APP_ID", help="cache icons and screenshots of these apps")
+    parser.add_argument("--thumbnail", metavar="WxH", help="also create thumbnails (needs Pillow or ImageMagick)")
+    parser.add_argument("--refresh", action="store_true", help="revalidate even fresh entries")
+    parser.add_argument("--workers", type=int, default=DEFAULT_PREFETCH_WORKERS, help="concurrent downloads")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--stats", action="store_true", help="print cache statistics")
+    parser.add_argument("--evict", action="store_true", help="enforce the size cap now")
+    parser.add_argument("--clear", action="store_true", help="delete every cached asset")
+    args = parser.parse_args()
+
+    cache = AssetCache(max_workers=args.workers)
+    if args.clear:
+        cache.clear()
+    if args.evict:
+        print(f"evicted {cache.evict()} files")
+    try:
+        thumbnail = parse_size(args.thumbnail) if args.thumbnail else None
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    results: Dict[str, AssetResult] = {}
+    if args.detail:
+        details = LinglongStoreClient().get_app_details(args.detail)
+        results.update(cache.prefetch_apps(details.values(), refresh=args.refresh, thumbnail=thumbnail))
+    if args.urls:
+        results.update(cache.prefetch(args.urls, refresh=args.refresh, thumbnail=thumbnail))
+
+    if args.json:
+        print(json.dumps([vars(result) for result in results.values()], ensure_ascii=False, indent=2))
+    else:
+        for result in results.values():
+            shown = result.thumbnail or result.path
+            print(f"{result.status:<11} {shown or result.error}  {result.url}")
+    if args.stats:
+        print(json.dumps(cache.stats(), ensure_ascii=False, indent=2))
+    return 0 if all(result.ok for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
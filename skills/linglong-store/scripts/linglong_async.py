@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asyncio client for the Linglong store API.
+
+``AsyncLinglongStoreClient`` mirrors the read methods of
+``LinglongStoreClient`` (categories, category counts, search, details) as
+coroutines returning the same ``AppSummary``/``AppDetail`` types, so callers
+can ``asyncio.gather`` independent lookups instead of running them one after
+another.
+
+Requests go through ``AsyncHttpTransport``: a small HTTP/1.1 client on
+``asyncio`` streams with keep-alive connections pooled per host and a
+semaphore bounding the number of requests in flight. It shares the status
+handling and ``TransportResponse`` contract of ``linglong_transport``, and the
+client uses the same response cache as the synchronous one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import ssl
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+from linglong_cache import ResponseCache
+from linglong_category_index import CategoryIndex
+from linglong_store_api import (
+    DEFAULT_ARCH,
+    DEFAULT_DETAIL_CHUNK_SIZE,
+    DEFAULT_LANG,
+    DEFAULT_REPO,
+    AppDetail,
+    AppDetailBatch,
+    AppSummary,
+    LinglongStoreClient,
+    extract_app_items,
+    format_app_list,
+    parse_app_detail,
+    parse_category_count,
+    parse_json_object,
+)
+from linglong_transport import (
+    DEFAULT_MAX_IDLE_PER_HOST,
+    DEFAULT_TIMEOUT,
+    TransportError,
+    TransportResponse,
+    base_headers,
+    check_status,
+)
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+_MAX_LINE = 64 * 1024
+
+T = TypeVar("T")
+
+_PoolKey = Tuple[str, str, int]
+_Stream = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class _StaleConnection(Exception):
+    """A pooled connection was closed by the server before responding."""
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("connection closed while reading headers")
+        if line in (b"\r\n", b"\n"):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    parts: List[bytes] = []
+    while True:
+        size_line = await reader.readline()
+        if not size_line:
+            raise ConnectionResetError("connection closed inside chunked body")
+        size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+        if size == 0:
+            # Trailers, terminated by an empty line.
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(parts)
+        parts.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+class AsyncHttpTransport:
+    """HTTP/1.1 over asyncio streams with per-host keep-alive pools.
+
+    At most ``max_concurrency`` requests run at once; each request checks out
+    its own connection and returns it to the idle pool afterwards. Instances
+    belong to one event loop.
+    """
+
+    name = "asyncio"
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.max_concurrency = max(1, max_concurrency)
+        self._idle: Dict[_PoolKey, List[_Stream]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._ssl: Optional[ssl.SSLContext] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _acquire(self, key: _PoolKey) -> Tuple[_Stream, bool]:
+        idle = self._idle.get(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return (reader, writer), True
+            writer.close()
+        scheme, host, port = key
+        context = None
+        if scheme == "https":
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context()
+            context = self._ssl
+        reader, writer = await asyncio.open_connection(host, port, ssl=context, limit=_MAX_LINE)
+        return (reader, writer), False
+
+    def _release(self, key: _PoolKey, stream: _Stream) -> None:
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self.max_idle_per_host:
+            idle.append(stream)
+        else:
+            stream[1].close()
+
+    async def _exchange(
+        self,
+        key: _PoolKey,
+        request: bytes,
+        method: str,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        (reader, writer), reused = await self._acquire(key)
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise _StaleConnection() if reused else ConnectionResetError("connection closed by server")
+            version, _, rest = status_line.decode("latin-1").partition(" ")
+            status = int(rest.split(" ", 1)[0])
+            headers = await _read_headers(reader)
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+                data = b""
+            elif "chunked" in headers.get("transfer-encoding", "").lower():
+                data = await _read_chunked(reader)
+            elif "content-length" in headers:
+                data = await reader.readexactly(int(headers["content-length"]))
+            else:
+                data = await reader.read()
+                keep_alive = False
+        except BaseException:
+            writer.close()
+            raise
+        if keep_alive:
+            self._release(key, (reader, writer))
+        else:
+            writer.close()
+        return status, headers, data
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise TransportError(f"unsupported URL: {url}", url=url)
+        default_port = 443 if parts.scheme == "https" else 80
+        key: _PoolKey = (parts.scheme, parts.hostname, parts.port or default_port)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        host = parts.hostname if not parts.port else f"{parts.hostname}:{parts.port}"
+        request_headers = base_headers(headers, body)
+        request_headers.setdefault("Accept-Encoding", "gzip")
+        request_headers["Host"] = host
+        request_headers["Content-Length"] = str(len(body or b""))
+        head = f"{method} {target} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in request_headers.items()
+        )
+        request = head.encode("latin-1") + b"\r\n" + (body or b"")
+        timeout = self.timeout if timeout is None else timeout
+
+        async with self.semaphore:
+            try:
+                try:
+                    status, response_headers, data = await asyncio.wait_for(
+                        self._exchange(key, request, method), timeout
+                    )
+                except _StaleConnection:
+                    # The server dropped an idle pooled connection; retry once
+                    # on a fresh one.
+                    status, response_headers, data = await asyncio.wait_for(
+                        self._exchange(key, request, method), timeout
+                    )
+            except asyncio.TimeoutError as exc:
+                raise TransportError(f"request to {url} timed out after {timeout:g}s", url=url) from exc
+            except (OSError, ValueError, asyncio.IncompleteReadError, _StaleConnection) as exc:
+                raise TransportError(f"request to {url} failed: {exc!r}", url=url) from exc
+
+        if response_headers.get("content-encoding") == "gzip":
+            try:
+                data = gzip.decompress(data)
+            except OSError as exc:
+                raise TransportError(f"failed to decompress response from {url}", url=url) from exc
+        check_status(status, url, data)
+        return TransportResponse(status=status, body=data, url=url, headers=response_headers)
+
+    async def aclose(self) -> None:
+        pools = list(self._idle.values())
+        self._idle.clear()
+        writers = [writer for idle in pools for _, writer in idle]
+        for writer in writers:
+            writer.close()
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+
+class AsyncLinglongStoreClient:
+    """Coroutine counterpart of ``LinglongStoreClient``.
+
+    Request building, payloads, parsing and caching are shared with the
+    synchronous client; only the I/O differs. Use as ``async with`` (or call
+    ``aclose``) to close pooled connections.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        arch: str = DEFAULT_ARCH,
+        lang: str = DEFAULT_LANG,
+        repo_name: str = DEFAULT_REPO,
+        transport: Optional[AsyncHttpTransport] = None,
+        cache: ResponseCache | bool | None = None,
+        refresh: bool = False,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        """
+        Args:
+            transport: an ``AsyncHttpTransport`` to share between clients on
+                the same event loop; ``None`` creates one.
+            base_url, cache: as for ``LinglongStoreClient``.
+            max_concurrency: requests in flight when creating the transport.
+        """
+        self.transport = transport or AsyncHttpTransport(max_concurrency=max_concurrency)
+        self._sync = LinglongStoreClient(
+            base_url=base_url,
+            arch=arch,
+            lang=lang,
+            repo_name=repo_name,
+            transport=self.transport,
+            cache=cache,
+            refresh=refresh,
+        )
+
+    @property
+    def base_url(self) -> str:
+        return self._sync.base_url
+
+    @property
+    def arch(self) -> str:
+        return self._sync.arch
+
+    @property
+    def lang(self) -> str:
+        return self._sync.lang
+
+    @property
+    def repo_name(self) -> str:
+        return self._sync.repo_name
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self._sync.cache
+
+    async def __aenter__(self) -> "AsyncLinglongStoreClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+    async def _fetch(
+        self,
+        method: str,
+        path: str,
+        parse: Callable[[bytes], T],
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Any = None,
+    ) -> T:
+        """Async ``LinglongStoreClient._fetch``: same cache rules."""
+        url, body = self._sync._build_request(path, params, payload)
+        cache = self.cache
+        ttl = cache.ttl_for(path) if cache is not None else None
+        if ttl is None:
+            return parse((await self.transport.request(method, url, body=body)).body)
+
+        key = cache.key(method, url, body)
+        entry = cache.get(key)
+        if entry is not None and entry.fresh and not self._sync.refresh:
+            return parse(entry.body)
+        headers = entry.validators() if entry is not None else None
+        response = await self.transport.request(method, url, body=body, headers=headers)
+        if response.status == 304 and entry is not None:
+            cache.revalidated(key, entry, response, ttl)
+            return parse(entry.body)
+        result = parse(response.body)
+        if response.status == 200 and (not isinstance(result, dict) or result.get("code") in (None, 200)):
+            cache.put(key, response, ttl)
+        return result
+
+    async def _request_json(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Any = None,
+    ) -> Dict[str, Any]:
+        return await self._fetch(method, path, parse_json_object, params=params, payload=payload)
+
+    def build_search_payload(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._sync.build_search_payload(**kwargs)
+
+    async def get_categories(self, use_web: bool = False) -> List[Dict[str, Any]]:
+        if use_web:
+            data = await self._request_json("GET", "/web/categories", params={"lang": self.lang, "arch": self.arch})
+            return data.get("data", []) or []
+        data = await self._request_json("GET", "/visit/getDisCategoryList")
+        return data.get("data", []) or []
+
+    async def get_category_app_count(self, category_id: str) -> int:
+        return await self._fetch(
+            "GET",
+            "/web/getCategoryAppCount",
+            parse_category_count,
+            params={"categoryId": category_id},
+        )
+
+    async def search_apps(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._request_json("POST", "/visit/getSearchAppList", payload=payload)
+
+    async def resolve_category_id(
+        self,
+        *,
+        category_id: Optional[str] = None,
+        category_name: Optional[str] = None,
+        use_web_categories: bool = False,
+    ) -> Optional[str]:
+        if category_id:
+            return category_id
+        if not category_name:
+            return None
+        index = CategoryIndex.cached(self._sync, use_web_categories)
+        if index is None:
+            # Cold: index the primary listing only; the full index with
+            # cross-language aliases is built by the sync client.
+            index = CategoryIndex.from_listings(
+                await self.get_categories(use_web=use_web_categories),
+                complete=False,
+            )
+        return index.resolve(category_name)
+
+    async def search_apps_simple(
+        self,
+        *,
+        name: Optional[str] = None,
+        zh_name: Optional[str] = None,
+        category_id: Optional[str] = None,
+        category_name: Optional[str] = None,
+        use_web_categories: bool = False,
+        page_no: int = 1,
+        page_size: int = 20,
+        module: Optional[str] = None,
+        version: Optional[str] = None,
+        sort: Optional[str] = None,
+        order: Optional[str] = None,
+        raw: bool = False,
+    ) -> List[AppSummary] | Dict[str, Any]:
+        resolved_category_id = await self.resolve_category_id(
+            category_id=category_id,
+            category_name=category_name,
+            use_web_categories=use_web_categories,
+        )
+        payload = self.build_search_payload(
+            page_no=page_no,
+            page_size=page_size,
+            name=name,
+            zh_name=zh_name,
+            category_id=resolved_category_id,
+            module=module,
+            version=version,
+            sort=sort,
+            order=order,
+        )
+        data = await self.search_apps(payload)
+        if raw:
+            return data
+        return format_app_list(extract_app_items(data))
+
+    async def get_app_detail(self, app_id: str, raw: bool = False) -> AppDetail | Dict[str, Any]:
+        """获取应用详情，包括截图列表"""
+        payload = [{"appId": app_id, "arch": self.arch}]
+        response = await self._request_json("POST", "/app/getAppDetail", payload=payload)
+        if raw:
+            return response
+        data = response.get("data", {})
+        app_list = data.get(app_id, [])
+        if not app_list:
+            raise RuntimeError(f"未找到应用: {app_id}")
+        return parse_app_detail(app_list[0])
+
+    async def get_app_details(
+        self,
+        app_ids: Iterable[str],
+        *,
+        arch: Optional[str] = None,
+        chunk_size: int = DEFAULT_DETAIL_CHUNK_SIZE,
+    ) -> AppDetailBatch:
+        """批量获取应用详情; chunks run concurrently within the transport's limit."""
+        ids = list(dict.fromkeys(app_ids))
+        arch = arch or self.arch
+        size = max(1, chunk_size)
+        chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+        responses = await asyncio.gather(
+            *(
+                self._request_json("POST", "/app/getAppDetail", payload=[{"appId": app_id, "arch": arch} for app_id in chunk])
+                for chunk in chunks
+            ),
+            return_exceptions=True,
+        )
+        batch = AppDetailBatch()
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, BaseException):
+                if not isinstance(response, RuntimeError):
+                    raise response
+                for app_id in chunk:
+                    batch.errors[app_id] = str(response)
+                continue
+            data = response.get("data") or {}
+            for app_id in chunk:
+                app_list = data.get(app_id) if isinstance(data, dict) else None
+                if app_list:
+                    batch[app_id] = parse_app_detail(app_list[0])
+                else:
+                    batch.missing.append(app_id)
+        return batch
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent response cache for the Linglong store client.
+
+Entries live under ``$XDG_CACHE_HOME/linglong-store/http`` (``~/.cache`` when
+unset), one file per request key. Each endpoint has its own TTL; stale entries
+that carry ``ETag``/``Last-Modified`` validators are revalidated with
+``If-None-Match``/``If-Modified-Since`` instead of being downloaded again. The
+directory is bounded by size and evicted least-recently-used first.
+
+Entries read in the current process are also memoized in memory, so repeated
+lookups skip the filesystem entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from linglong_transport import TransportResponse
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MEMO_ENTRIES = 256
+MINUTE = 60
+HOUR = 60 * MINUTE
+
+# Per-endpoint freshness lifetimes (seconds). Endpoints not listed here are
+# never cached (e.g. /app/appCheckUpdate, telemetry).
+DEFAULT_TTLS: Dict[str, float] = {
+    "/visit/getDisCategoryList": 24 * HOUR,
+    "/web/categories": 24 * HOUR,
+    "/web/getCategoryAppCount": 10 * MINUTE,
+    "/visit/getSearchAppList": 10 * MINUTE,
+    "/app/getAppDetail": 1 * HOUR,
+    "/visit/getSearchAppVersionList": 1 * HOUR,
+}
+
+_VALIDATOR_HEADERS = ("etag", "last-modified", "content-type")
+
+
+def cache_home() -> str:
+    """Root cache directory shared by all store helpers."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "linglong-store")
+
+
+@dataclass
+class CacheEntry:
+    status: int
+    body: bytes
+    url: str
+    stored_at: float
+    expires_at: float
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+    def to_response(self) -> TransportResponse:
+        return TransportResponse(status=self.status, body=self.body, url=self.url, headers=dict(self.headers))
+
+
+class ResponseCache:
+    """Size-bounded LRU response cache on disk with an in-process memo."""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.directory = directory or os.path.join(cache_home(), "http")
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._memo: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None
+
+    @staticmethod
+    def key(method: str, url: str, body: Optional[bytes] = None) -> str:
+        digest = hashlib.sha256(f"{method.upper()} {url}\n".encode("utf-8"))
+        if body:
+            digest.update(body)
+        return digest.hexdigest()
+
+    def ttl_for(self, path: str) -> Optional[float]:
+        return self.ttls.get(path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.entry")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None:
+                self._memo.move_to_end(key)
+                return entry
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            meta_line, _, body = raw.partition(b"\n")
+            meta = json.loads(meta_line)
+            entry = CacheEntry(
+                status=meta["status"],
+                body=body,
+                url=meta["url"],
+                stored_at=meta["stored_at"],
+                expires_at=meta["expires_at"],
+                headers=meta.get("headers") or {},
+            )
+            # mtime doubles as the LRU clock.
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._memo[key] = entry
+            self._memo.move_to_end(key)
+            while len(self._memo) > DEFAULT_MEMO_ENTRIES:
+                self._memo.popitem(last=False)
+
+    def put(self, key: str, response: TransportResponse, ttl: float) -> CacheEntry:
+        now = time.time()
+        entry = CacheEntry(
+            status=response.status,
+            body=response.body,
+            url=response.url,
+            stored_at=now,
+            expires_at=now + ttl,
+            headers={name: response.headers[name] for name in _VALIDATOR_HEADERS if response.headers.get(name)},
+        )
+        self._write(key, entry)
+        return entry
+
+    def revalidated(self, key: str, entry: CacheEntry, response: TransportResponse, ttl: float) -> CacheEntry:
+        """Extend ``entry`` after a ``304 Not Modified`` response."""
+        now = time.time()
+        headers = dict(entry.headers)
+        for name in ("etag", "last-modified"):
+            if response.headers.get(name):
+                headers[name] = response.headers[name]
+        renewed = CacheEntry(
+            status=entry.status,
+            body=entry.body,
+            url=entry.url,
+            stored_at=now,
+            expires_at=now + ttl,
+            headers=headers,
+        )
+        self._write(key, renewed)
+        return renewed
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._memo.pop(key, None)
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memo.clear()
+            self._approx_bytes = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".entry"):
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _write(self, key: str, entry: CacheEntry) -> None:
+        meta = {
+            "status": entry.status,
+            "url": entry.url,
+            "stored_at": entry.stored_at,
+            "expires_at": entry.expires_at,
+            "headers": entry.headers,
+        }
+        data = json.dumps(meta, ensure_ascii=False).encode("utf-8") + b"\n" + entry.body
+        self._remember(key, entry)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            # The cache is an optimization; an unwritable directory must not
+            # break the request that produced the response.
+            return
+        self._account(len(data))
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._disk_usage()
+            else:
+                self._approx_bytes += added
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def _disk_usage(self) -> int:
+        total = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if item.name.endswith(".entry"):
+                        try:
+                            total += item.stat().st_size
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return total
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until the cache fits ``max_bytes``.
+
+        Returns the number of removed entries.
+        """
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if not item.name.endswith(".entry"):
+                        continue
+                    try:
+                        st = item.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, item.name))
+        except OSError:
+            return 0
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        # Leave some headroom so the next few writes do not trigger a rescan.
+        target = int(self.max_bytes * 0.9)
+        for _, size, name in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            with self._lock:
+                self._memo.pop(name[: -len(".entry")], None)
+        with self._lock:
+            self._approx_bytes = total
+        return removed
+
+
+_default_lock = threading.Lock()
+_default_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
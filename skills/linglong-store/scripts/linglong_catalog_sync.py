@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental catalog sync engine for the Linglong store.
+
+Keeps the last-known catalog of one (repo, arch, lang) as a compact SQLite
+snapshot (one zlib-compressed JSON record per app, keyed by appId, with a
+content hash). Each sync lists the catalog page by page and writes only apps
+that were added, changed or removed, so re-syncing an unchanged catalog costs
+the listing calls plus one tiny checkpoint row per page.
+
+Every page is committed together with its checkpoint. An interrupted sync
+resumes from the first page that was not committed, as long as it is rerun
+with the same listing parameters within ``RESUME_WINDOW`` seconds.
+
+Apps are only removed from the snapshot after a complete listing: every page
+up to ``data.total`` answered with code 200 and the pages held ``total``
+distinct apps. A failed or short listing raises ``CatalogSyncError`` and
+keeps the checkpoint, so the next run resumes instead of deleting the apps
+it did not see.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from linglong_cache import cache_home
+from linglong_store_api import DEFAULT_MAX_WORKERS, LinglongStoreClient, extract_app_items, extract_total
+
+
+DEFAULT_SYNC_PAGE_SIZE = 100
+RESUME_WINDOW = 6 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apps (
+    app_id TEXT PRIMARY KEY,
+    hash BLOB NOT NULL,
+    record BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS progress (
+    page_no INTEGER PRIMARY KEY,
+    app_ids TEXT NOT NULL,
+    added TEXT NOT NULL,
+    changed TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_snapshot_path(repo_name: str, arch: str, lang: str) -> str:
+    return os.path.join(cache_home(), "catalog", f"{repo_name}-{arch}-{lang}.sqlite")
+
+
+def _digest(record: Dict[str, Any]) -> bytes:
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+def _pack(record: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(blob))
+
+
+class CatalogSyncError(RuntimeError):
+    """The listing failed or was incomplete; the snapshot keeps every app."""
+
+
+@dataclass
+class SyncDelta:
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    total: int = 0
+    pages: int = 0
+    resumed_from: Optional[int] = None
+    rows_written: int = 0
+    seconds: float = 0.0
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "added": self.added,
+            "changed": self.changed,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+            "total": self.total,
+            "pages": self.pages,
+            "resumedFrom": self.resumed_from,
+            "rowsWritten": self.rows_written,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class CatalogSnapshot:
+    """On-disk snapshot of one catalog: appId -> (hash, compressed record)."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def for_client(cls, client: LinglongStoreClient, path: Optional[str] = None) -> "CatalogSnapshot":
+        return cls(path or default_snapshot_path(client.repo_name, client.arch, client.lang))
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "CatalogSnapshot":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: Any) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    @property
+    def synced_at(self) -> Optional[float]:
+        value = self.get_meta("synced_at")
+        return float(value) if value else None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM apps").fetchone()[0]
+
+    def get(self, app_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute("SELECT record FROM apps WHERE app_id = ?", (app_id,)).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for (blob,) in self.conn.execute("SELECT record FROM apps ORDER BY app_id"):
+            yield _unpack(blob)
+
+    def hashes(self) -> Dict[str, bytes]:
+        return dict(self.conn.execute("SELECT app_id, hash FROM apps"))
+
+
+class CatalogSync:
+    """List the catalog through a client and apply the delta to a snapshot."""
+
+    def __init__(self, client: LinglongStoreClient, snapshot: CatalogSnapshot) -> None:
+        # Listing pages are consumed once; keep them out of the response cache
+        # so an unchanged sync does not rewrite cache files.
+        self.client = client.clone(cache=None)
+        self.snapshot = snapshot
+
+    def _run_key(self, page_size: int) -> str:
+        return json.dumps(
+            [self.client.base_url, self.client.repo_name, self.client.arch, self.client.lang, page_size],
+            ensure_ascii=False,
+        )
+
+    def run(
+        self,
+        *,
+        page_size: int = DEFAULT_SYNC_PAGE_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> SyncDelta:
+        start = time.perf_counter()
+        conn = self.snapshot.conn
+        delta = SyncDelta()
+        known = self.snapshot.hashes()
+        seen: Set[str] = set()
+
+        run_key = self._run_key(page_size)
+        started = self.snapshot.get_meta("run_started_at")
+        resumable = (
+            self.snapshot.get_meta("run_key") == run_key
+            and started is not None
+            and time.time() - float(started) < RESUME_WINDOW
+        )
+        next_page = 1
+        if resumable:
+            for page_no, app_ids, added, changed in conn.execute(
+                "SELECT page_no, app_ids, added, changed FROM progress ORDER BY page_no"
+            ):
+                if page_no != next_page:
+                    break
+                seen.update(json.loads(app_ids))
+                delta.added.extend(json.loads(added))
+                delta.changed.extend(json.loads(changed))
+                next_page += 1
+            if next_page > 1:
+                delta.resumed_from = next_page
+        if delta.resumed_from is None:
+            with conn:
+                conn.execute("DELETE FROM progress")
+                self.snapshot.set_meta("run_key", run_key)
+                self.snapshot.set_meta("run_started_at", time.time())
+
+        done = set(range(1, next_page))
+        total: Optional[int] = None
+        pages = self.client.iter_search_pages(page_size=page_size, start_page=next_page, max_workers=max_workers)
+        for page_no, response in pages:
+            # Validate before the page is checkpointed: a failed or short page
+            # must be fetched again by the resumed run.
+            if response.get("code") not in (None, 200):
+                message = response.get("msg") or response.get("message") or ""
+                raise CatalogSyncError(f"page {page_no} failed: code {response.get('code')} {message}".strip())
+            page_total = extract_total(response)
+            if page_total is None or (total is not None and page_total != total):
+                raise CatalogSyncError(f"page {page_no} reports total {page_total}, expected {total}")
+            total = page_total
+            items = extract_app_items(response)
+            expected = max(0, min(page_size, total - (page_no - 1) * page_size))
+            if len(items) != expected:
+                raise CatalogSyncError(f"page {page_no} has {len(items)} apps, expected {expected}")
+            page_ids: List[str] = []
+            rows = []
+            added: List[str] = []
+            changed: List[str] = []
+            for record in items:
+                app_id = record.get("appId")
+                if not app_id or app_id in seen:
+                    continue
+                seen.add(app_id)
+                page_ids.append(app_id)
+                digest = _digest(record)
+                previous = known.get(app_id)
+                if previous == digest:
+                    continue
+                rows.append((app_id, digest, _pack(record)))
+                (added if previous is None else changed).append(app_id)
+                known[app_id] = digest
+            with conn:
+                if rows:
+                    conn.executemany(
+                        "INSERT INTO apps (app_id, hash, record) VALUES (?, ?, ?) "
+                        "ON CONFLICT(app_id) DO UPDATE SET hash = excluded.hash, record = excluded.record",
+                        rows,
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO progress (page_no, app_ids, added, changed) VALUES (?, ?, ?, ?)",
+                    (page_no, json.dumps(page_ids), json.dumps(added), json.dumps(changed)),
+                )
+            delta.rows_written += len(rows)
+            delta.added.extend(added)
+            delta.changed.extend(changed)
+            delta.pages += 1
+            done.add(page_no)
+
+        last_page = ((total or 0) + page_size - 1) // page_size
+        missing = [page_no for page_no in range(1, last_page + 1) if page_no not in done]
+        if total is None or missing or len(seen) != total:
+            if not missing:
+                # Every page arrived but the apps do not add up (the catalog
+                # moved while paging); resuming cannot fix that.
+                with conn:
+                    conn.execute("DELETE FROM progress")
+            raise CatalogSyncError(
+                f"incomplete listing: {len(seen)} of {total} apps, {len(missing)} pages missing; no apps removed"
+            )
+        delta.removed = sorted(app_id for app_id in known if app_id not in seen)
+        with conn:
+            if delta.removed:
+                conn.executemany("DELETE FROM apps WHERE app_id = ?", [(app_id,) for app_id in delta.removed])
+                delta.rows_written += len(delta.removed)
+            conn.execute("DELETE FROM progress")
+            conn.execute("DELETE FROM meta WHERE key IN ('run_key', 'run_started_at')")
+            self.snapshot.set_meta("synced_at", time.time())
+            self.snapshot.set_meta("total", len(seen))
+        delta.total = len(seen)
+        delta.unchanged = delta.total - len(delta.added) - len(delta.changed)
+        delta.seconds = time.perf_counter() - start
+        return delta
+
+
+def main() -> int:
+    import argparse
+    import sys
+
+    from linglong_offline import export_snapshot
+    from linglong_store_api import DEFAULT_ARCH, DEFAULT_DETAIL_CHUNK_SIZE, DEFAULT_LANG, DEFAULT_REPO
+
+    parser = argparse.ArgumentParser(description="Incrementally sync the Linglong store catalog snapshot")
+    parser.add_argument("--arch", default=DEFAULT_ARCH)
+    parser.add_argument("--lang", default=DEFAULT_LANG)
+    parser.add_argument("--repo-name", default=DEFAULT_REPO)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_SYNC_PAGE_SIZE)
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--snapshot", help="snapshot path (default: $XDG_CACHE_HOME/linglong-store/catalog/)")
+    parser.add_argument("--json", action="store_true", help="print the full delta as JSON")
+    parser.add_argument(
+        "--export",
+        metavar="FILE",
+        help="after syncing, write a portable offline snapshot (categories, apps, details) to FILE",
+    )
+    parser.add_argument("--no-details", action="store_true", help="with --export, skip /app/getAppDetail")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_DETAIL_CHUNK_SIZE, help="app ids per detail request")
+    args = parser.parse_args()
+
+    client = LinglongStoreClient(arch=args.arch, lang=args.lang, repo_name=args.repo_name)
+    exported = None
+    try:
+        with CatalogSnapshot.for_client(client, args.snapshot) as snapshot:
+            delta = CatalogSync(client, snapshot).run(page_size=args.page_size, max_workers=args.max_workers)
+            if args.export:
+                exported = export_snapshot(
+                    client,
+                    args.export,
+                    snapshot.records(),
+                    details=not args.no_details,
+                    chunk_size=args.chunk_size,
+                    max_workers=args.max_workers,
+                )
+    except Exception as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    if args.json:
+        result = delta.as_dict()
+        if exported:
+            result["export"] = exported
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    resumed = f", resumed from page {delta.resumed_from}" if delta.resumed_from else ""
+    print(
+        f"synced {delta.total} apps in {delta.pages} pages{resumed}: "
+        f"+{len(delta.added)} ~{len(delta.changed)} -{len(delta.removed)} "
+        f"({delta.rows_written} rows written, {delta.seconds:.2f}s)"
+    )
+    if exported:
+        print(
+            f"exported {exported['apps']} apps to {exported['path']} "
+            f"({exported['bytes']} bytes, {exported['detailErrors']} detail errors, {exported['seconds']:.2f}s)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Category name index for the Linglong store.
+
+``resolve_category_id`` used to download the category list and scan it for an
+exact (case-insensitive) name on every call, so "网络" or "network" failed even
+though "网络应用" exists. This index is built once per (endpoint, arch, lang):
+
+- the primary listing (``/visit/getDisCategoryList`` or ``/web/categories``)
+  defines the category ids and display names;
+- the other endpoint and ``/web/categories`` in the other store languages add
+  aliases for the same ``categoryId`` (e.g. "Network" for "网络应用").
+
+Names are normalized (NFKC, casefolded, punctuation and spaces removed), so
+exact lookups are a single dict access. Prefix, substring and fuzzy
+(``difflib``) matches are ranked for suggestions. Built indexes are kept in
+memory and persisted as JSON under ``$XDG_CACHE_HOME/linglong-store/categories``
+so warm runs resolve names without a network call.
+"""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from linglong_cache import HOUR, cache_home
+
+
+# Matches the category listing TTL in the response cache.
+DEFAULT_INDEX_TTL = 24 * HOUR
+# Languages whose /web/categories names are added as aliases.
+ALIAS_LANGS = ("zh", "en")
+DEFAULT_SUGGESTIONS = 5
+FUZZY_CUTOFF = 0.6
+INDEX_VERSION = 1
+
+# Match kinds, best first.
+MATCH_KINDS = ("exact", "prefix", "substring", "fuzzy")
+
+_STRIP_RE = re.compile(r"[\W_]+", re.UNICODE)
+_memory: Dict[Tuple[str, ...], "CategoryIndex"] = {}
+_memory_lock = threading.Lock()
+
+
+def normalize_name(name: Any) -> str:
+    """Key used for matching: NFKC, casefolded, without spaces or punctuation."""
+    return _STRIP_RE.sub("", unicodedata.normalize("NFKC", str(name or "")).casefold())
+
+
+def default_index_path(endpoint: str, arch: str, lang: str, base_url: str) -> str:
+    # Keyed by server too: an index built against a mirror must not answer
+    # for the real store (category ids differ).
+    server = hashlib.sha256(base_url.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_home(), "categories", f"{endpoint}-{arch}-{lang}-{server}.json")
+
+
+def endpoint_name(use_web: bool) -> str:
+    return "web" if use_web else "app"
+
+
+@dataclass
+class CategoryMatch:
+    category_id: str
+    name: str
+    matched: str
+    kind: str
+    score: float
+
+    def describe(self) -> str:
+        alias = f" via {self.matched!r}" if normalize_name(self.matched) != normalize_name(self.name) else ""
+        return f"{self.name} [{self.category_id}]{alias}"
+
+
+class CategoryLookupError(RuntimeError):
+    """A category name did not resolve to exactly one category.
+
+    ``suggestions`` holds the ranked candidates (possibly empty).
+    """
+
+    def __init__(self, message: str, query: str, suggestions: List[CategoryMatch]) -> None:
+        super().__init__(message)
+        self.query = query
+        self.suggestions = suggestions
+
+
+class CategoryIndex:
+    """Normalized name -> categoryId index with ranked fuzzy suggestions."""
+
+    def __init__(
+        self,
+        categories: Iterable[Dict[str, Any]],
+        *,
+        built_at: Optional[float] = None,
+        complete: bool = True,
+    ) -> None:
+        """
+        Args:
+            categories: ``{"categoryId", "categoryName", "aliases"}`` rows.
+            complete: ``False`` when alias sources were unavailable; such an
+                index is usable but never persisted.
+        """
+        self.built_at = time.time() if built_at is None else built_at
+        self.complete = complete
+        self.names: Dict[str, str] = {}
+        self.aliases: Dict[str, List[str]] = {}
+        # normalized alias -> [(category_id, alias)]
+        self._keys: Dict[str, List[Tuple[str, str]]] = {}
+        for row in categories:
+            category_id = str(row["categoryId"])
+            self.names.setdefault(category_id, str(row.get("categoryName") or category_id))
+            for alias in [row.get("categoryName"), *(row.get("aliases") or [])]:
+                self._add_alias(category_id, alias)
+
+    def _add_alias(self, category_id: str, alias: Any) -> None:
+        key = normalize_name(alias)
+        if not key:
+            return
+        aliases = self.aliases.setdefault(category_id, [])
+        if str(alias) not in aliases:
+            aliases.append(str(alias))
+        entries = self._keys.setdefault(key, [])
+        if all(existing != category_id for existing, _ in entries):
+            entries.append((category_id, str(alias)))
+
+    @classmethod
+    def from_listings(
+        cls,
+        primary: Iterable[Dict[str, Any]],
+        alias_listings: Iterable[Iterable[Dict[str, Any]]] = (),
+        *,
+        complete: bool = True,
+    ) -> "CategoryIndex":
+        """Index ``primary``; names in ``alias_listings`` with a known id become aliases."""
+        rows: Dict[str, Dict[str, Any]] = {}
+        for item in primary:
+            if item.get("categoryId") is None:
+                continue
+            rows.setdefault(str(item["categoryId"]), {
+                "categoryId": str(item["categoryId"]),
+                "categoryName": item.get("categoryName"),
+                "aliases": [],
+            })
+        for listing in alias_listings:
+            for item in listing:
+                row = rows.get(str(item.get("categoryId")))
+                if row is not None and item.get("categoryName"):
+                    row["aliases"].append(item["categoryName"])
+        return cls(rows.values(), complete=complete)
+
+    @classmethod
+    def build(cls, client: Any, use_web: bool = False) -> "CategoryIndex":
+        """Fetch the primary listing and every alias source through ``client``.
+
+        Alias sources that fail are skipped and mark the index incomplete.
+        """
+        primary = client.get_categories(use_web=use_web)
+        alias_listings = []
+        complete = True
+        for source_use_web, lang in alias_sources(use_web, client.lang):
+            try:
+                source = client if lang == client.lang else client.clone(lang=lang)
+                alias_listings.append(source.get_categories(use_web=source_use_web))
+            except RuntimeError:
+                complete = False
+        return cls.from_listings(primary, alias_listings, complete=complete)
+
+    @classmethod
+    def cached(
+        cls,
+        client: Any,
+        use_web: bool = False,
+        *,
+        path: Optional[str] = None,
+        max_age: float = DEFAULT_INDEX_TTL,
+    ) -> Optional["CategoryIndex"]:
+        """A fresh index from memory or disk, or ``None`` (no network access)."""
+        if client.refresh:
+            return None
+        key = _memory_key(client, use_web)
+        with _memory_lock:
+            index = _memory.get(key)
+        if index is not None and index.age < max_age:
+            return index
+        if client.cache is None:
+            return None
+        index = cls.load(path or _index_path(client, use_web))
+        if index is None or index.age >= max_age:
+            return None
+        index.remember(client, use_web)
+        return index
+
+    @classmethod
+    def for_client(
+        cls,
+        client: Any,
+        use_web: bool = False,
+        *,
+        path: Optional[str] = None,
+        max_age: float = DEFAULT_INDEX_TTL,
+    ) -> "CategoryIndex":
+        """The cached index for the client's (server, endpoint, arch, lang), built if missing or stale.
+
+        Nothing is written to disk when the client's response cache is
+        disabled; ``client.refresh`` forces a rebuild.
+        """
+        index = cls.cached(client, use_web, path=path, max_age=max_age)
+        if index is not None:
+            return index
+        index = cls.build(client, use_web)
+        index.remember(client, use_web)
+        if client.cache is not None and index.complete:
+            index.save(path or _index_path(client, use_web))
+        return index
+
+    def remember(self, client: Any, use_web: bool = False) -> None:
+        with _memory_lock:
+            _memory[_memory_key(client, use_web)] = self
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.built_at
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "builtAt": self.built_at,
+            "categories": [
+                {"categoryId": category_id, "categoryName": name, "aliases": self.aliases.get(category_id, [])}
+                for category_id, name in self.names.items()
+            ],
+        }
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self.to_dict(), handle, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CategoryIndex"]:
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return None
+        try:
+            return cls(data.get("categories") or [], built_at=float(data["builtAt"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def lookup(self, name: str) -> Optional[str]:
+        """categoryId for an exact (normalized) name or alias, if unique."""
+        entries = self._keys.get(normalize_name(name)) or []
+        return entries[0][0] if len(entries) == 1 else None
+
+    def suggest(self, name: str, limit: Optional[int] = DEFAULT_SUGGESTIONS) -> List[CategoryMatch]:
+        """Categories ranked by how well one of their names matches ``name``.
+
+        Exact matches come first, then prefix, substring (either way round)
+        and finally fuzzy matches above ``FUZZY_CUTOFF``; within a kind the
+        closer match in length or similarity wins. One entry per category.
+        """
+        query = normalize_name(name)
+        if not query:
+            return []
+        best: Dict[str, Tuple[int, float, str]] = {}
+        for key, entries in self._keys.items():
+            if key == query:
+                rank, score = 0, 1.0
+            elif key.startswith(query):
+                rank, score = 1, len(query) / len(key)
+            elif query in key:
+                rank, score = 2, len(query) / len(key)
+            elif key in query:
+                rank, score = 2, len(key) / len(query)
+            else:
+                score = difflib.SequenceMatcher(None, query, key).ratio()
+                if score < FUZZY_CUTOFF:
+                    continue
+                rank = 3
+            for category_id, alias in entries:
+                current = best.get(category_id)
+                if current is None or (rank, -score) < (current[0], -current[1]):
+                    best[category_id] = (rank, score, alias)
+        ranked = sorted(best.items(), key=lambda item: (item[1][0], -item[1][1], item[0]))
+        matches = [
+            CategoryMatch(category_id, self.names[category_id], alias, MATCH_KINDS[rank], round(score, 3))
+            for category_id, (rank, score, alias) in ranked
+        ]
+        return matches if limit is None else matches[:limit]
+
+    def resolve(self, name: str) -> str:
+        """categoryId for ``name``, or ``CategoryLookupError`` with suggestions.
+
+        An exact name wins. Otherwise the best prefix or substring match is
+        accepted when it is the only category of that kind; fuzzy matches are
+        only offered as suggestions.
+        """
+        category_id = self.lookup(name)
+        if category_id is not None:
+            return category_id
+        matches = self.suggest(name, limit=None)
+        if matches and matches[0].kind != "fuzzy":
+            tier = [match for match in matches if match.kind == matches[0].kind]
+            if len(tier) == 1:
+                return tier[0].category_id
+            raise CategoryLookupError(
+                f"category name ambiguous: {name}, matches: {_describe(tier)}",
+                name,
+                tier[:DEFAULT_SUGGESTIONS],
+            )
+        message = f"category name not found: {name}"
+        if matches:
+            message += f", did you mean: {_describe(matches)}"
+        elif self.names:
+            message += f", available: {', '.join(self.names.values())}"
+        raise CategoryLookupError(message, name, matches[:DEFAULT_SUGGESTIONS])
+
+
+def alias_sources(use_web: bool, lang: str) -> List[Tuple[bool, str]]:
+    """(use_web, lang) listings that contribute aliases to an index."""
+    sources: List[Tuple[bool, str]] = []
+    if use_web:
+        sources.append((False, lang))
+    else:
+        sources.append((True, lang))
+    for other in ALIAS_LANGS:
+        if other != lang:
+            sources.append((True, other))
+    return sources
+
+
+def _describe(matches: List[CategoryMatch]) -> str:
+    return ", ".join(match.describe() for match in matches[:DEFAULT_SUGGESTIONS])
+
+
+def _index_path(client: Any, use_web: bool) -> str:
+    return default_index_path(endpoint_name(use_web), client.arch, client.lang, client.base_url)
+
+
+def _memory_key(client: Any, use_web: bool) -> Tuple[str, ...]:
+    return (client.base_url, endpoint_name(use_web), client.arch, client.lang)
+
+
+def clear_memory() -> None:
+    """Forget indexes held in memory (the persisted files are kept)."""
+    with _memory_lock:
+        _memory.clear()
@@ -8,29 +8,54 @@ Features:
 - List apps under a category
 - Search apps with optional category filter
 
-Uses curl to keep zero runtime dependencies.
+Uses the stdlib-only transports from linglong_transport to keep zero runtime
+dependencies.
 """
 
+import sys
+
+if __name__ == "__main__":
+    # Hand the call to a running linglong_daemon before the heavy imports.
+    from linglong_daemon import forward
+
+    forward("category_search")
+
 import argparse
+import itertools
 import json
-import sys
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional
 
 from linglong_store_api import (
     DEFAULT_ARCH,
+    DEFAULT_COUNT_TIMEOUT,
     DEFAULT_LANG,
+    DEFAULT_MAX_WORKERS,
     DEFAULT_REPO,
+    CategoryCount,
     LinglongStoreClient,
-    summaries_to_dicts,
+    summary_to_dict,
+    write_ndjson,
 )
+from linglong_metrics import add_stats_arguments, metrics_from_args, report_metrics
+from linglong_offline import offline_client
+from linglong_transport import TRANSPORT_NAMES
 
 
 def cmd_categories(args: argparse.Namespace) -> int:
-    client = LinglongStoreClient(arch=args.arch, lang=args.lang, repo_name=args.repo_name)
+    client = build_client(args)
     categories = client.get_categories(use_web=args.web)
     if args.raw:
-        print(json.dumps(categories, ensure_ascii=False, indent=2))
-        return 0
+        return emit(args, categories)
+    limit = effective_limit(args)
+    if limit:
+        categories = categories[:limit]
+    if args.with_counts:
+        counts = client.iter_category_app_counts(
+            categories,
+            max_workers=args.max_workers,
+            timeout=args.timeout,
+        )
+        return emit(args, (count_to_dict(item) for item in counts))
     rows = []
     for item in categories:
         rows.append({
@@ -38,15 +63,24 @@ def cmd_categories(args: argparse.Namespace) -> int:
             "categoryName": item.get("categoryName"),
             "count": item.get("categoryCount") or item.get("count"),
         })
-    if args.limit:
-        rows = rows[: args.limit]
-    print(json.dumps(rows, ensure_ascii=False, indent=2))
-    return 0
+    return emit(args, rows)
+
+
+def count_to_dict(item: CategoryCount) -> Dict[str, Any]:
+    row = {
+        "categoryId": item.category_id,
+        "categoryName": item.category_name,
+        "count": item.count,
+        "countSource": item.source,
+    }
+    if item.error:
+        row["error"] = item.error
+    return row
 
 
 def cmd_category_apps(args: argparse.Namespace) -> int:
     use_web = resolve_use_web_categories(args)
-    client = LinglongStoreClient(arch=args.arch, lang=args.lang, repo_name=args.repo_name)
+    client = build_client(args)
     category_id = client.resolve_category_id(
         category_id=args.category_id,
         category_name=args.category_name,
@@ -56,32 +90,16 @@ def cmd_category_apps(args: argparse.Namespace) -> int:
         raise RuntimeError("categoryId is required")
     if args.show_count:
         count = client.get_category_app_count(category_id)
-        print(json.dumps({"categoryId": category_id, "count": count}, ensure_ascii=False, indent=2))
-    data = client.search_apps_simple(
-        name=args.name,
-        zh_name=args.zh_name,
-        category_id=category_id,
-        page_no=args.page_no,
-        page_size=args.page_size,
-        module=args.module,
-        version=args.version,
-        sort=args.sort,
-        order=args.order,
-        raw=args.raw,
-    )
-    if args.raw:
-        print(json.dumps(data, ensure_ascii=False, indent=2))
-        return 0
-    rows = summaries_to_dicts(data)
-    if args.limit:
-        rows = rows[: args.limit]
-    print(json.dumps(rows, ensure_ascii=False, indent=2))
-    return 0
+        if args.ndjson:
+            write_ndjson([{"categoryId": category_id, "count": count}])
+        else:
+            print(json.dumps({"categoryId": category_id, "count": count}, ensure_ascii=False, indent=2))
+    return print_search_results(client, args, category_id)
 
 
 def cmd_search(args: argparse.Namespace) -> int:
     use_web = resolve_use_web_categories(args)
-    client = LinglongStoreClient(arch=args.arch, lang=args.lang, repo_name=args.repo_name)
+    client = build_client(args)
     category_id = None
     if args.category_id or args.category_name:
         category_id = client.resolve_category_id(
@@ -89,25 +107,55 @@ def cmd_search(args: argparse.Namespace) -> int:
             category_name=args.category_name,
             use_web_categories=use_web,
         )
-    data = client.search_apps_simple(
-        name=args.name,
-        zh_name=args.zh_name,
-        category_id=category_id,
-        page_no=args.page_no,
-        page_size=args.page_size,
-        module=args.module,
-        version=args.version,
-        sort=args.sort,
-        order=args.order,
-        raw=args.raw,
-    )
-    if args.raw:
-        print(json.dumps(data, ensure_ascii=False, indent=2))
-        return 0
-    rows = summaries_to_dicts(data)
-    if args.limit:
-        rows = rows[: args.limit]
-    print(json.dumps(rows, ensure_ascii=False, indent=2))
+    return print_search_results(client, args, category_id)
+
+
+def print_search_results(client: LinglongStoreClient, args: argparse.Namespace, category_id: Optional[str]) -> int:
+    query = {
+        "name": args.name,
+        "zh_name": args.zh_name,
+        "category_id": category_id,
+        "page_size": args.page_size,
+        "module": args.module,
+        "version": args.version,
+        "sort": args.sort,
+        "order": args.order,
+    }
+    if args.all:
+        if args.raw:
+            pages = client.iter_search_pages(start_page=args.page_no, max_workers=args.max_workers, **query)
+            return emit(args, (response for _, response in pages))
+        if args.ndjson:
+            rows: Iterable[Dict[str, Any]] = map(
+                summary_to_dict,
+                client.iter_search_apps(start_page=args.page_no, max_workers=args.max_workers, **query),
+            )
+        else:
+            rows = client.search_all_apps(start_page=args.page_no, max_workers=args.max_workers, **query).iter_dicts()
+    else:
+        data = client.search_apps_simple(page_no=args.page_no, raw=args.raw, **query)
+        if args.raw:
+            if args.ndjson:
+                return emit(args, [data])
+            print(json.dumps(data, ensure_ascii=False, indent=2))
+            return 0
+        rows = map(summary_to_dict, data)
+    limit = effective_limit(args)
+    if limit:
+        rows = itertools.islice(rows, limit)
+    return emit(args, rows)
+
+
+def emit(args: argparse.Namespace, rows: Iterable[Any]) -> int:
+    """Print rows as one indented JSON array, or one line per row with --ndjson.
+
+    With --ndjson, generators are consumed lazily so each row is written as
+    soon as its page or batch arrives.
+    """
+    if args.ndjson:
+        write_ndjson(rows)
+    else:
+        print(json.dumps(list(rows), ensure_ascii=False, indent=2))
     return 0
 
 
@@ -121,11 +169,42 @@ def build_parser() -> argparse.ArgumentParser:
     common.add_argument("--repo-name", default=DEFAULT_REPO)
     common.add_argument("--page-no", type=int, default=1)
     common.add_argument("--page-size", type=int, default=20)
-    common.add_argument("--limit", type=int, default=10)
+    common.add_argument("--limit", type=int, help="max rows to print (default: 10, unlimited with --all)")
     common.add_argument("--raw", action="store_true")
+    common.add_argument(
+        "--ndjson",
+        action="store_true",
+        help="write one compact JSON record per line as results arrive (pages with --raw --all)",
+    )
+    common.add_argument("--transport", choices=TRANSPORT_NAMES, help="HTTP backend (default: http, fallback: curl)")
+    common.add_argument("--no-cache", action="store_true", help="bypass the local response cache")
+    common.add_argument("--refresh", action="store_true", help="revalidate cached responses with the server")
+    common.add_argument(
+        "--offline",
+        metavar="SNAPSHOT",
+        help="answer from a catalog snapshot file instead of the store API (see linglong_catalog_sync.py --export)",
+    )
+    add_stats_arguments(common)
 
     p_categories = subparsers.add_parser("categories", parents=[common])
     p_categories.add_argument("--web", action="store_true", help="use /web/categories endpoint")
+    p_categories.add_argument(
+        "--with-counts",
+        action="store_true",
+        help="fetch live app counts for every category concurrently (falls back to the listed count)",
+    )
+    p_categories.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"concurrent count requests with --with-counts (default: {DEFAULT_MAX_WORKERS})",
+    )
+    p_categories.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_COUNT_TIMEOUT,
+        help=f"per-request timeout in seconds with --with-counts (default: {DEFAULT_COUNT_TIMEOUT:g})",
+    )
     p_categories.set_defaults(func=cmd_categories)
 
     p_category_apps = subparsers.add_parser("category-apps", parents=[common])
@@ -140,6 +219,7 @@ def build_parser() -> argparse.ArgumentParser:
     p_category_apps.add_argument("--version")
     p_category_apps.add_argument("--sort")
     p_category_apps.add_argument("--order")
+    add_pagination_arguments(p_category_apps)
     p_category_apps.set_defaults(func=cmd_category_apps)
 
     p_search = subparsers.add_parser("search", parents=[common])
@@ -153,11 +233,43 @@ def build_parser() -> argparse.ArgumentParser:
     p_search.add_argument("--version")
     p_search.add_argument("--sort")
     p_search.add_argument("--order")
+    add_pagination_arguments(p_search)
     p_search.set_defaults(func=cmd_search)
 
     return parser
 
 
+def add_pagination_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--all", action="store_true", help="fetch every page starting at --page-no")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"concurrent page requests with --all (default: {DEFAULT_MAX_WORKERS})",
+    )
+
+
+def effective_limit(args: argparse.Namespace) -> int:
+    if args.limit is not None:
+        return args.limit
+    return 0 if getattr(args, "all", False) else 10
+
+
+def build_client(args: argparse.Namespace) -> LinglongStoreClient:
+    if args.offline:
+        # The snapshot fixes arch, repo and lang.
+        return offline_client(args.offline, metrics=args.metrics)
+    return LinglongStoreClient(
+        arch=args.arch,
+        lang=args.lang,
+        repo_name=args.repo_name,
+        transport=args.transport,
+        cache=False if args.no_cache else None,
+        refresh=args.refresh,
+        metrics=args.metrics,
+    )
+
+
 def resolve_use_web_categories(args: argparse.Namespace) -> bool:
     if getattr(args, "use_web_categories", False) and getattr(args, "use_app_categories", False):
         raise RuntimeError("choose only one of --use-web-categories or --use-app-categories")
@@ -169,11 +281,16 @@ def resolve_use_web_categories(args: argparse.Namespace) -> bool:
 def main() -> int:
     parser = build_parser()
     args = parser.parse_args()
+    if getattr(args, "with_counts", False) and args.raw:
+        parser.error("--raw cannot be combined with --with-counts (counts are only in the summarized rows)")
+    args.metrics = metrics_from_args(args)
     try:
         return args.func(args)
     except Exception as exc:
         print(f"error: {exc}", file=sys.stderr)
         return 1
+    finally:
+        report_metrics(args.metrics, args)
 
 
 if __name__ == "__main__":
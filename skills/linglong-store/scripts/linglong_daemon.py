@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resident daemon that serves the store CLIs over a per-user Unix socket.
+
+Every ``linglong_store_api.py`` / ``linglong_category_search.py`` run used
+to pay interpreter startup, module imports, a cold connection and an empty
+in-memory cache. A running daemon keeps all of that warm: the pooled
+transport, the response cache memo, single-flight state and category indexes
+live for its whole lifetime.
+
+Both CLIs call ``forward()`` before importing anything heavy. When the daemon
+answers, the command runs inside it and the CLI just prints the captured
+stdout/stderr and exits with the same code. Otherwise the CLI runs in-process
+as before: no socket, streaming output (``--ndjson``, ``--all``),
+``LINGLONG_STORE_DAEMON=off``, a different environment (``LINGLONG_STORE_*``,
+the cache and home directories, proxy and CA settings, ``PATH``), or changed
+scripts (a stale daemon also shuts itself down).
+
+Commands run one at a time inside the daemon, because ``sys.argv``, the
+working directory and stdout are process-wide. A call that arrives while
+another command runs is declined as busy and runs in the caller's process,
+and the caller gives up on the daemon after ``REQUEST_TIMEOUT`` seconds, so
+one slow or hung command never holds up other invocations. The daemon exits
+after ``--idle-timeout`` seconds without requests.
+
+    python3 linglong_store_api.py --daemon          # start in the background
+    python3 linglong_daemon.py status
+    python3 linglong_daemon.py stop
+
+This module imports only the standard library at the top; the server side
+loads the CLIs lazily, so ``forward()`` stays cheap for the client.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import struct
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DAEMON_ENV = "LINGLONG_STORE_DAEMON"
+SOCKET_ENV = "LINGLONG_STORE_SOCKET"
+DEFAULT_IDLE_TIMEOUT = 30 * 60.0
+PROTOCOL_VERSION = 1
+# Client side: how long to wait for the daemon to connect and to answer
+# before running the command locally instead.
+CONNECT_TIMEOUT = 1.0
+REQUEST_TIMEOUT = 60.0
+# Commands the daemon can run: name -> (module, entry point).
+COMMANDS = {
+    "store_api": ("linglong_store_api", "_main"),
+    "category_search": ("linglong_category_search", "main"),
+}
+# Arguments that must run in the caller's own process: ``--daemon`` starts
+# one, and ``--ndjson``/``--all`` stream output that a reply would buffer whole.
+_LOCAL_ONLY = ("--daemon", "--ndjson", "--all")
+_SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+_TRANSPORT_ENV = ("XDG_CACHE_HOME", "HOME", "PATH", "SSL_CERT_FILE", "SSL_CERT_DIR", "CURL_CA_BUNDLE", "CURL_HOME")
+
+
+def socket_path() -> str:
+    """``$LINGLONG_STORE_SOCKET``, else a socket in a private per-user directory."""
+    override = os.environ.get(SOCKET_ENV)
+    if override:
+        return override
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    base = os.path.join(runtime, "linglong-store") if runtime else f"/tmp/linglong-store-{os.getuid()}"
+    return os.path.join(base, "daemon.sock")
+
+
+def environment() -> Dict[str, str]:
+    """The part of the environment that changes what a command does.
+
+    Besides the skill's own settings this covers what the transports read:
+    ``*_proxy`` in either case (``HttpTransport`` and curl), the CA bundle
+    overrides of ``ssl`` and curl, and ``PATH`` (which ``curl`` runs).
+    """
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if (key.startswith("LINGLONG_STORE_") and key not in (DAEMON_ENV, SOCKET_ENV))
+        or key.lower().endswith("_proxy")
+    }
+    for key in _TRANSPORT_ENV:
+        env[key] = os.environ.get(key, "")
+    return env
+
+
+def code_version() -> int:
+    """Newest mtime of the skill scripts; a daemon running older code is stale."""
+    newest = 0
+    with os.scandir(_SCRIPTS_DIR) as it:
+        for entry in it:
+            if entry.name.startswith("linglong_") and entry.name.endswith(".py"):
+                newest = max(newest, entry.stat().st_mtime_ns)
+    return newest
+
+
+def _exchange(message: Dict[str, Any], path: Optional[str] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Send one JSON request and read the JSON reply (``OSError`` when unreachable)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT if timeout is None else min(CONNECT_TIMEOUT, timeout))
+        sock.connect(path or socket_path())
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    try:
+        return json.loads(b"".join(chunks))
+    except ValueError as exc:
+        raise OSError(f"invalid daemon reply: {exc}") from exc
+
+
+def _local_only(arg: str) -> bool:
+    # argparse accepts unambiguous prefixes (``--nd``) and ``--opt=value``.
+    name = arg.split("=", 1)[0]
+    return len(name) > 2 and name.startswith("--") and any(opt.startswith(name) for opt in _LOCAL_ONLY)
+
+
+def request(
+    command: str,
+    argv: List[str],
+    path: Optional[str] = None,
+    timeout: float = REQUEST_TIMEOUT,
+) -> Optional[Dict[str, Any]]:
+    """Run ``command argv`` in the daemon; ``None`` when it cannot serve the call.
+
+    That includes a busy daemon and one that does not answer within
+    ``timeout`` seconds; the caller then runs the command itself.
+    """
+    if os.environ.get(DAEMON_ENV, "").lower() in ("0", "off", "no", "false"):
+        return None
+    if any(_local_only(arg) for arg in argv):
+        return None
+    message = {
+        "op": "run",
+        "v": PROTOCOL_VERSION,
+        "command": command,
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": environment(),
+        "code": code_version(),
+    }
+    try:
+        reply = _exchange(message, path, timeout=timeout)
+    except OSError:
+        return None
+    return reply if reply.get("ok") else None
+
+
+def forward(command: str) -> None:
+    """Serve this CLI invocation from the daemon and exit, or return to run locally."""
+    reply = request(command, sys.argv[1:])
+    if reply is None:
+        return
+    if reply.get("stdout"):
+        sys.stdout.write(reply["stdout"])
+        sys.stdout.flush()
+    if reply.get("stderr"):
+        sys.stderr.write(reply["stderr"])
+        sys.stderr.flush()
+    raise SystemExit(reply.get("exit", 0))
+
+
+# -- server --------------------------------------------------------------------
+
+
+def _peer_uid(conn: socket.socket) -> Optional[int]:
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
+
+
+def _exit_code(code: Any) -> Tuple[int, str]:
+    """``SystemExit.code`` -> (exit status, message to print on stderr)."""
+    if code is None:
+        return 0, ""
+    if isinstance(code, int):
+        return code, ""
+    return 1, f"{code}\n"
+
+
+class StoreDaemon:
+    """Unix-socket server running the store CLIs in one warm process."""
+
+    def __init__(self, path: Optional[str] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        import threading
+
+        self.path = path or socket_path()
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.last_activity = time.monotonic()
+        self.served = 0
+        self.fallbacks = 0
+        self.env = environment()
+        self.code = code_version()
+        self.cwd = os.getcwd()
+        self._run_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._lock_fd: Optional[int] = None
+        self._sock: Optional[socket.socket] = None
+
+    def _acquire_instance(self) -> bool:
+        """Hold ``<socket>.lock`` for the daemon's lifetime; False if another daemon has it."""
+        import fcntl
+
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            return False
+        return True
+
+    def serve(self) -> bool:
+        """Serve until stopped or idle; False when another daemon already runs."""
+        import threading
+
+        if not self._acquire_instance():
+            return False
+        # Warm the imports once so the first request does not pay for them.
+        for module, _ in COMMANDS.values():
+            __import__(module)
+        try:
+            os.unlink(self.path)  # stale socket from a crashed daemon
+        except FileNotFoundError:
+            pass
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            self._sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        self._sock.listen(64)
+        self._sock.settimeout(1.0)
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = self._sock.accept()
+                except socket.timeout:
+                    if time.monotonic() - self.last_activity > self.idle_timeout and not self._run_lock.locked():
+                        break
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+        return True
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "socket": self.path,
+            "uptime": round(time.time() - self.started, 1),
+            "served": self.served,
+            "fallbacks": self.fallbacks,
+            "idle_timeout": self.idle_timeout,
+        }
+
+    def _handle(self, conn: socket.socket) -> None:
+        self.last_activity = time.monotonic()
+        with conn:
+            try:
+                uid = _peer_uid(conn)
+                if uid is not None and uid != os.getuid():
+                    return
+                data = b""
+                while True:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    data += chunk
+                message = json.loads(data)
+                reply = self._dispatch(message)
+                conn.sendall(json.dumps(reply, ensure_ascii=False).encode("utf-8"))
+            except (OSError, ValueError):
+                return
+            finally:
+                self.last_activity = time.monotonic()
+
+    def _dispatch(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.get("op")
+        if op == "ping":
+            return {"ok": True, **self.status()}
+        if op == "stop":
+            self.stop()
+            return {"ok": True, "stopping": True}
+        if op != "run" or message.get("v") != PROTOCOL_VERSION or message.get("command") not in COMMANDS:
+            return {"ok": False, "reason": "unsupported request"}
+        if message.get("code") != self.code:
+            # The scripts changed since this daemon started: let the caller run
+            # the new code and make room for a fresh daemon.
+            self.fallbacks += 1
+            self.stop()
+            return {"ok": False, "reason": "stale daemon"}
+        if message.get("env") != self.env:
+            self.fallbacks += 1
+            return {"ok": False, "reason": "different environment"}
+        return self._run(message["command"], list(message.get("argv") or []), message.get("cwd") or self.cwd)
+
+    def _run(self, command: str, argv: List[str], cwd: str) -> Dict[str, Any]:
+        import contextlib
+        import io
+        import traceback
+
+        module, entry = COMMANDS[command]
+        main = getattr(sys.modules[module], entry)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        if not self._run_lock.acquire(blocking=False):
+            # Never queue behind a running command: it may be slow or hung.
+            self.fallbacks += 1
+            return {"ok": False, "reason": "busy"}
+        try:
+            saved_argv = sys.argv
+            sys.argv = [os.path.join(_SCRIPTS_DIR, f"{module}.py")] + argv
+            try:
+                os.chdir(cwd)
+            except OSError:
+                sys.argv = saved_argv
+                self.fallbacks += 1
+                return {"ok": False, "reason": f"cannot enter {cwd}"}
+            try:
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    try:
+                        code, message = _exit_code(main())
+                    except SystemExit as exc:
+                        code, message = _exit_code(exc.code)
+                    except Exception:
+                        traceback.print_exc()
+                        code, message = 1, ""
+            finally:
+                sys.argv = saved_argv
+                os.chdir(self.cwd)
+            self.served += 1
+        finally:
+            self._run_lock.release()
+        return {"ok": True, "exit": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue() + message}
+
+
+def running(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Status of the daemon on ``path``, or ``None`` if none answers."""
+    try:
+        reply = _exchange({"op": "ping"}, path, timeout=2.0)
+    except OSError:
+        return None
+    return reply if reply.get("ok") else None
+
+
+def start(path: Optional[str] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, wait: float = 10.0) -> Optional[Dict[str, Any]]:
+    """Start a detached daemon (unless one runs) and wait until it answers."""
+    import subprocess
+
+    path = path or socket_path()
+    status = running(path)
+    if status is not None:
+        return status
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    log = open(os.path.join(os.path.dirname(path), "daemon.log"), "ab")
+    with log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "run", "--socket", path, "--idle-timeout", str(idle_timeout)],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            cwd=os.getcwd(),
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        status = running(path)
+        if status is not None:
+            return status
+        time.sleep(0.05)
+    return None
+
+
+def stop(path: Optional[str] = None) -> bool:
+    try:
+        return bool(_exchange({"op": "stop"}, path, timeout=5.0).get("ok"))
+    except OSError:
+        return False
+
+
+def main() -> int:
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="Warm daemon for the Linglong store CLIs")
+    parser.add_argument("action", choices=("start", "run", "stop", "status"), help="run stays in the foreground")
+    parser.add_argument("--socket", help=f"socket path (default: ${SOCKET_ENV} or a per-user runtime directory)")
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help=f"exit after this many idle seconds (default: {DEFAULT_IDLE_TIMEOUT:g})",
+    )
+    args = parser.parse_args()
+
+    if args.action == "run":
+        daemon = StoreDaemon(args.socket, args.idle_timeout)
+        signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+        if not daemon.serve():
+            print(f"a daemon is already running on {daemon.path}", file=sys.stderr)
+        return 0
+    if args.action == "start":
+        status = start(args.socket, args.idle_timeout)
+        if status is None:
+            print("daemon did not start; see daemon.log next to the socket", file=sys.stderr)
+            return 1
+        print(json.dumps(status, ensure_ascii=False))
+        return 0
+    if args.action == "stop":
+        return 0 if stop(args.socket) else 1
+    status = running(args.socket)
+    print(json.dumps(status or {"running": False, "socket": args.socket or socket_path()}, ensure_ascii=False))
+    return 0 if status else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
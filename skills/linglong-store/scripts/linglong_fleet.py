@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+玲珑应用批量（多主机）更新检查
+
+读取多台主机的已安装列表（``ll-cli list`` / ``ll-cli --json list`` 的输出文件、
+包含这些文件的目录，或标准输入的 NDJSON），对所有主机的 (appId, arch, version)
+去重后只提交一次更新检查，再把结果分发回每台主机生成各自的报告。
+
+主机之间应用高度重合时，接口调用次数取决于去重后的引用数，而不是主机数。
+"""
+
+import json
+import os
+import sys
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from linglong_installed import DEFAULT_ARCH, InstalledApp, parse_installed_output, parse_json_records
+from linglong_metrics import add_stats_arguments, metrics_from_args, report_metrics
+from linglong_store_api import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_RETRIES,
+    DEFAULT_UPDATE_CHUNK_SIZE,
+    LinglongStoreClient,
+)
+from linglong_update_report import REPORT_FORMATS, UpdateReport, build_report, index_updates
+
+
+RefKey = Tuple[str, str, str]
+
+
+@dataclass
+class FleetResult:
+    """批量检查结果：每台主机一份 UpdateReport"""
+
+    reports: Dict[str, UpdateReport] = field(default_factory=dict)
+    total_refs: int = 0
+    unique_refs: int = 0
+    requests: int = 0
+    failed_chunks: List[Dict[str, Any]] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'hosts': len(self.reports),
+            'total_refs': self.total_refs,
+            'unique_refs': self.unique_refs,
+            'requests': self.requests,
+            'failed_chunks': len(self.failed_chunks),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'summary': self.summary(),
+            'hosts': {host: report.to_dict() for host, report in self.reports.items()},
+        }
+
+    def render_text(self) -> str:
+        summary = self.summary()
+        lines = [
+            f"主机数: {summary['hosts']}，已安装引用: {summary['total_refs']}，"
+            f"去重后: {summary['unique_refs']}，接口请求: {summary['requests']}",
+        ]
+        if self.failed_chunks:
+            lines.append(f'失败分块: {len(self.failed_chunks)} 个，相关应用标记为未能检查')
+        lines.append('')
+        width = max([len(host) for host in self.reports] + [4])
+        for host, report in self.reports.items():
+            line = (
+                f'{host:<{width}}  已安装 {report.total_apps:>4}  需要更新 {report.updateable_count:>4}'
+            )
+            if report.unchecked:
+                line += f'  未能检查 {len(report.unchecked):>4}'
+            lines.append(line)
+            for entry in report.updateable:
+                lines.append(f'    {entry.app_id} ({entry.version} → {entry.new_version})')
+        return '\n'.join(lines)
+
+    def iter_ndjson(self) -> Iterator[str]:
+        """每台主机一行，最后一行为汇总"""
+        for host, report in self.reports.items():
+            record = report.to_dict()
+            record.pop('up_to_date_apps', None)
+            yield json.dumps(dict(host=host, **record), ensure_ascii=False)
+        yield json.dumps(dict(summary=True, **self.summary()), ensure_ascii=False)
+
+    def render(self, fmt: str = 'text') -> str:
+        if fmt == 'json':
+            return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        if fmt == 'ndjson':
+            return '\n'.join(self.iter_ndjson())
+        return self.render_text()
+
+
+def _host_name(path: str) -> str:
+    name = os.path.basename(path.rstrip(os.sep))
+    for suffix in ('.ndjson', '.json', '.txt', '.list'):
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def read_host_file(path: str, default_arch: str = DEFAULT_ARCH) -> Tuple[str, List[InstalledApp]]:
+    """读取一台主机的已安装列表文件（文本或 JSON 均可），主机名取文件名"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return _host_name(path), parse_installed_output(f.read(), default_arch)
+
+
+def read_ndjson_hosts(stream: IO[str], default_arch: str = DEFAULT_ARCH) -> Dict[str, List[InstalledApp]]:
+    """读取 NDJSON 格式的多主机列表
+
+    每行可以是：
+    - ``{"host": "h1", "apps": [{"appId": ..., "version": ..., "arch": ...}, ...]}``
+    - ``{"host": "h1", "output": "<ll-cli list 输出>"}``
+    - ``{"host": "h1", "appId": ..., "version": ...}``（每行一个引用）
+    """
+    hosts: Dict[str, List[InstalledApp]] = {}
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f'stdin 第 {number} 行不是合法 JSON: {exc}') from exc
+        if not isinstance(record, dict):
+            continue
+        host = str(record.get('host') or record.get('hostname') or 'stdin')
+        apps = hosts.setdefault(host, [])
+        if isinstance(record.get('apps'), list):
+            apps.extend(parse_json_records(record['apps'], default_arch))
+        elif isinstance(record.get('output'), str):
+            apps.extend(parse_installed_output(record['output'], default_arch))
+        else:
+            apps.extend(parse_json_records([record], default_arch))
+    return hosts
+
+
+def load_hosts(inputs: Iterable[str], default_arch: str = DEFAULT_ARCH, stdin: IO[str] = sys.stdin) -> Dict[str, List[InstalledApp]]:
+    """按输入顺序加载所有主机：文件、目录（其中的所有文件）或 ``-``（标准输入 NDJSON）"""
+    hosts: Dict[str, List[InstalledApp]] = {}
+    for item in inputs:
+        if item == '-':
+            for host, apps in read_ndjson_hosts(stdin, default_arch).items():
+                hosts.setdefault(host, []).extend(apps)
+            continue
+        if os.path.isdir(item):
+            paths = [
+                os.path.join(item, name)
+                for name in sorted(os.listdir(item))
+                if not name.startswith('.') and os.path.isfile(os.path.join(item, name))
+            ]
+        else:
+            paths = [item]
+        for path in paths:
+            host, apps = read_host_file(path, default_arch)
+            hosts.setdefault(host, []).extend(apps)
+    return hosts
+
+
+class FleetChecker:
+    """多主机更新检查器"""
+
+    def __init__(
+        self,
+        client: Optional[LinglongStoreClient] = None,
+        chunk_size: int = DEFAULT_UPDATE_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        retries: int = DEFAULT_RETRIES,
+    ):
+        self.client = client or LinglongStoreClient()
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+
+    def check(self, hosts: Dict[str, List[InstalledApp]]) -> FleetResult:
+        """
+        去重后统一检查更新，再按主机生成报告
+
+        Args:
+            hosts: 主机名 -> 已安装记录
+
+        Returns:
+            FleetResult
+        """
+        unique: Dict[RefKey, Dict[str, str]] = {}
+        total = 0
+        for apps in hosts.values():
+            for app in apps:
+                total += 1
+                key = (app.app_id, app.arch, app.version)
+                if key not in unique:
+                    unique[key] = app.to_check_item()
+
+        batch = self.client.check_updates_batch(
+            list(unique.values()),
+            chunk_size=self.chunk_size,
+            max_workers=self.max_workers,
+            retries=self.retries,
+        )
+        failed_chunks = [asdict(chunk) for chunk in batch.failed]
+        result = FleetResult(
+            total_refs=total,
+            unique_refs=len(unique),
+            requests=batch.chunks,
+            failed_chunks=failed_chunks,
+        )
+        index = index_updates(batch)
+        for host, apps in hosts.items():
+            result.reports[host] = build_report(apps, batch, failed_chunks, index=index)
+        return result
+
+
+def main() -> int:
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='玲珑应用批量（多主机）更新检查')
+    parser.add_argument(
+        'inputs',
+        nargs='+',
+        help='已安装列表文件、包含列表文件的目录，或 - 表示从标准输入读取 NDJSON'
+    )
+    parser.add_argument('--arch', default=DEFAULT_ARCH, help=f'列表未注明架构时使用的架构（默认: {DEFAULT_ARCH}）')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_UPDATE_CHUNK_SIZE, help='每个更新检查请求包含的应用数')
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS, help='并发请求数')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='失败分块的重试次数')
+    parser.add_argument('--format', choices=REPORT_FORMATS, default='text', help='输出格式（默认: text）')
+    parser.add_argument('--offline', metavar='SNAPSHOT', help='使用离线目录快照检查更新，不访问商店接口')
+    add_stats_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        hosts = load_hosts(args.inputs, args.arch)
+    except (OSError, ValueError) as exc:
+        print(f'错误: {exc}', file=sys.stderr)
+        return 1
+    if not hosts:
+        print('错误: 没有读取到任何主机的已安装列表', file=sys.stderr)
+        return 1
+
+    metrics = metrics_from_args(args)
+    if args.offline:
+        from linglong_offline import offline_client
+        client = offline_client(args.offline, metrics=metrics)
+    else:
+        client = LinglongStoreClient(metrics=metrics)
+    checker = FleetChecker(client, chunk_size=args.chunk_size, max_workers=args.max_workers, retries=args.retries)
+    try:
+        result = checker.check(hosts)
+    finally:
+        report_metrics(metrics, args)
+    if result.unique_refs and len(result.failed_chunks) == result.requests:
+        print('更新检查接口调用失败', file=sys.stderr)
+        return 1
+    print(result.render(args.format))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已安装应用列表解析
+
+优先使用 ``ll-cli --json list`` 的结构化输出；不支持 JSON 的旧版本回退到
+文本解析。文本解析器按表头识别列（ID/名称/版本/渠道/模块/描述，中英文表头
+均可），逐行流式处理，正则全部预编译。
+
+两种来源都解析为同一种 ``InstalledApp`` 记录（``__slots__``），供更新检查
+等模块共享，避免重复解析。
+"""
+
+import json
+import re
+import subprocess
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+DEFAULT_ARCH = 'x86_64'
+
+ANSI_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+# appId、名称（可选，可含空格）、第一个版本号形式的列、其余列
+ROW_RE = re.compile(
+    r'\s*([a-z][A-Za-z0-9_.-]+)\s+(?:(.*?)\s+)?(\d+\.\d+[\d.]*)(?!\S)(.*)'
+)
+
+# 表头列名 -> 字段名
+HEADER_FIELDS = {
+    'id': 'app_id',
+    'appid': 'app_id',
+    'name': 'name',
+    '名称': 'name',
+    'version': 'version',
+    '版本': 'version',
+    'arch': 'arch',
+    '架构': 'arch',
+    'channel': 'channel',
+    '渠道': 'channel',
+    '通道': 'channel',
+    'module': 'module',
+    '模块': 'module',
+    'kind': 'kind',
+    '类型': 'kind',
+    'description': 'description',
+    '描述': 'description',
+}
+DEFAULT_COLUMNS = ('app_id', 'name', 'version', 'channel', 'module', 'description')
+
+
+class InstalledApp:
+    """一条已安装记录（应用、运行时或 base）"""
+
+    __slots__ = ('app_id', 'version', 'arch', 'name', 'channel', 'module', 'kind', 'description')
+
+    def __init__(
+        self,
+        app_id: str,
+        version: str,
+        arch: str = DEFAULT_ARCH,
+        name: str = '',
+        channel: str = '',
+        module: str = '',
+        kind: str = '',
+        description: str = '',
+    ):
+        self.app_id = app_id
+        self.version = version
+        self.arch = arch
+        self.name = name
+        self.channel = channel
+        self.module = module
+        self.kind = kind
+        self.description = description
+
+    @property
+    def is_runtime(self) -> bool:
+        if self.kind:
+            return self.kind in ('runtime', 'base')
+        return 'runtime' in self.app_id.lower()
+
+    def to_check_item(self) -> Dict[str, str]:
+        """转换为 ``AppCheckVersionBO``"""
+        return {'appId': self.app_id, 'arch': self.arch, 'version': self.version}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, InstalledApp):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f'InstalledApp({self.app_id!r}, {self.version!r}, arch={self.arch!r}, module={self.module!r})'
+
+
+def _header_columns(tokens: List[str]) -> Optional[Tuple[str, ...]]:
+    if not tokens or tokens[0].lower() not in ('id', 'appid'):
+        return None
+    columns = tuple(HEADER_FIELDS[t.lower()] for t in tokens if t.lower() in HEADER_FIELDS)
+    return columns if 'version' in columns else None
+
+
+def iter_text_records(lines: Iterable[str], default_arch: str = DEFAULT_ARCH) -> Iterator[InstalledApp]:
+    """逐行解析 ``ll-cli list`` 文本输出
+
+    每行只匹配一次预编译正则：首列为 appId，第一个形如版本号的列为版本，二者
+    之间为名称（名称可含空格）。版本之后的列按表头顺序依次对应，最后一列吸收
+    剩余内容（描述可含空格）。
+    """
+    trailing = DEFAULT_COLUMNS[DEFAULT_COLUMNS.index('version') + 1:]
+    for raw in lines:
+        line = ANSI_RE.sub('', raw) if '\x1b' in raw else raw
+        match = ROW_RE.match(line)
+        if match is None:
+            header = _header_columns(line.split())
+            if header is not None:
+                trailing = header[header.index('version') + 1:]
+            continue
+        app_id, name, version, rest = match.groups()
+        fields = dict(zip(trailing, rest.split(None, len(trailing) - 1))) if rest and trailing else {}
+        yield InstalledApp(
+            app_id,
+            version,
+            fields.get('arch') or default_arch,
+            name or '',
+            fields.get('channel', ''),
+            fields.get('module', ''),
+            fields.get('kind', ''),
+            fields.get('description', ''),
+        )
+
+
+def parse_json_records(data: Any, default_arch: str = DEFAULT_ARCH) -> List[InstalledApp]:
+    """解析 ``ll-cli --json list`` 输出（对象数组，或包裹数组的对象）"""
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), [])
+    records = []
+    for item in data or []:
+        if not isinstance(item, dict):
+            continue
+        app_id = item.get('appId') or item.get('appid') or item.get('id')
+        version = item.get('version')
+        if not app_id or not version:
+            continue
+        arch = item.get('arch')
+        if isinstance(arch, list):
+            arch = arch[0] if arch else None
+        records.append(InstalledApp(
+            app_id=str(app_id),
+            version=str(version),
+            arch=arch or default_arch,
+            name=str(item.get('name') or ''),
+            channel=str(item.get('channel') or ''),
+            module=str(item.get('module') or ''),
+            kind=str(item.get('kind') or ''),
+            description=str(item.get('description') or ''),
+        ))
+    return records
+
+
+def parse_installed_output(
+    content: str, default_arch: str = DEFAULT_ARCH, data: Optional[Any] = None
+) -> List[InstalledApp]:
+    """解析 ``ll-cli list`` 的输出，自动识别 JSON 与文本格式
+
+    ``data`` 为 ``read_installed_output`` 已解码的 JSON，传入时不再重复解析。
+    """
+    if data is not None:
+        return parse_json_records(data, default_arch)
+    stripped = content.lstrip()
+    if stripped[:1] in ('[', '{'):
+        try:
+            return parse_json_records(json.loads(stripped), default_arch)
+        except ValueError:
+            pass
+    return list(iter_text_records(content.splitlines(), default_arch))
+
+
+def read_installed_output(ll_cli: str = 'll-cli') -> Tuple[str, Optional[Any]]:
+    """执行 ``ll-cli`` 获取已安装列表
+
+    Returns:
+        (输出内容, JSON 数据) 文本格式输出时 JSON 数据为 ``None``
+
+    Raises:
+        FileNotFoundError: 未找到 ll-cli
+        RuntimeError: ll-cli list 执行失败
+    """
+    result = subprocess.run(
+        [ll_cli, '--json', 'list'],
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='ignore',
+    )
+    if result.returncode == 0 and result.stdout.lstrip()[:1] in ('[', '{'):
+        try:
+            return result.stdout, json.loads(result.stdout)
+        except ValueError:
+            pass
+
+    result = subprocess.run(
+        [ll_cli, 'list'],
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='ignore',
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or 'll-cli list failed')
+    return result.stdout, None
+
+
+def list_installed(ll_cli: str = 'll-cli', default_arch: str = DEFAULT_ARCH) -> List[InstalledApp]:
+    """获取并解析已安装应用列表"""
+    content, data = read_installed_output(ll_cli)
+    return parse_installed_output(content, default_arch, data)
@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+玲珑应用批量安装/升级调度
+
+把一组引用（``appId`` 或 ``appId/version``）转换为 ``ll-cli install`` /
+``ll-cli upgrade`` 任务，按并发上限同时执行：
+
+- 依赖顺序：运行时（runtime/base）任务全部结束后才启动应用任务；任务也可以
+  通过 ``depends_on`` 显式依赖其他任务，被依赖的任务失败时跳过该任务。
+- 输出流式读取：单线程 ``selectors`` 循环增量读取每个任务的 stdout/stderr，
+  写入按字节封顶的环形缓冲区，只保留最近的日志，超长输出也不会占满内存。
+- 结构化进度事件：``queued``/``start``/``progress``/``output``/``finish``/
+  ``skip``/``done``，可直接输出为 NDJSON。
+
+    python3 linglong_jobs.py upgrade org.deepin.calculator org.deepin.Runtime --concurrency 2
+    python3 linglong_jobs.py install cn.wps.wps-office/11.1.0.10161 --yes --events
+"""
+
+import collections
+import json
+import os
+import re
+import selectors
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from linglong_installed import ANSI_RE
+
+
+ACTIONS = ('install', 'upgrade')
+DEFAULT_CONCURRENCY = 2
+DEFAULT_BUFFER_BYTES = 64 * 1024
+READ_SIZE = 64 * 1024
+# 无输出时检查进程退出与超时的间隔（秒）
+POLL_INTERVAL = 0.5
+
+# 终态；cancelled 表示被中断（Ctrl-C）时尚未完成
+FINAL_STATES = ('succeeded', 'failed', 'skipped', 'cancelled')
+
+PROGRESS_RE = re.compile(r'(\d{1,3}(?:\.\d+)?)\s*%')
+
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+class RingBuffer:
+    """按字节封顶的行缓冲区，超出上限时丢弃最早的行
+
+    ``\\r`` 也视为换行（``ll-cli`` 用回车刷新进度条）。
+    """
+
+    __slots__ = ('max_bytes', 'total_bytes', 'dropped_lines', '_lines', '_size', '_partial', '_after_cr')
+
+    def __init__(self, max_bytes: int = DEFAULT_BUFFER_BYTES):
+        self.max_bytes = max(1, max_bytes)
+        self.total_bytes = 0
+        self.dropped_lines = 0
+        self._lines: Deque[bytes] = collections.deque()
+        self._size = 0
+        self._partial = b''
+        self._after_cr = False
+
+    def write(self, data: bytes) -> List[bytes]:
+        """追加一段输出，返回其中新完成的行"""
+        if not data:
+            return []
+        self.total_bytes += len(data)
+        if self._after_cr and data[:1] == b'\n':
+            data = data[1:]  # 跨块的 \r\n
+        self._after_cr = data[-1:] == b'\r'
+        parts = (self._partial + data).replace(b'\r\n', b'\n').replace(b'\r', b'\n').split(b'\n')
+        partial = parts.pop()
+        if len(partial) > self.max_bytes:
+            partial = partial[-self.max_bytes:]
+        self._partial = partial
+        for line in parts:
+            self._lines.append(line)
+            self._size += len(line) + 1
+        while self._size > self.max_bytes and self._lines:
+            self._size -= len(self._lines.popleft()) + 1
+            self.dropped_lines += 1
+        return parts
+
+    def lines(self) -> List[str]:
+        lines = list(self._lines)
+        if self._partial:
+            lines.append(self._partial)
+        return [line.decode('utf-8', errors='replace') for line in lines]
+
+    def tail(self, count: int = 10) -> List[str]:
+        return self.lines()[-count:] if count > 0 else []
+
+    def text(self) -> str:
+        return '\n'.join(self.lines())
+
+    def __len__(self) -> int:
+        return self._size + len(self._partial)
+
+
+def is_runtime_ref(ref: str) -> bool:
+    """与 ``InstalledApp.is_runtime`` 相同的判断（无 kind 信息时按 appId）"""
+    return 'runtime' in ref.split('/', 1)[0].lower()
+
+
+@dataclass
+class Job:
+    """一个 ``ll-cli`` 任务
+
+    Args:
+        ref: ``appId`` 或 ``appId/version``
+        action: ``install`` 或 ``upgrade``
+        module: 模块名称（``--module``），仅 install 使用
+        runtime: 是否为运行时；``None`` 时按 appId 判断
+        depends_on: 依赖的任务 ID，依赖失败时本任务跳过
+        extra_args: 追加到命令末尾的参数（如 ``-y``、``--repo=...``）
+    """
+
+    ref: str
+    action: str = 'upgrade'
+    module: str = ''
+    runtime: Optional[bool] = None
+    depends_on: List[str] = field(default_factory=list)
+    extra_args: List[str] = field(default_factory=list)
+    id: str = ''
+    state: str = 'pending'
+    returncode: Optional[int] = None
+    error: str = ''
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    progress: Optional[float] = None
+    stdout: RingBuffer = field(default_factory=RingBuffer, repr=False)
+    stderr: RingBuffer = field(default_factory=RingBuffer, repr=False)
+
+    def __post_init__(self):
+        if self.action not in ACTIONS:
+            raise ValueError(f'不支持的操作: {self.action}（可选 {", ".join(ACTIONS)}）')
+        if not self.id:
+            self.id = f'{self.ref}:{self.module}' if self.module else self.ref
+        if self.runtime is None:
+            self.runtime = is_runtime_ref(self.ref)
+
+    @property
+    def app_id(self) -> str:
+        return self.ref.split('/', 1)[0]
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def command(self, ll_cli: str = 'll-cli') -> List[str]:
+        cmd = [ll_cli, self.action, self.ref]
+        if self.module and self.action == 'install':
+            cmd.append(f'--module={self.module}')
+        return cmd + list(self.extra_args)
+
+    def to_dict(self, tail: int = 10) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'ref': self.ref,
+            'action': self.action,
+            'runtime': self.runtime,
+            'state': self.state,
+            'returncode': self.returncode,
+            'error': self.error,
+            'duration': None if self.duration is None else round(self.duration, 3),
+            'stdout_bytes': self.stdout.total_bytes,
+            'stderr_bytes': self.stderr.total_bytes,
+            'stdout_tail': self.stdout.tail(tail),
+            'stderr_tail': self.stderr.tail(tail),
+        }
+
+
+@dataclass
+class JobsResult:
+    """一次调度的结果（任务按执行计划排序）"""
+
+    jobs: List[Job] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def by_state(self, state: str) -> List[Job]:
+        return [job for job in self.jobs if job.state == state]
+
+    @property
+    def ok(self) -> bool:
+        return all(job.state == 'succeeded' for job in self.jobs)
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {'total': len(self.jobs), 'elapsed': round(self.elapsed, 3)}
+        for state in ('succeeded',) + FINAL_STATES[1:]:
+            summary[state] = len(self.by_state(state))
+        return summary
+
+    def to_dict(self, tail: int = 10) -> Dict[str, Any]:
+        return {'summary': self.summary(), 'jobs': [job.to_dict(tail) for job in self.jobs]}
+
+
+def make_jobs(
+    refs: Iterable[str],
+    action: str = 'upgrade',
+    module: str = '',
+    extra_args: Optional[List[str]] = None,
+    runtimes: Iterable[str] = (),
+) -> List[Job]:
+    """为引用列表创建任务（相同引用只保留一个）
+
+    Args:
+        runtimes: 已知为运行时的 appId（如更新报告中的 is_runtime 条目）
+    """
+    known_runtimes = set(runtimes)
+    jobs: Dict[str, Job] = {}
+    for ref in refs:
+        job = Job(ref, action, module, extra_args=list(extra_args or []))
+        if job.app_id in known_runtimes:
+            job.runtime = True
+        jobs.setdefault(job.id, job)
+    return list(jobs.values())
+
+
+def plan(jobs: List[Job]) -> List[Job]:
+    """校验依赖并给出启动顺序：运行时在前，其余保持原有顺序
+
+    Raises:
+        ValueError: 任务 ID 重复、依赖不存在或存在循环依赖
+    """
+    by_id: Dict[str, Job] = {}
+    for job in jobs:
+        if job.id in by_id:
+            raise ValueError(f'任务重复: {job.id}')
+        by_id[job.id] = job
+    for job in jobs:
+        missing = [dep for dep in job.depends_on if dep not in by_id]
+        if missing:
+            raise ValueError(f'任务 {job.id} 依赖不存在的任务: {", ".join(missing)}')
+        if job.runtime and any(not by_id[dep].runtime for dep in job.depends_on):
+            # 应用任务总在运行时之后启动，运行时再依赖应用会互相等待
+            raise ValueError(f'运行时任务 {job.id} 不能依赖应用任务')
+
+    ordered: List[Job] = []
+    visiting: Dict[str, bool] = {}
+
+    def visit(job: Job, path: List[str]) -> None:
+        if visiting.get(job.id) is False:
+            return
+        if visiting.get(job.id):
+            raise ValueError(f'循环依赖: {" -> ".join(path + [job.id])}')
+        visiting[job.id] = True
+        for dep in job.depends_on:
+            visit(by_id[dep], path + [job.id])
+        visiting[job.id] = False
+        ordered.append(job)
+
+    for job in sorted(jobs, key=lambda job: not job.runtime):
+        visit(job, [])
+    return ordered
+
+
+class JobRunner:
+    """并发执行 ``ll-cli`` 任务
+
+    Args:
+        ll_cli: ``ll-cli`` 可执行文件
+        concurrency: 同时运行的任务数上限
+        buffer_bytes: 每个任务 stdout/stderr 各自保留的最大字节数
+        timeout: 单个任务的超时秒数，超时后终止进程并记为失败
+        on_event: 进度事件回调，参数为可 JSON 序列化的 dict
+        stream_output: 是否为每一行输出发送 ``output`` 事件
+    """
+
+    def __init__(
+        self,
+        ll_cli: str = 'll-cli',
+        concurrency: int = DEFAULT_CONCURRENCY,
+        buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        timeout: Optional[float] = None,
+        on_event: Optional[EventCallback] = None,
+        stream_output: bool = False,
+    ):
+        self.ll_cli = ll_cli
+        self.concurrency = max(1, concurrency)
+        self.buffer_bytes = buffer_bytes
+        self.timeout = timeout
+        self.on_event = on_event
+        self.stream_output = stream_output
+
+    def _emit(self, kind: str, job: Optional[Job] = None, **fields: Any) -> None:
+        if self.on_event is None:
+            return
+        event: Dict[str, Any] = {'type': kind, 'ts': round(time.time(), 3)}
+        if job is not None:
+            event['job'] = job.id
+        event.update(fields)
+        self.on_event(event)
+
+    def _ready(self, job: Job, by_id: Dict[str, Job], runtimes: List[Job]) -> Optional[bool]:
+        """True 可以启动，False 需要跳过，None 继续等待"""
+        deps = [by_id[dep] for dep in job.depends_on]
+        if any(dep.state in ('failed', 'skipped', 'cancelled') for dep in deps):
+            return False
+        if any(dep.state not in FINAL_STATES for dep in deps):
+            return None
+        # 运行时失败不阻止应用升级（旧运行时仍然可用），只保证先后顺序
+        if not job.runtime and any(rt.state not in FINAL_STATES for rt in runtimes):
+            return None
+        return True
+
+    def _start(self, job: Job, selector: selectors.BaseSelector) -> Optional[subprocess.Popen]:
+        job.stdout = RingBuffer(self.buffer_bytes)
+        job.stderr = RingBuffer(self.buffer_bytes)
+        job.started = time.time()
+        job.state = 'running'
+        cmd = job.command(self.ll_cli)
+        self._emit('start', job, ref=job.ref, action=job.action, cmd=cmd)
+        try:
+            proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as exc:
+            self._finish(job, None, f'无法启动 {self.ll_cli}: {exc}')
+            return None
+        for name, pipe in (('stdout', proc.stdout), ('stderr', proc.stderr)):
+            os.set_blocking(pipe.fileno(), False)
+            selector.register(pipe, selectors.EVENT_READ, (job, name))
+        return proc
+
+    def _read(self, key: selectors.SelectorKey, selector: selectors.BaseSelector) -> Optional[bool]:
+        """读取一次管道：True 表示管道已关闭，None 表示暂时没有数据"""
+        job, name = key.data
+        try:
+            data = os.read(key.fd, READ_SIZE)
+        except BlockingIOError:
+            return None
+        if not data:
+            selector.unregister(key.fileobj)
+            key.fileobj.close()
+            return True
+        for line in getattr(job, name).write(data):
+            text = line.decode('utf-8', errors='replace')
+            if self.stream_output:
+                self._emit('output', job, stream=name, line=text)
+            matches = PROGRESS_RE.findall(ANSI_RE.sub('', text) if '\x1b' in text else text)
+            if matches:
+                percent = min(100.0, float(matches[-1]))
+                if job.progress is None or int(percent) != int(job.progress):
+                    self._emit('progress', job, percent=percent, line=text.strip())
+                job.progress = percent
+        return False
+
+    def _finish(self, job: Job, returncode: Optional[int], error: str = '') -> None:
+        job.finished = time.time()
+        job.returncode = returncode
+        job.error = error
+        if not error and returncode != 0:
+            job.error = (job.stderr.tail(1) or job.stdout.tail(1) or [f'退出码 {returncode}'])[0].strip()
+        job.state = 'succeeded' if returncode == 0 and not error else 'failed'
+        self._emit(
+            'finish', job,
+            state=job.state,
+            returncode=returncode,
+            error=job.error,
+            duration=round(job.duration or 0.0, 3),
+            stdout_bytes=job.stdout.total_bytes,
+            stderr_bytes=job.stderr.total_bytes,
+        )
+
+    def run(self, jobs: List[Job]) -> JobsResult:
+        """执行全部任务并等待结束；Ctrl-C 时终止正在运行的进程"""
+        ordered = plan(jobs)
+        by_id = {job.id: job for job in ordered}
+        runtimes = [job for job in ordered if job.runtime]
+        result = JobsResult(ordered)
+        start = time.perf_counter()
+        for position, job in enumerate(ordered):
+            self._emit('queued', job, ref=job.ref, action=job.action, runtime=job.runtime,
+                       depends_on=job.depends_on, position=position)
+
+        pending = list(ordered)
+        running: Dict[str, subprocess.Popen] = {}
+        open_pipes: Dict[str, int] = {}
+        selector = selectors.DefaultSelector()
+        try:
+            while pending or running:
+                waiting = len(pending)
+                for job in list(pending):
+                    if len(running) >= self.concurrency:
+                        break
+                    ready = self._ready(job, by_id, runtimes)
+                    if ready is None:
+                        continue
+                    pending.remove(job)
+                    if not ready:
+                        job.state = 'skipped'
+                        failed = [dep for dep in job.depends_on if by_id[dep].state != 'succeeded']
+                        job.error = f'依赖任务未成功: {", ".join(failed)}'
+                        self._emit('skip', job, reason=job.error)
+                        continue
+                    proc = self._start(job, selector)
+                    if proc is not None:
+                        running[job.id] = proc
+                        open_pipes[job.id] = 2
+                if not running:
+                    if pending and len(pending) == waiting:
+                        raise RuntimeError(f'任务无法启动: {", ".join(job.id for job in pending)}')
+                    continue
+
+                for key, _ in selector.select(timeout=self._poll_timeout(running, by_id)):
+                    if self._read(key, selector):
+                        open_pipes[key.data[0].id] -= 1
+
+                now = time.time()
+                for job_id, proc in list(running.items()):
+                    job = by_id[job_id]
+                    if open_pipes[job_id] == 0:
+                        del running[job_id]
+                        self._finish(job, proc.wait())
+                    elif proc.poll() is not None:
+                        # 进程已退出但管道未关闭（被残留的子进程继承）：读完已有输出即结束
+                        self._drain(job, selector, read=True)
+                        del running[job_id]
+                        self._finish(job, proc.returncode)
+                    elif self.timeout is not None and now - job.started > self.timeout:
+                        proc.kill()
+                        proc.wait()
+                        self._drain(job, selector)
+                        del running[job_id]
+                        self._finish(job, proc.returncode, f'超时（{self.timeout:g}s）')
+        finally:
+            for job_id, proc in running.items():
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+                self._drain(by_id[job_id], selector)
+                by_id[job_id].state = 'cancelled'
+                by_id[job_id].finished = time.time()
+            for job in pending:
+                job.state = 'cancelled'
+            selector.close()
+            result.elapsed = time.perf_counter() - start
+
+        self._emit('done', summary=result.summary())
+        return result
+
+    def _poll_timeout(self, running: Dict[str, subprocess.Popen], by_id: Dict[str, Job]) -> float:
+        if self.timeout is None:
+            return POLL_INTERVAL
+        now = time.time()
+        remaining = min(by_id[job_id].started + self.timeout - now for job_id in running)
+        return min(POLL_INTERVAL, max(0.0, remaining))
+
+    def _drain(self, job: Job, selector: selectors.BaseSelector, read: bool = False) -> None:
+        """（可选读完已有输出后）注销并关闭任务剩余的管道"""
+        for key in list(selector.get_map().values()):
+            if key.data[0] is not job:
+                continue
+            if read:
+                state = False
+                while state is False:
+                    state = self._read(key, selector)
+                if state:
+                    continue
+            selector.unregister(key.fileobj)
+            key.fileobj.close()
+
+
+def print_event(event: Dict[str, Any], stream=None) -> None:
+    """把进度事件打印为人类可读的一行（进度每 10% 打印一次）"""
+    stream = stream or sys.stdout
+    kind = event['type']
+    job = event.get('job', '')
+    if kind == 'start':
+        print(f"[开始] {job} ({event['action']})", file=stream)
+    elif kind == 'progress':
+        if int(event['percent']) % 10 == 0:
+            print(f"[进度] {job} {int(event['percent'])}%", file=stream)
+    elif kind == 'finish':
+        if event['state'] == 'succeeded':
+            print(f"[完成] {job} 用时 {event['duration']:.1f}s", file=stream)
+        else:
+            print(f"[失败] {job} {event['error']}", file=stream)
+    elif kind == 'skip':
+        print(f"[跳过] {job} {event['reason']}", file=stream)
+    elif kind == 'done':
+        summary = event['summary']
+        print(
+            f"共 {summary['total']} 个任务：成功 {summary['succeeded']}，失败 {summary['failed']}，"
+            f"跳过 {summary['skipped']}，用时 {summary['elapsed']:.1f}s",
+            file=stream,
+        )
+    stream.flush()
+
+
+def print_json_event(event: Dict[str, Any], stream=None) -> None:
+    stream = stream or sys.stdout
+    stream.write(json.dumps(event, ensure_ascii=False) + '\n')
+    stream.flush()
+
+
+def add_runner_arguments(parser) -> None:
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'同时执行的 ll-cli 任务数（默认: {DEFAULT_CONCURRENCY}）'
+    )
+    parser.add_argument('--ll-cli', default='ll-cli', help='ll-cli 可执行文件（默认: ll-cli）')
+    parser.add_argument('--timeout', type=float, help='单个任务的超时秒数')
+    parser.add_argument(
+        '--events',
+        action='store_true',
+        help='以 NDJSON 输出结构化进度事件（queued/start/progress/finish/skip/done）'
+    )
+
+
+def runner_from_args(args, stream=None) -> JobRunner:
+    printer = print_json_event if args.events else print_event
+    return JobRunner(
+        ll_cli=args.ll_cli,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        on_event=lambda event: printer(event, stream),
+    )
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='并发执行玲珑应用安装/升级')
+    parser.add_argument('action', choices=ACTIONS, help='执行的操作')
+    parser.add_argument('refs', nargs='+', help='appId 或 appId/version')
+    parser.add_argument('--module', default='', help='安装的模块名称（install）')
+    parser.add_argument('--repo', help='指定仓库（install）')
+    parser.add_argument('-y', '--yes', action='store_true', help='自动确认（install）')
+    parser.add_argument('--runtime', action='append', default=[], metavar='APPID', help='把 APPID 视为运行时（可重复）')
+    add_runner_arguments(parser)
+    args = parser.parse_args()
+
+    extra_args = []
+    if args.action == 'install':
+        if args.repo:
+            extra_args.append(f'--repo={args.repo}')
+        if args.yes:
+            extra_args.append('-y')
+    try:
+        jobs = make_jobs(args.refs, args.action, args.module, extra_args, runtimes=args.runtime)
+        result = runner_from_args(args).run(jobs)
+    except ValueError as e:
+        print(f'错误: {e}', file=sys.stderr)
+        sys.exit(2)
+    except KeyboardInterrupt:
+        print('已中断，正在运行的任务已终止', file=sys.stderr)
+        sys.exit(130)
+    sys.exit(0 if result.ok else 1)
+
+
+if __name__ == '__main__':
+    main()
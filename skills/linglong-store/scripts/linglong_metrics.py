@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-endpoint request instrumentation for the Linglong store client.
+
+A ``StoreMetrics`` attached to ``LinglongStoreClient`` (``metrics=...``)
+records every store call: duration, the transport's DNS/connect/TLS/TTFB
+split, wire sizes, retries and how the response cache and single-flight
+layer served it. ``summary()`` aggregates per endpoint (p50/p99 latency,
+throughput, bytes, cache outcomes); ``render()`` formats that for ``--stats``.
+
+With a trace path every call is also appended to a JSON-lines file as it
+completes (``"type": "request"``), followed by one ``"type": "summary"``
+line on ``close()``, ready to be shipped to a dashboard.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+import unicodedata
+from typing import IO, Any, Dict, List, Optional
+
+from linglong_transport import RequestTiming
+
+
+# How a call was served, in report order.
+CACHE_OUTCOMES = ("hit", "revalidated", "miss", "off", "coalesced")
+_PHASES = ("dns", "connect", "tls", "ttfb", "total")
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _width(text: str) -> int:
+    """Terminal columns, counting CJK characters as two."""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))]
+
+
+class _EndpointStats:
+    __slots__ = ("calls", "errors", "retries", "cache", "durations", "phase_sums", "phase_counts",
+                 "request_bytes", "response_bytes", "reused")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache = dict.fromkeys(CACHE_OUTCOMES, 0)
+        self.durations: List[float] = []
+        self.phase_sums = dict.fromkeys(_PHASES, 0.0)
+        self.phase_counts = dict.fromkeys(_PHASES, 0)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.reused = 0
+
+    def add(self, call: Dict[str, Any], duration: float, failed: bool) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.cache[call.get("cache") or "coalesced"] += 1
+        self.durations.append(duration)
+        timing: Optional[RequestTiming] = call.get("timing")
+        if timing is not None:
+            for phase in _PHASES:
+                value = getattr(timing, phase)
+                if value is not None:
+                    self.phase_sums[phase] += value
+                    self.phase_counts[phase] += 1
+            self.request_bytes += timing.request_bytes
+            self.response_bytes += timing.response_bytes
+            self.reused += timing.reused
+            self.retries += timing.retries
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        ordered = sorted(self.durations)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "cache": dict(self.cache),
+            "p50Ms": _ms(_percentile(ordered, 50)),
+            "p99Ms": _ms(_percentile(ordered, 99)),
+            "meanMs": _ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "maxMs": _ms(ordered[-1]) if ordered else 0.0,
+            "callsPerS": round(self.calls / elapsed, 2) if elapsed > 0 else 0.0,
+            # Transport phases, averaged over the calls that went upstream.
+            "phasesMs": {
+                phase: _ms(self.phase_sums[phase] / self.phase_counts[phase]) if self.phase_counts[phase] else None
+                for phase in _PHASES
+            },
+            "reusedConnections": self.reused,
+            "requestBytes": self.request_bytes,
+            "responseBytes": self.response_bytes,
+        }
+
+
+class StoreMetrics:
+    """Thread-safe per-endpoint call recorder, optionally tracing to JSON lines.
+
+    Args:
+        trace: path (appended to) or open text stream for the JSON-lines trace.
+    """
+
+    def __init__(self, trace: Optional[str | IO[str]] = None) -> None:
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, _EndpointStats] = {}
+        self._started = time.perf_counter()
+        self._owns_trace = isinstance(trace, str)
+        self._trace: Optional[IO[str]] = open(trace, "a", encoding="utf-8") if isinstance(trace, str) else trace
+
+    def start(self, method: str, endpoint: str) -> Dict[str, Any]:
+        """Begin a call; the client fills ``cache``/``status``/``timing`` in."""
+        return {"method": method, "endpoint": endpoint, "ts": time.time(), "start": time.perf_counter()}
+
+    def finish(self, call: Dict[str, Any], error: Optional[BaseException] = None) -> None:
+        duration = time.perf_counter() - call["start"]
+        with self._lock:
+            stats = self._endpoints.get(call["endpoint"])
+            if stats is None:
+                stats = self._endpoints[call["endpoint"]] = _EndpointStats()
+            stats.add(call, duration, error is not None)
+            if self._trace is not None:
+                record = self._trace_record(call, duration, error)
+                try:
+                    self._trace.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    self._trace.flush()
+                except (OSError, ValueError):
+                    # Tracing must never fail the call it describes.
+                    self._trace = None
+
+    def count_retry(self, endpoint: str) -> None:
+        """Record a caller-level retry (e.g. a failed update-check chunk sent again)."""
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.retries += 1
+
+    @staticmethod
+    def _trace_record(call: Dict[str, Any], duration: float, error: Optional[BaseException]) -> Dict[str, Any]:
+        timing: Optional[RequestTiming] = call.get("timing")
+        record = {
+            "type": "request",
+            "ts": round(call["ts"], 6),
+            "method": call["method"],
+            "endpoint": call["endpoint"],
+            "status": call.get("status"),
+            "cache": call.get("cache") or "coalesced",
+            "ok": error is None,
+            "error": None if error is None else str(error),
+            "durationMs": _ms(duration),
+        }
+        if timing is not None:
+            record.update({
+                "dnsMs": _ms(timing.dns),
+                "connectMs": _ms(timing.connect),
+                "tlsMs": _ms(timing.tls),
+                "ttfbMs": _ms(timing.ttfb),
+                "totalMs": _ms(timing.total),
+                "requestBytes": timing.request_bytes,
+                "responseBytes": timing.response_bytes,
+                "reused": timing.reused,
+                "retries": timing.retries,
+            })
+        return record
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._started
+        with self._lock:
+            endpoints = {name: stats.summary(elapsed) for name, stats in sorted(self._endpoints.items())}
+        return {
+            "elapsedS": round(elapsed, 3),
+            "calls": sum(item["calls"] for item in endpoints.values()),
+            "errors": sum(item["errors"] for item in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+    def render(self) -> str:
+        """Per-run summary table for ``--stats``."""
+        summary = self.summary()
+        lines = [f"商店接口统计: {summary['calls']} 次调用, {summary['errors']} 次失败, 用时 {summary['elapsedS']:.2f}s"]
+        header = ("接口", "调用", "失败", "重试", "命中/校验/未命中/直连/合并", "p50ms", "p99ms",
+                  "DNS/连接/TLS/首字节ms", "发送/接收B")
+        rows = [header]
+        for name, item in summary["endpoints"].items():
+            phases = "/".join("-" if item["phasesMs"][p] is None else f"{item['phasesMs'][p]:.1f}" for p in _PHASES[:4])
+            rows.append((
+                name,
+                str(item["calls"]),
+                str(item["errors"]),
+                str(item["retries"]),
+                "/".join(str(item["cache"][outcome]) for outcome in CACHE_OUTCOMES),
+                f"{item['p50Ms']:.1f}",
+                f"{item['p99Ms']:.1f}",
+                phases,
+                f"{item['requestBytes']}/{item['responseBytes']}",
+            ))
+        widths = [max(_width(row[i]) for row in rows) for i in range(len(header))]
+        for row in rows:
+            lines.append("  ".join(cell + " " * (width - _width(cell)) for cell, width in zip(row, widths)).rstrip())
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        """Write the trailing summary line and close an owned trace file."""
+        with self._lock:
+            trace, self._trace = self._trace, None
+        if trace is None:
+            return
+        trace.write(json.dumps(
+            {"type": "summary", "ts": round(time.time(), 6), **self.summary()}, ensure_ascii=False, separators=(",", ":")
+        ) + "\n")
+        if self._owns_trace:
+            trace.close()
+        else:
+            trace.flush()
+
+
+def add_stats_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--stats", action="store_true", help="结束时向 stderr 输出各接口的耗时、流量、重试与缓存统计")
+    parser.add_argument("--trace", metavar="FILE", help="把每次接口调用追加写入 JSON Lines 跟踪文件")
+
+
+def metrics_from_args(args: argparse.Namespace) -> Optional[StoreMetrics]:
+    """``StoreMetrics`` for ``--stats``/``--trace``, or ``None`` when neither is given."""
+    if not getattr(args, "stats", False) and not getattr(args, "trace", None):
+        return None
+    return StoreMetrics(trace=args.trace)
+
+
+def report_metrics(metrics: Optional[StoreMetrics], args: argparse.Namespace) -> None:
+    """Close the trace and print the ``--stats`` summary to stderr."""
+    if metrics is None:
+        return
+    metrics.close()
+    if args.stats:
+        print(metrics.render(), file=sys.stderr)
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Portable offline catalog snapshots for the Linglong store.
+
+One file holds everything the store helpers ask the API for, for one
+(repo, arch, lang): both category listings, every app record (listing fields
+merged with ``/app/getAppDetail``) and a small search table. It is exported by
+``linglong_catalog_sync.py --export`` and read back through
+``OfflineTransport``, a drop-in transport that answers the store endpoints from
+the file, so every client method and CLI works unchanged with ``--offline``.
+
+File layout (little-endian)::
+
+    MAGIC                  8 bytes
+    header length          u32
+    header                 JSON: meta, categories, section offsets (relative to
+                           the end of the header)
+    search section         one "appId\\x1fname\\x1fzhName\\x1fcategoryId\\x1farch\\n" line per app
+    index section          struct "<QI" (record offset, length) per app, listing order
+    records section        zlib-compressed JSON record per app
+
+The file is memory-mapped: opening it reads only the header, the search table
+is decoded on first use, and records are decompressed one at a time when a
+page or detail is requested.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from linglong_category_index import ALIAS_LANGS
+from linglong_transport import TransportError, TransportResponse
+from linglong_versions import is_newer
+
+
+MAGIC = b"LLSNAP\x00\x01"
+FORMAT_VERSION = 1
+_LENGTH = struct.Struct("<I")
+_ENTRY = struct.Struct("<QI")
+_SEP = "\x1f"
+
+
+def write_snapshot(
+    path: str,
+    records: Iterable[Dict[str, Any]],
+    *,
+    categories: Optional[List[Dict[str, Any]]] = None,
+    web_categories: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Write a snapshot file atomically; returns the number of apps.
+
+    ``records`` are raw app records (``appId`` required), kept in the given
+    order for listing results. ``web_categories`` maps a language to its
+    ``/web/categories`` listing.
+    """
+    search_lines: List[bytes] = []
+    entries: List[bytes] = []
+    blobs: List[bytes] = []
+    offset = 0
+    seen = set()
+    for record in records:
+        app_id = record.get("appId")
+        if not app_id or app_id in seen:
+            continue
+        seen.add(app_id)
+        fields = (app_id, record.get("name"), record.get("zhName"), record.get("categoryId"), record.get("arch"))
+        search_lines.append(
+            (_SEP.join("" if value is None else str(value).replace(_SEP, " ").replace("\n", " ") for value in fields) + "\n").encode("utf-8")
+        )
+        blob = zlib.compress(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6)
+        entries.append(_ENTRY.pack(offset, len(blob)))
+        blobs.append(blob)
+        offset += len(blob)
+
+    search = b"".join(search_lines)
+    index = b"".join(entries)
+    header: Dict[str, Any] = dict(meta or {})
+    header.update({
+        "format": FORMAT_VERSION,
+        "createdAt": header.get("createdAt") or time.time(),
+        "apps": len(entries),
+        "categories": categories or [],
+        "webCategories": web_categories or {},
+        "sections": {
+            "search": [0, len(search)],
+            "index": [len(search), len(index)],
+            "records": [len(search) + len(index), offset],
+        },
+    })
+    encoded = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(MAGIC)
+            handle.write(_LENGTH.pack(len(encoded)))
+            handle.write(encoded)
+            handle.write(search)
+            handle.write(index)
+            for blob in blobs:
+                handle.write(blob)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return len(entries)
+
+
+class OfflineSnapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as handle:
+            try:
+                self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise ValueError(f"not a catalog snapshot: {path}") from exc
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"not a catalog snapshot: {path}")
+        start = len(MAGIC) + _LENGTH.size
+        (length,) = _LENGTH.unpack_from(self._mm, len(MAGIC))
+        self.header: Dict[str, Any] = json.loads(self._mm[start:start + length].decode("utf-8"))
+        if self.header.get("format") != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"unsupported snapshot format {self.header.get('format')}: {path}")
+        base = start + length
+        self._sections = {name: (base + offset, size) for name, (offset, size) in self.header["sections"].items()}
+        self._rows: Optional[List[List[str]]] = None
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "OfflineSnapshot":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def arch(self) -> Optional[str]:
+        return self.header.get("arch")
+
+    @property
+    def repo_name(self) -> Optional[str]:
+        return self.header.get("repoName")
+
+    @property
+    def lang(self) -> Optional[str]:
+        return self.header.get("lang")
+
+    def __len__(self) -> int:
+        return int(self.header.get("apps") or 0)
+
+    def categories(self, use_web: bool = False, lang: Optional[str] = None) -> List[Dict[str, Any]]:
+        """App-side listing, or the web listing for ``lang`` (default: the snapshot's)."""
+        if not use_web:
+            return list(self.header.get("categories") or [])
+        web = self.header.get("webCategories") or {}
+        return list(web.get(lang or self.lang or "") or web.get(self.lang or "") or [])
+
+    def _load_rows(self) -> List[List[str]]:
+        """Decode the search table and the appId -> position map on first use."""
+        if self._rows is None:
+            with self._lock:
+                if self._rows is None:
+                    offset, length = self._sections["search"]
+                    lines = self._mm[offset:offset + length].decode("utf-8").split("\n")
+                    rows = [line.split(_SEP) for line in lines if line]
+                    self._positions = {row[0]: position for position, row in enumerate(rows)}
+                    self._rows = rows
+        return self._rows
+
+    @property
+    def rows(self) -> List[List[str]]:
+        """Search table rows ``[appId, name, zhName, categoryId, arch]``, listing order."""
+        return self._load_rows()
+
+    def record_at(self, position: int) -> Dict[str, Any]:
+        index_offset = self._sections["index"][0]
+        records_offset = self._sections["records"][0]
+        offset, length = _ENTRY.unpack_from(self._mm, index_offset + position * _ENTRY.size)
+        start = records_offset + offset
+        return json.loads(zlib.decompress(self._mm[start:start + length]).decode("utf-8"))
+
+    def position(self, app_id: str) -> Optional[int]:
+        """Listing position of ``app_id``."""
+        self._load_rows()
+        return self._positions.get(app_id)
+
+    def get(self, app_id: str) -> Optional[Dict[str, Any]]:
+        position = self.position(app_id)
+        return None if position is None else self.record_at(position)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for position in range(len(self.rows)):
+            yield self.record_at(position)
+
+    def category_count(self, category_id: Optional[str]) -> int:
+        return sum(1 for row in self.rows if row[3] == str(category_id))
+
+    def search(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """``/visit/getSearchAppList`` answered from the search table.
+
+        ``name``/``zhName`` match case-insensitively anywhere in the appId,
+        name or zhName; ``categoryId`` and ``arch`` must match when given.
+        """
+        page_no = max(int(payload.get("pageNo") or 1), 1)
+        page_size = max(int(payload.get("pageSize") or 20), 1)
+        terms = [str(payload[key]).lower() for key in ("name", "zhName") if payload.get(key)]
+        category_id = payload.get("categoryId")
+        arch = payload.get("arch")
+        matches = []
+        for position, row in enumerate(self.rows):
+            if category_id and row[3] != str(category_id):
+                continue
+            if arch and row[4] and row[4] != arch:
+                continue
+            if terms:
+                text = f"{row[0]}\n{row[1]}\n{row[2]}".lower()
+                if not all(term in text for term in terms):
+                    continue
+            matches.append(position)
+        start = (page_no - 1) * page_size
+        records = [self.record_at(position) for position in matches[start:start + page_size]]
+        return {
+            "code": 200,
+            "data": {
+                "records": records,
+                "total": len(matches),
+                "size": page_size,
+                "current": page_no,
+                "pages": (len(matches) + page_size - 1) // page_size,
+            },
+        }
+
+    def details(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        data: Dict[str, List[Dict[str, Any]]] = {}
+        for item in items:
+            record = self.get(str(item.get("appId")))
+            if record is not None:
+                data[record["appId"]] = [record]
+        return {"code": 200, "data": data}
+
+    def versions(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """``/visit/getSearchAppVersionList``: a snapshot keeps one version per app."""
+        record = self.get(str(payload.get("appId")))
+        return {"code": 200, "data": [record] if record is not None else []}
+
+    def check_updates(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """``/app/appCheckUpdate``: apps whose snapshot version is newer."""
+        updates = []
+        for item in items:
+            record = self.get(str(item.get("appId")))
+            if record is None:
+                continue
+            arch = item.get("arch")
+            if arch and record.get("arch") and record["arch"] != arch:
+                continue
+            if is_newer(record.get("version"), item.get("version")):
+                updates.append({
+                    "appId": record["appId"],
+                    "arch": arch or record.get("arch"),
+                    "version": record.get("version"),
+                    "categoryName": record.get("categoryName"),
+                })
+        return {"code": 200, "data": updates}
+
+
+class OfflineTransport:
+    """Transport answering store endpoints from an ``OfflineSnapshot``.
+
+    Endpoints the snapshot cannot answer (e.g. telemetry) raise
+    ``TransportError`` with status 503.
+    """
+
+    def __init__(self, snapshot: OfflineSnapshot) -> None:
+        self.snapshot = snapshot
+
+    @classmethod
+    def open(cls, path: str) -> "OfflineTransport":
+        return cls(OfflineSnapshot(path))
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]], payload: Any) -> Optional[Any]:
+        snapshot = self.snapshot
+        if method == "GET" and path == "/visit/getDisCategoryList":
+            return {"code": 200, "data": snapshot.categories()}
+        if method == "GET" and path == "/web/categories":
+            lang = (query.get("lang") or [None])[0]
+            return {"code": 200, "data": snapshot.categories(use_web=True, lang=lang)}
+        if method == "GET" and path == "/web/getCategoryAppCount":
+            return {"code": 200, "data": snapshot.category_count((query.get("categoryId") or [None])[0])}
+        if method == "POST" and path == "/visit/getSearchAppList":
+            return snapshot.search(payload or {})
+        if method == "POST" and path == "/app/getAppDetail":
+            return snapshot.details(payload or [])
+        if method == "POST" and path == "/visit/getSearchAppVersionList":
+            return snapshot.versions(payload or {})
+        if method == "POST" and path == "/app/appCheckUpdate":
+            return snapshot.check_updates(payload or [])
+        return None
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        parts = urlsplit(url)
+        try:
+            payload = json.loads(body) if body else None
+        except ValueError as exc:
+            raise TransportError(f"invalid JSON body for {url}", url=url) from exc
+        result = self._route(method.upper(), parts.path, parse_qs(parts.query), payload)
+        if result is None:
+            raise TransportError(
+                f"{method} {parts.path} is not available offline ({self.snapshot.path})",
+                url=url,
+                status=503,
+            )
+        data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+        return TransportResponse(200, data, url, {"content-type": "application/json"})
+
+    def close(self) -> None:
+        self.snapshot.close()
+
+
+def offline_client(path: str, **kwargs: Any) -> Any:
+    """``LinglongStoreClient`` served from a snapshot, without the response cache
+    or request coalescing (lookups are local and cheap).
+
+    ``arch``, ``repo_name`` and ``lang`` default to the snapshot's values.
+    """
+    from linglong_store_api import LinglongStoreClient
+
+    transport = OfflineTransport.open(path)
+    snapshot = transport.snapshot
+    for key, value in (("arch", snapshot.arch), ("repo_name", snapshot.repo_name), ("lang", snapshot.lang)):
+        if kwargs.get(key) is None and value:
+            kwargs[key] = value
+    kwargs = {key: value for key, value in kwargs.items() if value is not None}
+    return LinglongStoreClient(transport=transport, cache=False, singleflight=False, **kwargs)
+
+
+def export_snapshot(
+    client: Any,
+    path: str,
+    records: Iterable[Dict[str, Any]],
+    *,
+    details: bool = True,
+    chunk_size: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Export ``records`` (e.g. ``CatalogSnapshot.records()``) with categories and details.
+
+    With ``details``, each listing record is merged with its
+    ``/app/getAppDetail`` record (screenshots, size, developer...). Apps whose
+    details cannot be fetched keep their listing record.
+    """
+    start = time.perf_counter()
+    listing = list(records)
+    categories = client.get_categories(use_web=False)
+    web_categories: Dict[str, List[Dict[str, Any]]] = {}
+    # Every store language, so category aliases resolve offline too.
+    for lang in dict.fromkeys((client.lang, *ALIAS_LANGS)):
+        try:
+            source = client if lang == client.lang else client.clone(lang=lang)
+            web_categories[lang] = source.get_categories(use_web=True)
+        except RuntimeError:
+            pass
+    detail_errors = 0
+    if details and listing:
+        options: Dict[str, Any] = {}
+        if chunk_size:
+            options["chunk_size"] = chunk_size
+        if max_workers:
+            options["max_workers"] = max_workers
+        merged = {record["appId"]: record for record in listing if record.get("appId")}
+        for app_id, detail, error in client.iter_app_details(list(merged), **options):
+            if detail is not None:
+                merged[app_id] = {**merged[app_id], **detail.raw}
+            elif error is not None:
+                detail_errors += 1
+        listing = list(merged.values())
+    apps = write_snapshot(
+        path,
+        listing,
+        categories=categories,
+        web_categories=web_categories,
+        meta={"repoName": client.repo_name, "arch": client.arch, "lang": client.lang, "source": client.base_url},
+    )
+    return {
+        "path": path,
+        "apps": apps,
+        "categories": len(categories),
+        "webCategories": {lang: len(rows) for lang, rows in web_categories.items()},
+        "detailErrors": detail_errors,
+        "bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
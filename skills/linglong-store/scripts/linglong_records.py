@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Record types for store results.
+
+``AppSummary`` and ``AppDetail`` are slotted, read-only views over the raw
+record dicts of a response: wrapping an item costs one small object, and a
+field is only decoded (``zhName`` before ``name``, the screenshot list, ...)
+when it is read. ``AppBatch`` stores large result lists column by column
+without per-record objects or the raw dicts, for full-catalog workloads.
+``AppVersion`` wraps one entry of an app's version list.
+
+All four are re-exported by ``linglong_store_api``.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from linglong_versions import Version, parse_version
+
+
+class RawField:
+    """Descriptor reading a field from the wrapped record on access.
+
+    With several keys the first truthy value wins (``zhName`` before ``name``);
+    otherwise the last key's value is returned as-is.
+    """
+
+    __slots__ = ("keys", "name")
+
+    def __init__(self, *keys: str) -> None:
+        self.keys = keys
+        self.name = keys[0]
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def decode(self, raw: Dict[str, Any]) -> Any:
+        value = None
+        for key in self.keys:
+            value = raw.get(key)
+            if value:
+                break
+        return value
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        if obj is None:
+            return self
+        return self.decode(obj._raw)
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        raise AttributeError(f"{type(obj).__name__}.{self.name} is read-only")
+
+
+class RawRecord:
+    """Base for slotted record views; ``FIELDS`` drives equality and repr."""
+
+    __slots__ = ("_raw",)
+    FIELDS: Tuple[str, ...] = ()
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        self._raw = raw
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "RawRecord":
+        """Wrap a response record without copying it."""
+        record = cls.__new__(cls)
+        record._raw = raw
+        return record
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """The wrapped response record (shared, do not modify)."""
+        return self._raw
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()  # type: ignore[attr-defined]
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.FIELDS)
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return self._raw
+
+    def __setstate__(self, raw: Dict[str, Any]) -> None:
+        self._raw = raw
+
+    def replace(self, **changes: Any) -> "RawRecord":
+        """Copy with some fields changed; the wrapped record is copied, not modified.
+
+        Views are read-only and not dataclasses, so this stands in for
+        ``dataclasses.replace``. ``replace()`` alone is an independent copy.
+        """
+        raw = dict(self._raw)
+        for name, value in changes.items():
+            self._replace_field(raw, name, value)
+        return type(self).from_raw(raw)
+
+    def _replace_field(self, raw: Dict[str, Any], name: str, value: Any) -> None:
+        descriptor = getattr(type(self), name, None)
+        if not isinstance(descriptor, RawField):
+            raise TypeError(f"{type(self).__name__}.replace() got an unexpected field {name!r}")
+        # Write every source key so a fallback key (``name`` behind ``zhName``)
+        # cannot shadow the new value.
+        for key in descriptor.keys:
+            raw[key] = value
+
+
+class AppSummary(RawRecord):
+    """One search result."""
+
+    __slots__ = ()
+    FIELDS = ("app_id", "name", "version", "arch", "description", "repo_name", "icon")
+
+    app_id = RawField("appId")
+    name = RawField("zhName", "name")
+    version = RawField("version")
+    arch = RawField("arch")
+    description = RawField("description")
+    repo_name = RawField("repoName")
+    icon = RawField("icon")
+
+    def __init__(
+        self,
+        app_id: Optional[str] = None,
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+        arch: Optional[str] = None,
+        description: Optional[str] = None,
+        repo_name: Optional[str] = None,
+        icon: Optional[str] = None,
+    ) -> None:
+        super().__init__({
+            "appId": app_id,
+            "name": name,
+            "version": version,
+            "arch": arch,
+            "description": description,
+            "repoName": repo_name,
+            "icon": icon,
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        """CLI JSON row (see ``summary_to_dict``)."""
+        # Read the raw record directly: this runs once per row on full-catalog
+        # output, where descriptor calls would dominate.
+        get = self._raw.get
+        return {
+            "appId": get("appId"),
+            "name": get("zhName") or get("name"),
+            "version": get("version"),
+            "arch": get("arch"),
+            "description": get("description"),
+            "repoName": get("repoName"),
+        }
+
+
+class AppDetail(RawRecord):
+    """Full app details; the screenshot list is decoded once, on first access."""
+
+    __slots__ = ("_screenshots",)
+    FIELDS = AppSummary.FIELDS + ("screenshots", "size", "developer", "category")
+
+    app_id = AppSummary.app_id
+    name = AppSummary.name
+    version = AppSummary.version
+    arch = AppSummary.arch
+    description = AppSummary.description
+    repo_name = AppSummary.repo_name
+    icon = AppSummary.icon
+    size = RawField("size")
+    developer = RawField("devName")
+    category = RawField("categoryName")
+
+    def __init__(
+        self,
+        app_id: Optional[str] = None,
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+        arch: Optional[str] = None,
+        description: Optional[str] = None,
+        repo_name: Optional[str] = None,
+        icon: Optional[str] = None,
+        screenshots: Optional[List[str]] = None,
+        size: Optional[str] = None,
+        developer: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> None:
+        super().__init__({
+            "appId": app_id,
+            "name": name,
+            "version": version,
+            "arch": arch,
+            "description": description,
+            "repoName": repo_name,
+            "icon": icon,
+            "size": size,
+            "devName": developer,
+            "categoryName": category,
+            "appScreenshotList": [{"screenshotKey": url} for url in screenshots or []],
+        })
+        self._screenshots = None
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "AppDetail":
+        record = cls.__new__(cls)
+        record._raw = raw
+        record._screenshots = None
+        return record
+
+    @property
+    def screenshots(self) -> List[str]:
+        if self._screenshots is None:
+            self._screenshots = [
+                shot["screenshotKey"]
+                for shot in (self._raw.get("appScreenshotList") or [])
+                if shot.get("screenshotKey")
+            ]
+        return self._screenshots
+
+    def __setstate__(self, raw: Dict[str, Any]) -> None:
+        self._raw = raw
+        self._screenshots = None
+
+    def _replace_field(self, raw: Dict[str, Any], name: str, value: Any) -> None:
+        if name == "screenshots":
+            raw["appScreenshotList"] = [{"screenshotKey": url} for url in value or []]
+        else:
+            super()._replace_field(raw, name, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """CLI JSON object (see ``detail_to_dict``)."""
+        return {
+            "appId": self.app_id,
+            "name": self.name,
+            "version": self.version,
+            "arch": self.arch,
+            "description": self.description,
+            "icon": self.icon,
+            "screenshots": self.screenshots,
+            "size": self.size,
+            "developer": self.developer,
+            "category": self.category,
+        }
+
+
+class AppVersion(RawRecord):
+    """One ``/visit/getSearchAppVersionList`` record; ``parsed`` is the ordered version."""
+
+    __slots__ = ()
+    FIELDS = ("app_id", "version", "arch", "module", "channel", "repo_name")
+
+    app_id = AppSummary.app_id
+    version = AppSummary.version
+    arch = AppSummary.arch
+    module = RawField("module")
+    channel = RawField("channel")
+    repo_name = AppSummary.repo_name
+    size = RawField("size")
+
+    def __init__(
+        self,
+        app_id: Optional[str] = None,
+        version: Optional[str] = None,
+        arch: Optional[str] = None,
+        module: Optional[str] = None,
+        channel: Optional[str] = None,
+        repo_name: Optional[str] = None,
+    ) -> None:
+        super().__init__({
+            "appId": app_id,
+            "version": version,
+            "arch": arch,
+            "module": module,
+            "channel": channel,
+            "repoName": repo_name,
+        })
+
+    @property
+    def parsed(self) -> Version:
+        return parse_version(self._raw.get("version") or "")
+
+    def to_dict(self) -> Dict[str, Any]:
+        get = self._raw.get
+        return {name: get(key) for name, key in _VERSION_KEYS}
+
+
+_VERSION_KEYS = (
+    ("appId", "appId"),
+    ("version", "version"),
+    ("arch", "arch"),
+    ("module", "module"),
+    ("channel", "channel"),
+    ("repoName", "repoName"),
+    ("size", "size"),
+)
+
+
+# Column order matches the ``AppSummary`` constructor.
+_BATCH_COLUMNS = AppSummary.FIELDS
+
+
+class AppBatch:
+    """Column-oriented list of app summaries.
+
+    Each field is one list, so a record costs a few list slots instead of an
+    object plus its raw dict. Values are the decoded objects from the
+    response (no string copies). Indexing returns an ``AppSummary``;
+    ``iter_dicts``/``to_json`` produce CLI rows straight from the columns.
+    """
+
+    __slots__ = ("columns",)
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, List[Any]] = {name: [] for name in _BATCH_COLUMNS}
+
+    @classmethod
+    def from_items(cls, items: Iterable[Dict[str, Any]]) -> "AppBatch":
+        batch = cls()
+        batch.extend_raw(items)
+        return batch
+
+    @classmethod
+    def from_summaries(cls, summaries: Iterable[AppSummary]) -> "AppBatch":
+        return cls.from_items(summary.raw for summary in summaries)
+
+    def extend_raw(self, items: Iterable[Dict[str, Any]]) -> None:
+        """Decode raw response records into the columns (same rules as ``AppSummary``)."""
+        columns = self.columns
+        app_id, name, version = columns["app_id"].append, columns["name"].append, columns["version"].append
+        arch, description = columns["arch"].append, columns["description"].append
+        repo_name, icon = columns["repo_name"].append, columns["icon"].append
+        for item in items:
+            get = item.get
+            app_id(get("appId"))
+            name(get("zhName") or get("name"))
+            version(get("version"))
+            arch(get("arch"))
+            description(get("description"))
+            repo_name(get("repoName"))
+            icon(get("icon"))
+
+    def __len__(self) -> int:
+        return len(self.columns["app_id"])
+
+    def row(self, index: int) -> Tuple[Any, ...]:
+        return tuple(self.columns[name][index] for name in _BATCH_COLUMNS)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[AppSummary, "AppBatch"]:
+        if isinstance(index, slice):
+            sliced = AppBatch()
+            for name, column in self.columns.items():
+                sliced.columns[name] = column[index]
+            return sliced
+        return AppSummary(*self.row(index))
+
+    def __iter__(self) -> Iterator[AppSummary]:
+        for values in zip(*(self.columns[name] for name in _BATCH_COLUMNS)):
+            yield AppSummary(*values)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, AppBatch):
+            return NotImplemented
+        return self.columns == other.columns
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"AppBatch({len(self)} apps)"
+
+    def iter_dicts(self) -> Iterator[Dict[str, Any]]:
+        """CLI JSON rows, one short-lived dict per record."""
+        columns = self.columns
+        for app_id, name, version, arch, description, repo_name in zip(
+            columns["app_id"], columns["name"], columns["version"],
+            columns["arch"], columns["description"], columns["repo_name"],
+        ):
+            yield {
+                "appId": app_id,
+                "name": name,
+                "version": version,
+                "arch": arch,
+                "description": description,
+                "repoName": repo_name,
+            }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self.iter_dicts())
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """JSON array of the CLI rows; compact unless ``indent`` is given."""
+        if indent is not None:
+            return json.dumps(self.to_dicts(), ensure_ascii=False, indent=indent)
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        return "[" + ",".join(dumps(row) for row in self.iter_dicts()) + "]"
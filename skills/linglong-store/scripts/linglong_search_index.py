@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local full-text search index over the Linglong store catalog.
+
+The whole catalog for one (repo, arch, lang) is synced into an SQLite FTS5
+index under ``$XDG_CACHE_HOME/linglong-store/index``. Offline keyword searches
+are then answered locally with BM25 ranking and prefix matching over appId,
+name, zhName, description and category.
+
+CJK text is indexed one character per token, so Chinese queries match as
+phrases anywhere in a name ("金山" finds "金山办公"), while Latin words match
+by prefix ("wps" finds "WPS Office" and ``cn.wps.wps-office``).
+
+The catalog itself is downloaded by the incremental sync engine
+(``linglong_catalog_sync``); the index then hashes every record and writes only
+added, changed or removed apps. Category tags are stored with each row, so only
+apps the sync reports as added or changed are tagged again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from linglong_cache import cache_home
+from linglong_catalog_sync import DEFAULT_SYNC_PAGE_SIZE, CatalogSnapshot, CatalogSync
+from linglong_store_api import (
+    DEFAULT_DETAIL_CHUNK_SIZE,
+    DEFAULT_MAX_WORKERS,
+    AppSummary,
+    LinglongStoreClient,
+    extract_app_items,
+    format_app_list,
+)
+
+
+DEFAULT_LIMIT = 20
+# Above this many hits BM25 scoring dominates query time while carrying little
+# signal, so broad queries fall back to catalog (listing) order.
+RANKED_HIT_LIMIT = 1000
+
+# BM25 column weights: app_id, name, zh_name, description, category.
+_BM25_WEIGHTS = (10.0, 8.0, 8.0, 1.0, 2.0)
+_CJK_RE = re.compile(r"([㐀-䶿一-鿿豈-﫿])")
+_TERM_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[^\W_]+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apps (
+    rowid INTEGER PRIMARY KEY,
+    app_id TEXT NOT NULL UNIQUE,
+    hash TEXT NOT NULL,
+    record TEXT NOT NULL,
+    categories TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS apps_fts USING fts5(
+    app_id, name, zh_name, description, category,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def default_index_path(repo_name: str, arch: str, lang: str) -> str:
+    return os.path.join(cache_home(), "index", f"{repo_name}-{arch}-{lang}.sqlite")
+
+
+def _segment(text: Optional[str]) -> str:
+    """Space-separate CJK characters so FTS5 indexes them individually."""
+    if not text:
+        return ""
+    return _CJK_RE.sub(r" \1 ", str(text))
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Translate user input into an FTS5 MATCH expression.
+
+    CJK runs become phrases of single characters; other words become prefix
+    terms. All terms must match.
+    """
+    terms = []
+    for term in _TERM_RE.findall(query):
+        if _CJK_RE.match(term):
+            terms.append('"' + " ".join(term) + '"')
+        else:
+            terms.append('"' + term.replace('"', '""') + '"*')
+    return " AND ".join(terms) or None
+
+
+def record_hash(record: Dict[str, Any]) -> str:
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _category_text(record: Dict[str, Any]) -> str:
+    names = record.get("categoryNames") or []
+    if record.get("categoryName"):
+        names = [record["categoryName"], *names]
+    return " ".join(dict.fromkeys(str(name) for name in names if name))
+
+
+@dataclass
+class SyncResult:
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    total: int = 0
+    seconds: float = 0.0
+    synced_at: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "removed": self.removed,
+            "unchanged": self.unchanged,
+            "total": self.total,
+            "seconds": round(self.seconds, 3),
+            "syncedAt": self.synced_at,
+        }
+
+
+class SearchIndex:
+    """SQLite FTS5 index of one (repo, arch, lang) catalog."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @classmethod
+    def for_client(cls, client: LinglongStoreClient, path: Optional[str] = None) -> "SearchIndex":
+        return cls(path or default_index_path(client.repo_name, client.arch, client.lang))
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.executescript(_SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(apps)")}
+            if "categories" not in columns:
+                # Indexes built before tags were stored: NULL marks rows to tag again.
+                self._conn.execute("ALTER TABLE apps ADD COLUMN categories TEXT")
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # -- metadata ---------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    @property
+    def synced_at(self) -> Optional[float]:
+        value = self.get_meta("synced_at")
+        return float(value) if value else None
+
+    def status(self) -> Dict[str, Any]:
+        synced_at = self.synced_at
+        count = self.conn.execute("SELECT COUNT(*) FROM apps").fetchone()[0]
+        return {
+            "path": self.path,
+            "apps": count,
+            "syncedAt": synced_at,
+            "ageSeconds": round(time.time() - synced_at, 1) if synced_at else None,
+            "source": self.get_meta("source"),
+        }
+
+    # -- writes -----------------------------------------------------------
+
+    def apply(self, records: Iterable[Dict[str, Any]], *, source: str = "") -> SyncResult:
+        """Replace the indexed catalog with ``records``, writing only the delta."""
+        start = time.perf_counter()
+        result = SyncResult()
+        conn = self.conn
+        existing: Dict[str, Tuple[int, str, bool]] = {
+            app_id: (rowid, digest, tagged is not None)
+            for rowid, app_id, digest, tagged in conn.execute("SELECT rowid, app_id, hash, categories FROM apps")
+        }
+        seen = set()
+        with conn:
+            for record in records:
+                app_id = record.get("appId")
+                if not app_id or app_id in seen:
+                    continue
+                seen.add(app_id)
+                result.total += 1
+                digest = record_hash(record)
+                categories = json.dumps(record.get("categoryNames") or [], ensure_ascii=False)
+                current = existing.get(app_id)
+                if current is not None and current[1] == digest:
+                    if not current[2]:
+                        conn.execute("UPDATE apps SET categories = ? WHERE rowid = ?", (categories, current[0]))
+                    result.unchanged += 1
+                    continue
+                payload = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+                if current is None:
+                    rowid = conn.execute(
+                        "INSERT INTO apps (app_id, hash, record, categories) VALUES (?, ?, ?, ?)",
+                        (app_id, digest, payload, categories),
+                    ).lastrowid
+                    result.added += 1
+                else:
+                    rowid = current[0]
+                    conn.execute(
+                        "UPDATE apps SET hash = ?, record = ?, categories = ? WHERE rowid = ?",
+                        (digest, payload, categories, rowid),
+                    )
+                    conn.execute("DELETE FROM apps_fts WHERE rowid = ?", (rowid,))
+                    result.updated += 1
+                conn.execute(
+                    "INSERT INTO apps_fts (rowid, app_id, name, zh_name, description, category) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        rowid,
+                        app_id,
+                        _segment(record.get("name")),
+                        _segment(record.get("zhName")),
+                        _segment(record.get("description")),
+                        _segment(_category_text(record)),
+                    ),
+                )
+            for app_id, (rowid, _, _) in existing.items():
+                if app_id not in seen:
+                    conn.execute("DELETE FROM apps WHERE rowid = ?", (rowid,))
+                    conn.execute("DELETE FROM apps_fts WHERE rowid = ?", (rowid,))
+                    result.removed += 1
+            result.synced_at = time.time()
+            self._set_meta("synced_at", result.synced_at)
+            if source:
+                self._set_meta("source", source)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def sync(
+        self,
+        client: LinglongStoreClient,
+        *,
+        snapshot: Optional[CatalogSnapshot] = None,
+        page_size: int = DEFAULT_SYNC_PAGE_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> SyncResult:
+        """Sync the catalog snapshot through ``client`` and apply it to the index.
+
+        Records without a ``categoryName`` reuse the tags stored in the index;
+        only apps the sync reports as added or changed, and apps never tagged,
+        are passed to ``tag_categories``.
+        """
+        start = time.perf_counter()
+        owned = snapshot is None
+        snapshot = snapshot or CatalogSnapshot.for_client(client)
+        try:
+            delta = CatalogSync(client, snapshot).run(page_size=page_size, max_workers=max_workers)
+            records = list(snapshot.records())
+        finally:
+            if owned:
+                snapshot.close()
+        fresh = set(delta.added) | set(delta.changed)
+        stored = self.stored_categories()
+        untagged = []
+        for record in records:
+            if record.get("categoryName"):
+                continue
+            app_id = record.get("appId")
+            tags = stored.get(app_id)
+            if app_id in fresh or tags is None:
+                untagged.append(record)
+            else:
+                record["categoryNames"] = list(tags)
+        tag_categories(client, untagged, page_size=page_size, max_workers=max_workers)
+        result = self.apply(records, source=client.base_url)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def stored_categories(self) -> Dict[str, Optional[List[str]]]:
+        """``app_id -> categoryNames`` as indexed; ``None`` for rows never tagged."""
+        return {
+            app_id: json.loads(tags) if tags is not None else None
+            for app_id, tags in self.conn.execute("SELECT app_id, categories FROM apps")
+        }
+
+    # -- queries ----------------------------------------------------------
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        *,
+        category: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> List[AppSummary]:
+        """Ranked local search. Without ``query``, lists apps in ``category``."""
+        return format_app_list(self.search_records(query, category=category, limit=limit))
+
+    def search_records(
+        self,
+        query: Optional[str] = None,
+        *,
+        category: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> List[Dict[str, Any]]:
+        match = build_match_query(query) if query else None
+        category_match = build_match_query(category) if category else None
+        if match and category_match:
+            match = f"({match}) AND category : ({category_match})"
+        elif category_match:
+            match = f"category : ({category_match})"
+        if not match:
+            return []
+
+        # Rank inside FTS first and join only the top rows; an exact appId hit
+        # is looked up separately and always listed first.
+        limit = max(1, limit)
+        conn = self.conn
+        exact = None
+        if query and not category:
+            exact = conn.execute("SELECT rowid, record FROM apps WHERE app_id = ?", (query.strip(),)).fetchone()
+        weights = ", ".join(str(w) for w in _BM25_WEIGHTS)
+        score = f"bm25(apps_fts, {weights})"
+        sql = (
+            "SELECT apps.rowid, apps.record FROM ("
+            "SELECT rowid, {score} AS score FROM apps_fts WHERE apps_fts MATCH ? "
+            "ORDER BY score LIMIT ?"
+            ") AS hits JOIN apps ON apps.rowid = hits.rowid ORDER BY hits.score"
+        )
+        try:
+            hits = conn.execute(
+                "SELECT COUNT(*) FROM (SELECT rowid FROM apps_fts WHERE apps_fts MATCH ? LIMIT ?)",
+                (match, RANKED_HIT_LIMIT + 1),
+            ).fetchone()[0]
+            if hits > RANKED_HIT_LIMIT:
+                score = "rowid"
+            rows = conn.execute(sql.format(score=score), (match, limit + 1)).fetchall()
+        except sqlite3.OperationalError as exc:
+            raise RuntimeError(f"invalid search query: {query}") from exc
+        if exact is not None:
+            rows = [exact] + [row for row in rows if row[0] != exact[0]]
+        return [json.loads(record) for _, record in rows[:limit]]
+
+
+def tag_categories(
+    client: LinglongStoreClient,
+    records: List[Dict[str, Any]],
+    *,
+    page_size: int = DEFAULT_SYNC_PAGE_SIZE,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> None:
+    """Attach ``categoryNames`` to records that carry no ``categoryName``.
+
+    Category words stay searchable offline. A few records are looked up with
+    batched detail requests; when that would take more requests than there are
+    categories, each category's listing is walked instead, which also catches
+    apps listed under several categories. Nothing is fetched when every record
+    already names its category.
+    """
+    by_id = {record.get("appId"): record for record in records if not record.get("categoryName")}
+    if not by_id:
+        return
+    for record in by_id.values():
+        record["categoryNames"] = []
+    categories = client.get_categories()
+    if -(-len(by_id) // DEFAULT_DETAIL_CHUNK_SIZE) < len(categories):
+        details = client.get_app_details(by_id, max_workers=max_workers)
+        for app_id, detail in details.items():
+            if detail.category:
+                by_id[app_id]["categoryNames"].append(detail.category)
+        return
+    for category in categories:
+        category_id = category.get("categoryId")
+        category_name = category.get("categoryName")
+        if not category_id or not category_name:
+            continue
+        pages = client.iter_search_pages(category_id=category_id, page_size=page_size, max_workers=max_workers)
+        for _, response in pages:
+            for item in extract_app_items(response):
+                record = by_id.get(item.get("appId"))
+                if record is not None:
+                    record["categoryNames"].append(category_name)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request coalescing ("single-flight") for the Linglong store client.
+
+When several threads issue the same request while one is already in flight,
+only the first (the leader) goes upstream; the others wait for it and get
+the decoded result (or its exception). Each caller receives its own deep
+copy whenever the result was shared, so one step mutating a response cannot
+affect another.
+
+With a lock directory, identical requests are also coalesced across
+processes: the leader holds an ``flock`` on ``<key>.lock`` while it fetches
+and leaves the JSON result in ``<key>.json``; a process that had to wait for
+the lock reuses that result if it is younger than ``share_window`` seconds
+instead of fetching again. Leaders sweep the directory at most once per
+``SWEEP_INTERVAL``, deleting results past the share window and lock files
+nobody holds, so it does not grow with every distinct request.
+``$LINGLONG_STORE_SINGLEFLIGHT`` selects the process-wide mode: ``process``
+(default), ``shared`` or ``off``.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: cross-process coalescing is unavailable
+    fcntl = None  # type: ignore[assignment]
+
+from linglong_cache import cache_home
+
+
+SINGLEFLIGHT_ENV = "LINGLONG_STORE_SINGLEFLIGHT"
+SINGLEFLIGHT_MODES = ("process", "shared", "off")
+DEFAULT_SHARE_WINDOW = 2.0
+# How often a leader sweeps the lock directory, and the minimum age of the
+# files it deletes.
+SWEEP_INTERVAL = 60.0
+
+T = TypeVar("T")
+_MISSING = object()
+
+
+def default_lock_dir() -> str:
+    return os.path.join(cache_home(), "inflight")
+
+
+class _Call:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key.
+
+    Args:
+        directory: lock directory for cross-process coalescing; ``None``
+            coalesces within this process only.
+        share_window: how long (seconds) a result left by another process
+            may be reused by a process that waited for it.
+    """
+
+    def __init__(self, directory: Optional[str] = None, share_window: float = DEFAULT_SHARE_WINDOW) -> None:
+        self.directory = directory if fcntl is not None else None
+        self.share_window = share_window
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats = {"calls": 0, "leaders": 0, "coalesced": 0, "shared": 0, "errors": 0}
+        self._next_sweep = 0.0
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Stable key from request parts (``bytes`` are hashed as-is)."""
+        digest = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part, bytes):
+                part = repr(part).encode("utf-8")
+            digest.update(part)
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run ``fn`` unless a call with ``key`` is in flight; then share its outcome."""
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+        if not leader:
+            # The stored result is never handed out, so copying it is safe
+            # while the leader's caller works on its own copy.
+            return copy.deepcopy(call.future.result())
+
+        try:
+            result = self._run(key, fn)
+        except BaseException as exc:
+            with self._lock:
+                del self._calls[key]
+                self._stats["leaders"] += 1
+                self._stats["errors"] += 1
+            call.future.set_exception(exc)
+            raise
+        with self._lock:
+            # Nobody can join once the key is removed, so ``waiters`` is final.
+            del self._calls[key]
+            self._stats["leaders"] += 1
+            waiters = call.waiters
+        call.future.set_result(result)
+        return copy.deepcopy(result) if waiters else result
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        assert self.directory is not None
+        return os.path.join(self.directory, f"{key}.lock"), os.path.join(self.directory, f"{key}.json")
+
+    def _run(self, key: str, fn: Callable[[], T]) -> T:
+        if self.directory is None:
+            return fn()
+        lock_path, result_path = self._paths(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            # Coalescing is an optimization; fall back to a plain call.
+            return fn()
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is fetching the same thing: wait, then reuse.
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                shared = self._read_result(result_path)
+                if shared is not _MISSING:
+                    with self._lock:
+                        self._stats["shared"] += 1
+                    return shared
+            result = fn()
+            self._write_result(result_path, result)
+        finally:
+            os.close(fd)
+        self._maybe_sweep()
+        return result
+
+    def _maybe_sweep(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + SWEEP_INTERVAL
+        self.sweep()
+
+    def sweep(self, max_age: Optional[float] = None) -> int:
+        """Delete lock-directory files older than ``max_age``; returns how many.
+
+        Results are only reused within ``share_window``, so older ones are
+        dead. A lock file is deleted only while this process holds it, so a
+        current leader keeps its lock; a process that opened it just before
+        the delete at worst fetches once more instead of sharing.
+        """
+        if self.directory is None:
+            return 0
+        if max_age is None:
+            max_age = max(self.share_window, SWEEP_INTERVAL)
+        cutoff = time.time() - max_age
+        removed = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime >= cutoff:
+                    continue
+                if not entry.name.endswith(".lock"):
+                    os.unlink(entry.path)
+                    removed += 1
+                    continue
+                fd = os.open(entry.path, os.O_RDWR)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    os.unlink(entry.path)
+                    removed += 1
+                finally:
+                    os.close(fd)
+            except OSError:
+                # Held by a leader, or already deleted by another sweeper.
+                continue
+        return removed
+
+    def _read_result(self, path: str) -> Any:
+        try:
+            with open(path, "rb") as f:
+                stored = json.loads(f.read())
+            if time.time() - stored["storedAt"] > self.share_window:
+                return _MISSING
+            return stored["result"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return _MISSING
+
+    def _write_result(self, path: str, result: Any) -> None:
+        try:
+            data = json.dumps({"storedAt": time.time(), "result": result}, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters since creation (or ``reset_stats``).
+
+        ``calls`` = ``leaders`` + ``coalesced``; ``leaders`` ran the request
+        (``shared`` of them reused another process's result instead of going
+        upstream) and ``errors`` counts leaders that raised.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["inFlight"] = len(self._calls)
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+_default_lock = threading.Lock()
+_default_flights: Dict[str, Optional[SingleFlight]] = {}
+
+
+def get_singleflight(mode: Optional[str] = None) -> Optional[SingleFlight]:
+    """Return the process-wide coalescer for ``mode`` (``None`` for ``off``).
+
+    Without a mode, ``$LINGLONG_STORE_SINGLEFLIGHT`` selects it and
+    ``process`` is the default.
+    """
+    mode = (mode or os.environ.get(SINGLEFLIGHT_ENV) or "process").lower()
+    if mode not in SINGLEFLIGHT_MODES:
+        raise ValueError(f"unknown single-flight mode: {mode} (choose from {', '.join(SINGLEFLIGHT_MODES)})")
+    with _default_lock:
+        if mode not in _default_flights:
+            if mode == "off":
+                _default_flights[mode] = None
+            else:
+                _default_flights[mode] = SingleFlight(default_lock_dir() if mode == "shared" else None)
+        return _default_flights[mode]
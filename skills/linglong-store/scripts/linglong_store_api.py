@@ -3,68 +3,140 @@
 """
 Linglong store API helper (Python).
 
-Provides a small Python wrapper around the store HTTP endpoints, using curl to
-keep runtime dependencies at zero.
+Provides a small Python wrapper around the store HTTP endpoints. Requests go
+through a pluggable transport (see ``linglong_transport``): pooled keep-alive
+``http.client`` connections by default, with ``curl`` as a fallback, so runtime
+dependencies stay at zero.
 """
 
 from __future__ import annotations
 
+import sys
+
+if __name__ == "__main__":
+    # 常驻进程（linglong_daemon）在运行时直接转发，跳过下面的导入与冷启动
+    from linglong_daemon import forward
+
+    forward("store_api")
+
+import copy
 import json
-import subprocess
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from typing import IO, Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import urlencode
+
+from linglong_cache import ResponseCache, get_cache
+from linglong_category_index import CategoryIndex
+from linglong_metrics import StoreMetrics, add_stats_arguments, metrics_from_args, report_metrics
+from linglong_records import AppBatch, AppDetail, AppSummary, AppVersion
+from linglong_singleflight import SingleFlight, get_singleflight
+from linglong_transport import (
+    TRANSPORT_NAMES,
+    TransportError,
+    TransportResponse,
+    decode_json,
+    get_transport,
+)
 
 
 BASE_URL = "https://storeapi.linyaps.org.cn"
+BASE_URL_ENV = "LINGLONG_STORE_BASE_URL"
 DEFAULT_ARCH = "x86_64"
 DEFAULT_LANG = "zh"
 DEFAULT_REPO = "stable"
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_DETAIL_CHUNK_SIZE = 20
+DEFAULT_UPDATE_CHUNK_SIZE = 50
+DEFAULT_VERSION_PAGE_SIZE = 100
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_COUNT_TIMEOUT = 5.0
+
+T = TypeVar("T")
+
+
+class StoreRejectedError(TransportError):
+    """The store answered, but its envelope ``code`` is not 200 (retrying will not help)."""
+
+    def __init__(self, message: str, *, code: Any, url: Optional[str] = None) -> None:
+        super().__init__(message, url=url)
+        self.code = code
+
+
+class AppDetailBatch(Dict[str, AppDetail]):
+    """``get_app_details`` result: ``app_id -> AppDetail`` in request order.
+
+    Apps that could not be resolved are reported per app instead of failing
+    the batch: ``missing`` lists ids absent from the response and ``errors``
+    maps ids whose chunk request failed to the error message.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.missing: List[str] = []
+        self.errors: Dict[str, str] = {}
 
 
 @dataclass
-class AppSummary:
-    app_id: Optional[str]
-    name: Optional[str]
-    version: Optional[str]
-    arch: Optional[str]
-    description: Optional[str]
-    repo_name: Optional[str]
-    icon: Optional[str] = None
+class CategoryCount:
+    category_id: str
+    category_name: Optional[str]
+    count: Optional[int]
+    source: str
+    error: Optional[str] = None
 
 
 @dataclass
-class AppDetail:
-    app_id: Optional[str]
-    name: Optional[str]
-    version: Optional[str]
-    arch: Optional[str]
-    description: Optional[str]
-    repo_name: Optional[str]
-    icon: Optional[str] = None
-    screenshots: List[str] = None
-    size: Optional[str] = None
-    developer: Optional[str] = None
-    category: Optional[str] = None
-
-    def __post_init__(self):
-        if self.screenshots is None:
-            self.screenshots = []
-
-
-def _run_curl(args: List[str], data: Optional[str] = None) -> Dict[str, Any]:
-    cmd = ["curl", "-sS"] + args
-    if data is not None:
-        cmd.extend(["-H", "Content-Type: application/json", "-d", data])
-    result = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8")
-    if result.returncode != 0:
-        raise RuntimeError(result.stderr.strip() or "curl failed")
+class FailedChunk:
+    index: int
+    apps: List[Dict[str, Any]]
+    error: str
+    attempts: int
+
+
+class UpdateCheckBatch(List[Dict[str, Any]]):
+    """``check_updates_batch`` result: the merged ``data`` of all chunks.
+
+    Chunks that still failed after all retries are listed in ``failed`` so
+    callers can report partial results instead of discarding the whole check.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.chunks = 0
+        self.failed: List[FailedChunk] = []
+
+    @property
+    def complete(self) -> bool:
+        return not self.failed
+
+    def unchecked(self) -> List[Dict[str, Any]]:
+        return [app for chunk in self.failed for app in chunk.apps]
+
+
+def parse_json_object(body: bytes) -> Dict[str, Any]:
+    data = decode_json(body)
+    if not isinstance(data, dict):
+        raise TransportError("unexpected response: expected a JSON object")
+    return data
+
+
+def parse_category_count(body: bytes) -> int:
+    raw = body.strip()
+    if raw.isdigit():
+        return int(raw)
     try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError as exc:
-        raise RuntimeError("failed to parse response as JSON") from exc
+        data = decode_json(raw)
+        return int(data.get("data", 0) or 0)
+    except (TransportError, AttributeError, TypeError, ValueError) as exc:
+        raise TransportError("failed to parse category count response") from exc
 
 
-def _extract_app_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+def extract_app_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
     data = response.get("data") or {}
     if isinstance(data, dict):
         if "list" in data and isinstance(data.get("list"), list):
@@ -76,83 +148,313 @@ def _extract_app_items(response: Dict[str, Any]) -> List[Dict[str, Any]]:
     return []
 
 
-def _format_app_list(items: Iterable[Dict[str, Any]]) -> List[AppSummary]:
-    rows: List[AppSummary] = []
-    for item in items:
-        rows.append(
-            AppSummary(
-                app_id=item.get("appId"),
-                name=item.get("zhName") or item.get("name"),
-                version=item.get("version"),
-                arch=item.get("arch"),
-                description=item.get("description"),
-                repo_name=item.get("repoName"),
-                icon=item.get("icon"),
-            )
-        )
-    return rows
-
-
-def summaries_to_dicts(items: Iterable[AppSummary]) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
-    for item in items:
-        rows.append(
-            {
-                "appId": item.app_id,
-                "name": item.name,
-                "version": item.version,
-                "arch": item.arch,
-                "description": item.description,
-                "repoName": item.repo_name,
-            }
-        )
-    return rows
+def extract_total(response: Dict[str, Any]) -> Optional[int]:
+    data = response.get("data")
+    if not isinstance(data, dict):
+        return None
+    try:
+        return int(data["total"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def format_app_list(items: Iterable[Dict[str, Any]]) -> List[AppSummary]:
+    """Wrap response records as lazy ``AppSummary`` views (no field copies)."""
+    from_raw = AppSummary.from_raw
+    return [from_raw(item) for item in items]
+
+
+def parse_app_detail(app: Dict[str, Any]) -> AppDetail:
+    return AppDetail.from_raw(app)
+
+
+def detail_to_dict(detail: AppDetail) -> Dict[str, Any]:
+    return detail.to_dict()
+
+
+def match_category_id(categories: Iterable[Dict[str, Any]], category_name: str) -> Optional[str]:
+    """Resolve a name against one category listing (see ``CategoryIndex.resolve``)."""
+    return CategoryIndex.from_listings(categories).resolve(category_name)
+
+
+def summary_to_dict(item: AppSummary) -> Dict[str, Any]:
+    return item.to_dict()
+
+
+def summaries_to_dicts(items: Iterable[AppSummary] | AppBatch) -> List[Dict[str, Any]]:
+    if isinstance(items, AppBatch):
+        return items.to_dicts()
+    return [item.to_dict() for item in items]
+
+
+def write_ndjson(records: Iterable[Any], stream: Optional[IO[str]] = None) -> int:
+    """Write each record as one compact JSON line, as soon as it is produced.
+
+    ``records`` may be a generator over paginated or batched fetches; every
+    line is flushed so consumers can start before the last page arrives.
+    Returns the number of lines written.
+    """
+    stream = stream or sys.stdout
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        stream.write("\n")
+        stream.flush()
+        count += 1
+    return count
 
 
 class LinglongStoreClient:
     def __init__(
         self,
-        base_url: str = BASE_URL,
+        base_url: Optional[str] = None,
         arch: str = DEFAULT_ARCH,
         lang: str = DEFAULT_LANG,
         repo_name: str = DEFAULT_REPO,
+        transport: Any = None,
+        cache: ResponseCache | bool | None = None,
+        refresh: bool = False,
+        singleflight: SingleFlight | str | bool | None = None,
+        metrics: Optional[StoreMetrics] = None,
     ) -> None:
-        self.base_url = base_url.rstrip("/")
+        """
+        Args:
+            base_url: store API root; ``None`` reads ``$LINGLONG_STORE_BASE_URL``
+                (e.g. a local stand-in server) and falls back to ``BASE_URL``.
+            transport: ``"http"``/``"curl"`` or a transport object; ``None``
+                uses the process-wide default (see ``get_transport``).
+            cache: a ``ResponseCache``; ``None`` uses the shared on-disk cache
+                and ``False`` disables caching.
+            refresh: ignore fresh cache entries and revalidate with the server.
+            singleflight: a ``SingleFlight`` or mode name (``"process"``,
+                ``"shared"``, ``"off"``); ``None`` uses the process-wide
+                default (see ``get_singleflight``) and ``False`` disables
+                request coalescing.
+            metrics: a ``StoreMetrics`` recording every call (see
+                ``linglong_metrics``); ``None`` records nothing.
+        """
+        self.base_url = (base_url or os.environ.get(BASE_URL_ENV) or BASE_URL).rstrip("/")
         self.arch = arch
         self.lang = lang
         self.repo_name = repo_name
+        if transport is None or isinstance(transport, str):
+            transport = get_transport(transport)
+        self.transport = transport
+        if cache is None or cache is True:
+            cache = get_cache()
+        self.cache: Optional[ResponseCache] = cache or None
+        self.refresh = refresh
+        if singleflight is None or singleflight is True or isinstance(singleflight, str):
+            singleflight = get_singleflight(singleflight if isinstance(singleflight, str) else None)
+        self.singleflight: Optional[SingleFlight] = singleflight or None
+        self.metrics = metrics
+
+    def clone(self, **changes: Any) -> "LinglongStoreClient":
+        """Shallow copy sharing the transport, with attributes overridden.
+
+        e.g. ``client.clone(cache=None)`` for an uncached view of the client.
+        """
+        other = copy.copy(self)
+        for name, value in changes.items():
+            setattr(other, name, value)
+        return other
+
+    def _build_request(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]],
+        payload: Any,
+    ) -> Tuple[str, Optional[bytes]]:
+        url = f"{self.base_url}{path}"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        body = None
+        if payload is not None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return url, body
+
+    def _fetch(
+        self,
+        method: str,
+        path: str,
+        parse: Callable[[bytes], T],
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Any = None,
+        timeout: Optional[float] = None,
+        coalesce: bool = True,
+    ) -> T:
+        """Send a request through the response cache and parse the body.
+
+        Only bodies that parse successfully (and whose envelope ``code`` is
+        absent or 200) are stored, so transient server errors are never cached.
+        ``timeout`` overrides the transport's default for this request.
+        Identical calls already in flight are coalesced (see ``singleflight``)
+        unless ``coalesce`` is false, as for requests with side effects; every
+        call is recorded in ``metrics`` when one is attached.
+        """
+        url, body = self._build_request(path, params, payload)
+        call = self.metrics.start(method, path) if self.metrics is not None else None
+        try:
+            if self.singleflight is None or not coalesce:
+                result = self._fetch_once(method, path, url, body, parse, timeout, call)
+            else:
+                key = SingleFlight.key(
+                    method, url, body, f"{parse.__module__}.{parse.__qualname__}", self.cache is not None, self.refresh
+                )
+                # Only the leader runs this, so coalesced calls keep ``cache`` unset.
+                result = self.singleflight.do(
+                    key, lambda: self._fetch_once(method, path, url, body, parse, timeout, call)
+                )
+        except Exception as exc:
+            if call is not None:
+                self.metrics.finish(call, exc)
+            raise
+        if call is not None:
+            self.metrics.finish(call)
+        return result
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        call: Optional[Dict[str, Any]],
+    ) -> TransportResponse:
+        if call is None:
+            return self.transport.request(method, url, body=body, headers=headers, timeout=timeout)
+        try:
+            response = self.transport.request(method, url, body=body, headers=headers, timeout=timeout)
+        except TransportError as exc:
+            call["status"] = exc.status
+            call["timing"] = exc.timing
+            raise
+        call["status"] = response.status
+        call["timing"] = response.timing
+        return response
+
+    def _fetch_once(
+        self,
+        method: str,
+        path: str,
+        url: str,
+        body: Optional[bytes],
+        parse: Callable[[bytes], T],
+        timeout: Optional[float],
+        call: Optional[Dict[str, Any]] = None,
+    ) -> T:
+        ttl = self.cache.ttl_for(path) if self.cache is not None else None
+        if ttl is None:
+            if call is not None:
+                call["cache"] = "off"
+            return parse(self._send(method, url, body, None, timeout, call).body)
+
+        key = self.cache.key(method, url, body)
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh and not self.refresh:
+            if call is not None:
+                call["cache"] = "hit"
+            return parse(entry.body)
+        headers = entry.validators() if entry is not None else None
+        if call is not None:
+            call["cache"] = "miss"
+        response = self._send(method, url, body, headers, timeout, call)
+        if response.status == 304 and entry is not None:
+            if call is not None:
+                call["cache"] = "revalidated"
+            self.cache.revalidated(key, entry, response, ttl)
+            return parse(entry.body)
+        result = parse(response.body)
+        if response.status == 200 and (not isinstance(result, dict) or result.get("code") in (None, 200)):
+            self.cache.put(key, response, ttl)
+        return result
+
+    def _request_json(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Any = None,
+        coalesce: bool = True,
+    ) -> Dict[str, Any]:
+        return self._fetch(method, path, parse_json_object, params=params, payload=payload, coalesce=coalesce)
 
     def get_categories(self, use_web: bool = False) -> List[Dict[str, Any]]:
         if use_web:
-            url = f"{self.base_url}/web/categories?lang={self.lang}&arch={self.arch}"
-            data = _run_curl(["-X", "GET", url])
+            data = self._request_json("GET", "/web/categories", params={"lang": self.lang, "arch": self.arch})
             return data.get("data", []) or []
-        url = f"{self.base_url}/visit/getDisCategoryList"
-        data = _run_curl(["-X", "GET", url])
+        data = self._request_json("GET", "/visit/getDisCategoryList")
         return data.get("data", []) or []
 
-    def get_category_app_count(self, category_id: str) -> int:
-        url = f"{self.base_url}/web/getCategoryAppCount?categoryId={category_id}"
-        result = subprocess.run(
-            ["curl", "-sS", "-X", "GET", url],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
+    def get_category_app_count(self, category_id: str, timeout: Optional[float] = None) -> int:
+        return self._fetch(
+            "GET",
+            "/web/getCategoryAppCount",
+            parse_category_count,
+            params={"categoryId": category_id},
+            timeout=timeout,
         )
-        if result.returncode != 0:
-            raise RuntimeError(result.stderr.strip() or "curl failed")
-        try:
-            data = json.loads(result.stdout)
-            return int(data.get("data", 0) or 0)
-        except json.JSONDecodeError:
-            raw = result.stdout.strip()
-            if raw.isdigit():
-                return int(raw)
-            raise RuntimeError("failed to parse category count response")
+
+    def get_category_app_counts(
+        self,
+        categories: Optional[List[Dict[str, Any]]] = None,
+        *,
+        use_web: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_COUNT_TIMEOUT,
+    ) -> List[CategoryCount]:
+        """Live app counts for every category, fetched concurrently.
+
+        ``categories`` defaults to ``get_categories(use_web)``. Each count is a
+        separate ``/web/getCategoryAppCount`` call bounded by ``timeout``
+        seconds (and cached like single counts). When a call fails, the count
+        embedded in the category listing is used instead and the error is
+        kept on the result.
+        """
+        return list(self.iter_category_app_counts(
+            categories, use_web=use_web, max_workers=max_workers, timeout=timeout
+        ))
+
+    def iter_category_app_counts(
+        self,
+        categories: Optional[List[Dict[str, Any]]] = None,
+        *,
+        use_web: bool = False,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_COUNT_TIMEOUT,
+    ) -> Iterator[CategoryCount]:
+        """Like ``get_category_app_counts``, yielding each count in listing order as it arrives."""
+        if categories is None:
+            categories = self.get_categories(use_web=use_web)
+        rows = [c for c in categories if c.get("categoryId") is not None]
+
+        def fetch(category: Dict[str, Any]) -> CategoryCount:
+            listed = category.get("categoryCount")
+            if listed is None:
+                listed = category.get("count")
+            result = CategoryCount(
+                category_id=str(category.get("categoryId")),
+                category_name=category.get("categoryName"),
+                count=listed,
+                source="listing",
+            )
+            try:
+                result.count = self.get_category_app_count(result.category_id, timeout=timeout)
+                result.source = "live"
+            except RuntimeError as exc:
+                result.error = str(exc)
+            return result
+
+        if not rows:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(rows)))) as pool:
+            yield from pool.map(fetch, rows)
 
     def search_apps(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        url = f"{self.base_url}/visit/getSearchAppList"
-        return _run_curl(["-X", "POST", url], data=json.dumps(payload, ensure_ascii=False))
+        return self._request_json("POST", "/visit/getSearchAppList", payload=payload)
 
     def build_search_payload(
         self,
@@ -201,18 +503,11 @@ class LinglongStoreClient:
             return category_id
         if not category_name:
             return None
-        categories = self.get_categories(use_web=use_web_categories)
-        matches = [
-            c
-            for c in categories
-            if str(c.get("categoryName", "")).lower() == category_name.lower()
-        ]
-        if len(matches) == 1:
-            return matches[0].get("categoryId")
-        if not matches:
-            raise RuntimeError(f"category name not found: {category_name}")
-        names = ", ".join(str(c.get("categoryName")) for c in matches)
-        raise RuntimeError(f"category name ambiguous, matches: {names}")
+        return self.category_index(use_web_categories).resolve(category_name)
+
+    def category_index(self, use_web: bool = False) -> CategoryIndex:
+        """Name index of the categories, persisted per (endpoint, arch, lang)."""
+        return CategoryIndex.for_client(self, use_web)
 
     def search_apps_simple(
         self,
@@ -249,14 +544,109 @@ class LinglongStoreClient:
         data = self.search_apps(payload)
         if raw:
             return data
-        items = _extract_app_items(data)
-        return _format_app_list(items)
+        items = extract_app_items(data)
+        return format_app_list(items)
+
+    def iter_search_pages(
+        self,
+        *,
+        name: Optional[str] = None,
+        zh_name: Optional[str] = None,
+        category_id: Optional[str] = None,
+        category_name: Optional[str] = None,
+        use_web_categories: bool = False,
+        page_size: int = 20,
+        module: Optional[str] = None,
+        version: Optional[str] = None,
+        sort: Optional[str] = None,
+        order: Optional[str] = None,
+        start_page: int = 1,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield ``(page_no, response)`` for every result page, in page order.
+
+        The first page is fetched alone to read ``data.total``; the remaining
+        pages are fetched concurrently by at most ``max_workers`` threads and
+        yielded as soon as each page (and all pages before it) has arrived.
+        Without a usable total, pages are fetched one by one until a short
+        page is returned.
+        """
+        resolved_category_id = self.resolve_category_id(
+            category_id=category_id,
+            category_name=category_name,
+            use_web_categories=use_web_categories,
+        )
+
+        def fetch(page_no: int) -> Dict[str, Any]:
+            payload = self.build_search_payload(
+                page_no=page_no,
+                page_size=page_size,
+                name=name,
+                zh_name=zh_name,
+                category_id=resolved_category_id,
+                module=module,
+                version=version,
+                sort=sort,
+                order=order,
+            )
+            return self.search_apps(payload)
+
+        first = fetch(start_page)
+        yield start_page, first
+        total = extract_total(first)
+        if total is None:
+            page_no, response = start_page, first
+            while len(extract_app_items(response)) >= page_size:
+                page_no += 1
+                response = fetch(page_no)
+                yield page_no, response
+            return
+
+        last_page = (total + page_size - 1) // page_size
+        pages = iter(range(start_page + 1, last_page + 1))
+        pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        in_flight: Deque[Tuple[int, Future]] = deque()
+        try:
+            # Keep a bounded window of requests ahead of the consumer, so a
+            # caller that stops early does not download the whole catalog.
+            for page_no in pages:
+                in_flight.append((page_no, pool.submit(fetch, page_no)))
+                if len(in_flight) >= max_workers * 2:
+                    break
+            while in_flight:
+                page_no, future = in_flight.popleft()
+                response = future.result()
+                next_page = next(pages, None)
+                if next_page is not None:
+                    in_flight.append((next_page, pool.submit(fetch, next_page)))
+                yield page_no, response
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def iter_search_apps(self, **kwargs: Any) -> Iterator[AppSummary]:
+        """Yield ``AppSummary`` for every matching app across all pages.
+
+        Accepts the same keyword arguments as ``iter_search_pages``.
+        """
+        for _, response in self.iter_search_pages(**kwargs):
+            yield from format_app_list(extract_app_items(response))
+
+    def search_all_apps(self, **kwargs: Any) -> AppBatch:
+        """Every matching app across all pages, as a columnar ``AppBatch``.
+
+        Accepts the same keyword arguments as ``iter_search_pages``. Each page
+        is decoded into the columns and then dropped, so large results keep
+        no per-record objects or response dicts alive.
+        """
+        batch = AppBatch()
+        for _, response in self.iter_search_pages(**kwargs):
+            batch.extend_raw(extract_app_items(response))
+        return batch
 
     def get_app_detail(self, app_id: str, raw: bool = False) -> AppDetail | Dict[str, Any]:
         """获取应用详情，包括截图列表"""
-        url = f"{self.base_url}/app/getAppDetail"
         payload = [{"appId": app_id, "arch": self.arch}]
-        response = _run_curl(["-X", "POST", url], data=json.dumps(payload, ensure_ascii=False))
+        response = self._request_json("POST", "/app/getAppDetail", payload=payload)
         if raw:
             return response
         
@@ -264,26 +654,197 @@ class LinglongStoreClient:
         app_list = data.get(app_id, [])
         if not app_list:
             raise RuntimeError(f"未找到应用: {app_id}")
-        
-        app = app_list[0]
-        screenshots = []
-        for shot in (app.get("appScreenshotList") or []):
-            if shot.get("screenshotKey"):
-                screenshots.append(shot["screenshotKey"])
-        
-        return AppDetail(
-            app_id=app.get("appId"),
-            name=app.get("zhName") or app.get("name"),
-            version=app.get("version"),
-            arch=app.get("arch"),
-            description=app.get("description"),
-            repo_name=app.get("repoName"),
-            icon=app.get("icon"),
-            screenshots=screenshots,
-            size=app.get("size"),
-            developer=app.get("devName"),
-            category=app.get("categoryName"),
-        )
+        return parse_app_detail(app_list[0])
+
+    def get_app_details(
+        self,
+        app_ids: Iterable[str],
+        *,
+        arch: Optional[str] = None,
+        chunk_size: int = DEFAULT_DETAIL_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> AppDetailBatch:
+        """批量获取应用详情
+
+        ``/app/getAppDetail`` accepts an array body, so ids are sent in chunks
+        of ``chunk_size`` and the chunks run concurrently. Duplicate ids are
+        requested once. See ``AppDetailBatch`` for how failures are reported.
+        """
+        batch = AppDetailBatch()
+        for app_id, detail, error in self.iter_app_details(
+            app_ids, arch=arch, chunk_size=chunk_size, max_workers=max_workers
+        ):
+            if detail is not None:
+                batch[app_id] = detail
+            elif error is not None:
+                batch.errors[app_id] = error
+            else:
+                batch.missing.append(app_id)
+        return batch
+
+    def iter_app_details(
+        self,
+        app_ids: Iterable[str],
+        *,
+        arch: Optional[str] = None,
+        chunk_size: int = DEFAULT_DETAIL_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> Iterator[Tuple[str, Optional[AppDetail], Optional[str]]]:
+        """Yield ``(app_id, detail, error)`` for every id, in request order.
+
+        Chunks are fetched like ``get_app_details`` and yielded as soon as a
+        chunk (and every chunk before it) has arrived. ``detail`` is ``None``
+        for apps missing from the response, and for apps whose chunk failed,
+        in which case ``error`` holds the message.
+        """
+        ids = list(dict.fromkeys(app_ids))
+        arch = arch or self.arch
+        size = max(1, chunk_size)
+        chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+
+        def fetch(chunk: List[str]) -> Dict[str, Any]:
+            payload = [{"appId": app_id, "arch": arch} for app_id in chunk]
+            return self._request_json("POST", "/app/getAppDetail", payload=payload)
+
+        if not chunks:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+            futures = [pool.submit(fetch, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    response = future.result()
+                except RuntimeError as exc:
+                    for app_id in chunk:
+                        yield app_id, None, str(exc)
+                    continue
+                data = response.get("data") or {}
+                for app_id in chunk:
+                    app_list = data.get(app_id) if isinstance(data, dict) else None
+                    if app_list:
+                        yield app_id, parse_app_detail(app_list[0]), None
+                    else:
+                        yield app_id, None, None
+
+    def get_app_versions(
+        self,
+        app_id: str,
+        *,
+        arch: Optional[str] = None,
+        page_size: int = DEFAULT_VERSION_PAGE_SIZE,
+        raw: bool = False,
+    ) -> List[AppVersion] | Dict[str, Any]:
+        """获取应用的全部版本
+
+        ``/visit/getSearchAppVersionList`` takes an ``AppMainVO`` filtered by
+        ``appId`` and lists every version, arch, module and channel the store
+        has for the app; ``arch`` narrows it to one architecture. Paged
+        responses are followed until ``data.total`` records have arrived.
+        Records are returned oldest first by version order (see
+        ``linglong_versions``); ``raw`` returns the first response as-is.
+        """
+        payload = self.build_search_payload(page_size=page_size)
+        payload["appId"] = app_id
+        if arch is None:
+            del payload["arch"]
+        else:
+            payload["arch"] = arch
+        response = self._request_json("POST", "/visit/getSearchAppVersionList", payload=payload)
+        if raw:
+            return response
+        items = list(extract_app_items(response))
+        total = extract_total(response)
+        page_no = 1
+        while total is not None and len(items) < total and len(items) >= page_no * page_size:
+            page_no += 1
+            payload["pageNo"] = page_no
+            items.extend(extract_app_items(
+                self._request_json("POST", "/visit/getSearchAppVersionList", payload=payload)
+            ))
+        versions = [AppVersion.from_raw(item) for item in items if item.get("appId") in (None, app_id)]
+        versions.sort(key=lambda version: version.parsed.key)
+        return versions
+
+    def check_updates(self, apps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """检查更新
+
+        ``apps`` is an ``AppCheckVersionBO[]`` (``appId``/``arch``/``version``);
+        the response envelope is returned as-is. Never cached.
+        """
+        return self._request_json("POST", "/app/appCheckUpdate", payload=apps)
+
+    def check_updates_batch(
+        self,
+        apps: Iterable[Dict[str, Any]],
+        *,
+        chunk_size: int = DEFAULT_UPDATE_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+    ) -> UpdateCheckBatch:
+        """批量检查更新
+
+        Identical ``(appId, arch, version)`` items are sent once. The list is
+        split into chunks of ``chunk_size`` that run concurrently; a chunk that
+        fails (transport error or non-200 envelope) is retried up to
+        ``retries`` times, sleeping ``backoff * 2 ** attempt`` seconds between
+        attempts. See ``UpdateCheckBatch`` for how failures are reported.
+        """
+        items = list({
+            (app.get("appId"), app.get("arch"), app.get("version")): app for app in apps
+        }.values())
+        size = max(1, chunk_size)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+
+        def fetch(chunk: List[Dict[str, Any]]) -> Tuple[Any, Optional[str], int]:
+            error = None
+            for attempt in range(max(0, retries) + 1):
+                if attempt:
+                    time.sleep(backoff * 2 ** (attempt - 1))
+                    if self.metrics is not None:
+                        self.metrics.count_retry("/app/appCheckUpdate")
+                try:
+                    response = self.check_updates(chunk)
+                except RuntimeError as exc:
+                    error = str(exc)
+                    continue
+                if response.get("code") not in (None, 200):
+                    error = f"code {response.get('code')}: {response.get('msg') or response.get('message') or ''}".strip()
+                    continue
+                return response.get("data") or [], None, attempt + 1
+            return None, error, max(0, retries) + 1
+
+        batch = UpdateCheckBatch()
+        batch.chunks = len(chunks)
+        if not chunks:
+            return batch
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+            futures = [pool.submit(fetch, chunk) for chunk in chunks]
+            for index, (chunk, future) in enumerate(zip(chunks, futures)):
+                data, error, attempts = future.result()
+                if error is not None:
+                    batch.failed.append(FailedChunk(index=index, apps=chunk, error=error, attempts=attempts))
+                elif isinstance(data, list):
+                    batch.extend(data)
+        return batch
+
+    def save_installed_record(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """上报安装/卸载记录
+
+        ``record`` is a ``SaveInstalledRecordVO`` (``visitorId``, optional
+        ``clientIp``, ``addedItems``/``removedItems``). Never cached; raises
+        ``StoreRejectedError`` when the envelope ``code`` is not 200. Use
+        ``linglong_telemetry.TelemetrySpool`` to report without blocking.
+        """
+        # Two identical reports are two installs: never coalesce them.
+        response = self._request_json("POST", "/app/saveInstalledRecord", payload=record, coalesce=False)
+        if response.get("code") not in (None, 200):
+            message = response.get("msg") or response.get("message") or ""
+            raise StoreRejectedError(
+                f"saveInstalledRecord failed: code {response.get('code')} {message}".strip(),
+                code=response.get("code"),
+                url=f"{self.base_url}/app/saveInstalledRecord",
+            )
+        return response
 
 
 def get_app_detail_api(
@@ -291,9 +852,10 @@ def get_app_detail_api(
     arch: str = DEFAULT_ARCH,
     lang: str = DEFAULT_LANG,
     raw: bool = False,
+    transport: Optional[str] = None,
 ) -> AppDetail | Dict[str, Any]:
     """获取应用详情的便捷函数"""
-    client = LinglongStoreClient(arch=arch, lang=lang)
+    client = LinglongStoreClient(arch=arch, lang=lang, transport=transport)
     return client.get_app_detail(app_id, raw=raw)
 
 
@@ -314,11 +876,13 @@ def search_apps_api(
     sort: Optional[str] = None,
     order: Optional[str] = None,
     raw: bool = False,
+    transport: Optional[str] = None,
 ) -> List[AppSummary] | Dict[str, Any]:
     client = LinglongStoreClient(
         arch=arch,
         lang=lang,
         repo_name=repo_name,
+        transport=transport,
     )
     return client.search_apps_simple(
         name=name,
@@ -336,6 +900,189 @@ def search_apps_api(
     )
 
 
+def _asset(url: str, assets: Optional[Dict[str, Any]]) -> str:
+    """URL，已缓存到本地时附上本地路径（缩略图优先）"""
+    result = assets.get(url) if assets else None
+    if result is None or not result.ok:
+        return url
+    return f"{result.thumbnail or result.path} ({url})"
+
+
+def _prefetch_assets(args: Any, apps: List[Any], screenshots: bool = True) -> Optional[Dict[str, Any]]:
+    """``--cache-assets``：并发下载图标与截图，返回 {url: AssetResult}"""
+    if not args.cache_assets or not apps:
+        return None
+    # 延迟导入：资源缓存模块依赖本模块
+    from linglong_assets import AssetCache, parse_size
+
+    thumbnail = parse_size(args.thumbnail) if args.thumbnail else None
+    return AssetCache(transport=args.transport).prefetch_apps(
+        apps, screenshots=screenshots, refresh=args.refresh, thumbnail=thumbnail
+    )
+
+
+def _print_screenshots(detail: AppDetail, assets: Optional[Dict[str, Any]] = None) -> None:
+    if detail.screenshots:
+        print(f"{detail.name} 的截图:")
+        for i, url in enumerate(detail.screenshots, 1):
+            print(f"  {i}. {_asset(url, assets)}")
+    else:
+        print("该应用暂无截图")
+
+
+def _print_detail(detail: AppDetail, assets: Optional[Dict[str, Any]] = None) -> None:
+    print(f"应用ID: {detail.app_id}")
+    print(f"名称: {detail.name}")
+    print(f"版本: {detail.version}")
+    print(f"架构: {detail.arch}")
+    print(f"分类: {detail.category}")
+    print(f"开发者: {detail.developer}")
+    print(f"大小: {detail.size}")
+    if detail.icon:
+        print(f"图标: {_asset(detail.icon, assets)}")
+    if detail.description:
+        print(f"描述: {detail.description}")
+    if detail.screenshots:
+        print(f"\n截图 ({len(detail.screenshots)} 张):")
+        for i, url in enumerate(detail.screenshots, 1):
+            print(f"  {i}. {_asset(url, assets)}")
+
+
+def _print_detail_batch(
+    batch: AppDetailBatch,
+    *,
+    as_json: bool,
+    screenshots_only: bool,
+    assets: Optional[Dict[str, Any]] = None,
+) -> None:
+    if as_json:
+        print(json.dumps({
+            "apps": [detail_to_dict(detail) for detail in batch.values()],
+            "missing": batch.missing,
+            "errors": batch.errors,
+        }, ensure_ascii=False, indent=2))
+    else:
+        for detail in batch.values():
+            if screenshots_only:
+                _print_screenshots(detail, assets)
+            else:
+                _print_detail(detail, assets)
+            print()
+        for app_id in batch.missing:
+            print(f"未找到应用: {app_id}")
+        for app_id, error in batch.errors.items():
+            print(f"获取失败: {app_id} ({error})")
+    if not batch:
+        raise SystemExit(1)
+
+
+def _stream_detail_batch(results: Iterator[Tuple[str, Optional[AppDetail], Optional[str]]]) -> None:
+    found = 0
+
+    def records() -> Iterator[Dict[str, Any]]:
+        nonlocal found
+        for app_id, detail, error in results:
+            if detail is not None:
+                found += 1
+                yield detail_to_dict(detail)
+            elif error is not None:
+                yield {"appId": app_id, "error": error}
+            else:
+                yield {"appId": app_id, "missing": True}
+
+    write_ndjson(records())
+    if not found:
+        raise SystemExit(1)
+
+
+def _print_summaries(items: List[AppSummary], assets: Optional[Dict[str, Any]] = None) -> None:
+    if not items:
+        print("未找到匹配的应用")
+        return
+    print(f"共找到 {len(items)} 个应用:\n")
+    for i, app in enumerate(items, 1):
+        print(f"{i}. {app.app_id}")
+        print(f"   名称: {app.name}")
+        print(f"   版本: {app.version}")
+        print(f"   架构: {app.arch}")
+        if app.icon:
+            print(f"   图标: {_asset(app.icon, assets)}")
+        if app.description:
+            desc = app.description[:80] + "..." if len(app.description) > 80 else app.description
+            print(f"   描述: {desc}")
+        print()
+
+
+def _print_versions(app_id: str, versions: List[AppVersion], as_json: bool, ndjson: bool) -> None:
+    rows = [version.to_dict() for version in reversed(versions)]  # 最新版本在前
+    if ndjson:
+        write_ndjson(rows)
+        return
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    if not rows:
+        print(f"未找到应用版本: {app_id}")
+        return
+    print(f"{app_id} 共 {len(rows)} 个版本（最新在前）:\n")
+    for row in rows:
+        print(f"  {row['version'] or '-':<20} {row['arch'] or '-':<10} {row['channel'] or '-':<8} {row['module'] or '-'}")
+
+
+def _format_timestamp(value: Optional[float]) -> str:
+    if not value:
+        return "从未同步"
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(value))
+
+
+def _run_index_command(client: LinglongStoreClient, args: Any, parser: Any) -> None:
+    # 延迟导入：索引模块依赖本模块
+    from linglong_search_index import SearchIndex
+
+    with SearchIndex.for_client(client, args.index_path) as index:
+        if args.sync_index:
+            result = index.sync(client)
+            if args.ndjson:
+                write_ndjson([result.as_dict()])
+            elif args.json:
+                print(json.dumps(result.as_dict(), ensure_ascii=False, indent=2))
+            else:
+                print(
+                    f"索引同步完成: 共 {result.total} 个应用，新增 {result.added}，更新 {result.updated}，"
+                    f"删除 {result.removed}，未变 {result.unchanged}（{result.seconds:.2f}s）"
+                )
+            return
+
+        status = index.status()
+        if args.index_status:
+            if args.ndjson:
+                write_ndjson([status])
+            elif args.json:
+                print(json.dumps(status, ensure_ascii=False, indent=2))
+            else:
+                print(f"索引文件: {status['path']}")
+                print(f"应用数量: {status['apps']}")
+                print(f"更新时间: {_format_timestamp(status['syncedAt'])}")
+            return
+
+        if not args.name and not args.category_name:
+            parser.error("请提供搜索关键词或分类名称")
+        if not status["apps"]:
+            raise RuntimeError("本地索引为空，请先执行 --sync-index")
+        items = index.search(args.name, category=args.category_name, limit=args.page_size)
+        if args.ndjson:
+            write_ndjson(map(summary_to_dict, items))
+            return
+        if args.json:
+            print(json.dumps({
+                "syncedAt": status["syncedAt"],
+                "apps": summaries_to_dicts(items),
+            }, ensure_ascii=False, indent=2))
+            return
+        print(f"(本地索引，更新于 {_format_timestamp(status['syncedAt'])})")
+        _print_summaries(items)
+
+
 def _main() -> None:
     """命令行入口：python linglong_store_api.py <应用名称> [--arch ARCH] [--repo REPO] [--page-size N] [--json]"""
     import argparse
@@ -351,6 +1098,13 @@ def _main() -> None:
   python linglong_store_api.py 浏览器 --arch arm64
   python linglong_store_api.py --detail cn.wps.wps-office
   python linglong_store_api.py --detail cn.wps.wps-office --screenshots
+  python linglong_store_api.py --detail cn.wps.wps-office --screenshots --cache-assets
+  python linglong_store_api.py --detail cn.wps.wps-office org.deepin.calculator
+  python linglong_store_api.py --versions org.deepin.calculator
+  python linglong_store_api.py --sync-index
+  python linglong_store_api.py wps --local
+  python linglong_store_api.py wps --offline catalog.llsnap
+  python linglong_store_api.py --daemon
         """,
     )
     parser.add_argument("name", nargs="?", help="搜索关键词（应用名称）")
@@ -359,104 +1113,152 @@ def _main() -> None:
     parser.add_argument("--lang", default=DEFAULT_LANG, help=f"语言 (默认: {DEFAULT_LANG})")
     parser.add_argument("--page-size", type=int, default=20, help="每页数量 (默认: 20)")
     parser.add_argument("--json", action="store_true", help="输出原始 JSON 格式")
+    parser.add_argument("--ndjson", action="store_true", help="每行输出一条紧凑 JSON 记录，边获取边输出（适合管道处理）")
     parser.add_argument("--category", dest="category_name", help="分类名称筛选")
-    parser.add_argument("--detail", dest="detail_app_id", help="获取应用详情（appId）")
+    parser.add_argument("--detail", dest="detail_app_ids", nargs="+", metavar="APP_ID", help="获取应用详情（一个或多个 appId）")
+    parser.add_argument("--versions", dest="versions_app_id", metavar="APP_ID", help="列出应用的全部版本（各架构、模块与渠道）")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_DETAIL_CHUNK_SIZE,
+        help=f"批量详情每个请求包含的 appId 数 (默认: {DEFAULT_DETAIL_CHUNK_SIZE})",
+    )
     parser.add_argument("--screenshots", action="store_true", help="仅输出应用截图链接（需配合 --detail 使用）")
+    parser.add_argument(
+        "--cache-assets",
+        action="store_true",
+        help="并发下载图标与截图到本地资源缓存，文本输出中附上本地文件路径",
+    )
+    parser.add_argument("--thumbnail", metavar="WxH", help="配合 --cache-assets 生成缩略图（需 Pillow 或 ImageMagick）")
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORT_NAMES,
+        help="HTTP 后端: http(连接池, 默认) 或 curl(子进程回退)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="不读写本地响应缓存")
+    parser.add_argument("--refresh", action="store_true", help="忽略未过期缓存，向服务器重新校验")
+    parser.add_argument(
+        "--offline",
+        metavar="SNAPSHOT",
+        help="不访问商店接口，从离线目录快照回答查询（arch/repo/lang 取自快照）",
+    )
+    parser.add_argument("--sync-index", action="store_true", help="同步全量应用目录到本地全文索引（增量写入）")
+    parser.add_argument("--local", action="store_true", help="使用本地全文索引离线搜索（需先 --sync-index）")
+    parser.add_argument("--index-status", action="store_true", help="输出本地全文索引的应用数与更新时间")
+    parser.add_argument("--index-path", help="本地全文索引文件路径 (默认: $XDG_CACHE_HOME/linglong-store/index/)")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="在后台启动常驻进程；之后的命令经 Unix socket 转发，复用连接与内存缓存",
+    )
+    add_stats_arguments(parser)
 
     args = parser.parse_args()
 
+    if args.daemon:
+        # 延迟导入：常驻进程模块会导入本模块
+        from linglong_daemon import start
+
+        status = start()
+        if status is None:
+            print("错误: 常驻进程未能启动，详见 socket 目录下的 daemon.log")
+            raise SystemExit(1)
+        print(f"常驻进程已运行: pid {status['pid']}, socket {status['socket']}")
+        return
+
+    metrics = metrics_from_args(args)
+
     try:
-        # 获取应用详情模式
-        if args.detail_app_id:
-            detail = get_app_detail_api(
-                app_id=args.detail_app_id,
+        if args.offline:
+            # 延迟导入：离线快照模块依赖本模块
+            from linglong_offline import offline_client
+
+            client = offline_client(args.offline, metrics=metrics)
+        else:
+            client = LinglongStoreClient(
                 arch=args.arch,
                 lang=args.lang,
-                raw=args.json,
+                repo_name=args.repo_name,
+                transport=args.transport,
+                cache=False if args.no_cache else None,
+                refresh=args.refresh,
+                metrics=metrics,
             )
-            
+
+        # 版本列表模式（所有架构、模块与渠道）
+        if args.versions_app_id:
+            versions = client.get_app_versions(args.versions_app_id)
+            _print_versions(args.versions_app_id, versions, as_json=args.json, ndjson=args.ndjson)
+            if not versions:
+                raise SystemExit(1)
+            return
+
+        # 批量获取应用详情模式
+        if args.detail_app_ids and len(args.detail_app_ids) > 1 and args.ndjson:
+            _stream_detail_batch(client.iter_app_details(args.detail_app_ids, chunk_size=args.chunk_size))
+            return
+
+        if args.detail_app_ids and len(args.detail_app_ids) > 1:
+            batch = client.get_app_details(args.detail_app_ids, chunk_size=args.chunk_size)
+            _print_detail_batch(
+                batch,
+                as_json=args.json,
+                screenshots_only=args.screenshots,
+                assets=None if args.json else _prefetch_assets(args, list(batch.values())),
+            )
+            return
+
+        # 获取应用详情模式
+        if args.detail_app_ids:
+            detail = client.get_app_detail(args.detail_app_ids[0], raw=args.json)
+
+            if args.ndjson:
+                write_ndjson([detail if isinstance(detail, dict) else detail_to_dict(detail)])
+                return
+
             if args.json:
                 if isinstance(detail, dict):
                     print(json.dumps(detail, ensure_ascii=False, indent=2))
                 else:
-                    print(json.dumps({
-                        "appId": detail.app_id,
-                        "name": detail.name,
-                        "version": detail.version,
-                        "arch": detail.arch,
-                        "description": detail.description,
-                        "icon": detail.icon,
-                        "screenshots": detail.screenshots,
-                        "size": detail.size,
-                        "developer": detail.developer,
-                        "category": detail.category,
-                    }, ensure_ascii=False, indent=2))
+                    print(json.dumps(detail_to_dict(detail), ensure_ascii=False, indent=2))
                 return
             
+            assets = _prefetch_assets(args, [detail])
             if args.screenshots:
-                if detail.screenshots:
-                    print(f"{detail.name} 的截图:")
-                    for i, url in enumerate(detail.screenshots, 1):
-                        print(f"  {i}. {url}")
-                else:
-                    print("该应用暂无截图")
+                _print_screenshots(detail, assets)
                 return
             
-            # 输出完整详情
-            print(f"应用ID: {detail.app_id}")
-            print(f"名称: {detail.name}")
-            print(f"版本: {detail.version}")
-            print(f"架构: {detail.arch}")
-            print(f"分类: {detail.category}")
-            print(f"开发者: {detail.developer}")
-            print(f"大小: {detail.size}")
-            if detail.icon:
-                print(f"图标: {detail.icon}")
-            if detail.description:
-                print(f"描述: {detail.description}")
-            if detail.screenshots:
-                print(f"\n截图 ({len(detail.screenshots)} 张):")
-                for i, url in enumerate(detail.screenshots, 1):
-                    print(f"  {i}. {url}")
+            _print_detail(detail, assets)
+            return
+
+        if args.sync_index or args.index_status or args.local:
+            _run_index_command(client, args, parser)
             return
 
         # 搜索模式
         if not args.name and not args.category_name:
             parser.error("请提供搜索关键词或分类名称")
 
-        result = search_apps_api(
+        result = client.search_apps_simple(
             name=args.name,
             category_name=args.category_name,
-            arch=args.arch,
-            lang=args.lang,
-            repo_name=args.repo_name,
             page_size=args.page_size,
             raw=args.json,
         )
 
-        if args.json:
+        if args.ndjson:
+            write_ndjson([result] if isinstance(result, dict) else map(summary_to_dict, result))
+        elif args.json:
             print(json.dumps(summaries_to_dicts(result) if isinstance(result, list) else result, ensure_ascii=False, indent=2))
         else:
             items = result if isinstance(result, list) else []
-            if not items:
-                print("未找到匹配的应用")
-                return
-            print(f"共找到 {len(items)} 个应用:\n")
-            for i, app in enumerate(items, 1):
-                print(f"{i}. {app.app_id}")
-                print(f"   名称: {app.name}")
-                print(f"   版本: {app.version}")
-                print(f"   架构: {app.arch}")
-                if app.icon:
-                    print(f"   图标: {app.icon}")
-                if app.description:
-                    desc = app.description[:80] + "..." if len(app.description) > 80 else app.description
-                    print(f"   描述: {desc}")
-                print()
+            _print_summaries(items, _prefetch_assets(args, items, screenshots=False))
 
     except Exception as e:
         print(f"错误: {e}")
         raise SystemExit(1)
+    finally:
+        report_metrics(metrics, args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Durable, batched install/uninstall telemetry for ``/app/saveInstalledRecord``.
+
+Recording an install is one append to a local spool and never touches the
+network, so it adds no latency to the install path. Records are delivered
+later in batches: one ``SaveInstalledRecordVO`` per (visitorId, clientIp)
+carries many ``addedItems``/``removedItems``, and failed requests are
+retried with exponential backoff. Whatever could not be delivered stays
+spooled and is drained by the next flush, in this run or a later one.
+
+Spool layout (under ``$XDG_CACHE_HOME/linglong-store/telemetry``):
+
+- ``spool.jsonl``: append-only, one JSON record per line, written with a
+  single ``O_APPEND`` write. A torn last line from a crash is skipped.
+- ``batch-*.jsonl``: records claimed by a flush (``spool.jsonl`` renamed
+  under an exclusive lock, so concurrent appenders never lose a line).
+  A batch file is removed once delivered, or rewritten with only the
+  records that are still pending.
+- ``append.lock`` / ``flush.lock``: ``flock`` locks; one flusher at a time.
+
+Delivery is at-least-once: a crash between a successful request and the
+batch file update resends those records.
+
+    python3 linglong_telemetry.py record --action install --app-id cn.wps.wps-office --version 11.1.0.10161
+    python3 linglong_telemetry.py flush
+    python3 linglong_telemetry.py status
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: spool operations run unlocked
+    fcntl = None  # type: ignore[assignment]
+
+from linglong_cache import cache_home
+from linglong_store_api import LinglongStoreClient, StoreRejectedError
+from linglong_transport import TransportError
+
+
+VISITOR_ENV = "LINGLONG_STORE_VISITOR_ID"
+ACTIONS = ("install", "uninstall")
+ITEM_FIELDS = ("appId", "name", "version", "arch", "module", "channel")
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_ATTEMPTS = 4
+DEFAULT_BACKOFF = 1.0
+
+_SPOOL = "spool.jsonl"
+_BATCH_PREFIX = "batch-"
+
+
+def default_spool_dir() -> str:
+    return os.path.join(cache_home(), "telemetry")
+
+
+def default_visitor_id() -> str:
+    """``$LINGLONG_STORE_VISITOR_ID``, else an anonymous hash of the machine id."""
+    visitor = os.environ.get(VISITOR_ENV)
+    if visitor:
+        return visitor
+    for path in ("/etc/machine-id", "/var/lib/dbus/machine-id"):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                machine_id = f.read().strip()
+        except OSError:
+            continue
+        if machine_id:
+            return hashlib.sha256(f"linglong-store:{machine_id}".encode("utf-8")).hexdigest()[:32]
+    return ""
+
+
+def installed_item(
+    app_id: str,
+    *,
+    name: Optional[str] = None,
+    version: Optional[str] = None,
+    arch: Optional[str] = None,
+    module: Optional[str] = None,
+    channel: Optional[str] = None,
+) -> Dict[str, str]:
+    """``InstalledRecordItem`` without unknown fields (no empty strings)."""
+    values = (app_id, name, version, arch, module, channel)
+    return {key: value for key, value in zip(ITEM_FIELDS, values) if value}
+
+
+@dataclass
+class FlushResult:
+    sent: int = 0
+    requests: int = 0
+    pending: int = 0
+    rejected: int = 0
+    skipped: bool = False
+    error: Optional[str] = None
+
+
+class _FileLock:
+    def __init__(self, path: str, exclusive: bool = True, blocking: bool = True) -> None:
+        self.path = path
+        self.exclusive = exclusive
+        self.blocking = blocking
+        self.fd: Optional[int] = None
+
+    def __enter__(self) -> bool:
+        """True when the lock is held (always, unless non-blocking and busy)."""
+        if fcntl is None:
+            return True
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        flags = fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH
+        if not self.blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self.fd, flags)
+        except BlockingIOError:
+            os.close(self.fd)
+            self.fd = None
+            return False
+        return True
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class TelemetrySpool:
+    """Crash-safe local queue of ``saveInstalledRecord`` items.
+
+    Args:
+        directory: spool directory (default: ``default_spool_dir()``).
+        visitor_id: default ``visitorId`` for new records.
+        client_ip: default ``clientIp``; omitted from requests when unknown.
+        durable: ``fsync`` every append (survives power loss, costs a disk flush).
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        visitor_id: Optional[str] = None,
+        client_ip: Optional[str] = None,
+        durable: bool = False,
+    ) -> None:
+        self.directory = directory or default_spool_dir()
+        self.visitor_id = visitor_id
+        self.client_ip = client_ip
+        self.durable = durable
+        self._thread: Optional[threading.Thread] = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # -- recording ---------------------------------------------------------
+
+    def record(
+        self,
+        action: str,
+        item: Dict[str, Any],
+        *,
+        visitor_id: Optional[str] = None,
+        client_ip: Optional[str] = None,
+    ) -> str:
+        """Append one install/uninstall record; returns its id. No network I/O."""
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action: {action} (choose from {', '.join(ACTIONS)})")
+        if not item.get("appId"):
+            raise ValueError("telemetry item needs an appId")
+        record = {
+            "id": uuid.uuid4().hex,
+            "ts": round(time.time(), 3),
+            "action": action,
+            "visitorId": visitor_id or self.visitor_id or default_visitor_id(),
+            "clientIp": client_ip or self.client_ip,
+            "item": {key: item[key] for key in ITEM_FIELDS if item.get(key)},
+        }
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        # Shared lock: appenders run in parallel, a flush claims the file in between.
+        with _FileLock(self._path("append.lock"), exclusive=False):
+            fd = os.open(self._path(_SPOOL), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                os.write(fd, line)
+                if self.durable:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        return record["id"]
+
+    def record_install(self, app_id: str, **fields: Any) -> str:
+        return self.record("install", installed_item(app_id, **fields))
+
+    def record_uninstall(self, app_id: str, **fields: Any) -> str:
+        return self.record("uninstall", installed_item(app_id, **fields))
+
+    # -- reading -----------------------------------------------------------
+
+    @staticmethod
+    def _read(path: str) -> List[Dict[str, Any]]:
+        records = []
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+                    if isinstance(record, dict) and record.get("action") in ACTIONS and record.get("item"):
+                        records.append(record)
+        except OSError:
+            pass
+        return records
+
+    def _batch_files(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(self._path(name) for name in names if name.startswith(_BATCH_PREFIX) and name.endswith(".jsonl"))
+
+    def pending(self) -> int:
+        """Records not yet delivered (spooled plus claimed by an unfinished flush)."""
+        return sum(len(self._read(path)) for path in self._batch_files() + [self._path(_SPOOL)])
+
+    # -- delivery ----------------------------------------------------------
+
+    def _claim(self) -> None:
+        """Move ``spool.jsonl`` aside so appends continue into a fresh file."""
+        spool = self._path(_SPOOL)
+        with _FileLock(self._path("append.lock")):
+            try:
+                if os.path.getsize(spool) == 0:
+                    return
+            except OSError:
+                return
+            os.replace(spool, self._path(f"{_BATCH_PREFIX}{time.time_ns()}-{os.getpid()}.jsonl"))
+
+    @staticmethod
+    def _bodies(records: List[Dict[str, Any]], batch_size: int) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """``(SaveInstalledRecordVO, records)`` pairs, at most ``batch_size`` items each."""
+        groups: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+        for record in records:
+            groups.setdefault((record.get("visitorId") or "", record.get("clientIp")), []).append(record)
+        size = max(1, batch_size)
+        for (visitor_id, client_ip), group in groups.items():
+            for start in range(0, len(group), size):
+                chunk = group[start:start + size]
+                body: Dict[str, Any] = {"visitorId": visitor_id}
+                if client_ip:
+                    body["clientIp"] = client_ip
+                body["addedItems"] = [r["item"] for r in chunk if r["action"] == "install"]
+                body["removedItems"] = [r["item"] for r in chunk if r["action"] == "uninstall"]
+                yield body, chunk
+
+    def _rewrite(self, path: str, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            for record in records:
+                f.write((json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def flush(
+        self,
+        client: Any = None,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        attempts: int = DEFAULT_ATTEMPTS,
+        backoff: float = DEFAULT_BACKOFF,
+    ) -> FlushResult:
+        """Deliver every spooled record; returns immediately if another flush runs.
+
+        Each request is tried up to ``attempts`` times, sleeping
+        ``backoff * 2 ** n`` seconds in between. Records the server rejects
+        outright (HTTP 4xx other than 408/429, or an envelope ``code`` other
+        than 200) are dropped and counted as ``rejected``; anything else that
+        fails stays spooled.
+        """
+        result = FlushResult()
+        if not os.path.isdir(self.directory):
+            return result
+        with _FileLock(self._path("flush.lock"), blocking=False) as held:
+            if not held:
+                result.skipped = True
+                return result
+            self._claim()
+            if client is None:
+                client = LinglongStoreClient(singleflight=False)
+            for path in self._batch_files():
+                remaining: List[Dict[str, Any]] = []
+                failed = False
+                for body, chunk in self._bodies(self._read(path), batch_size):
+                    if failed:
+                        remaining.extend(chunk)
+                        continue
+                    status = self._send(client, body, attempts, backoff, result)
+                    if status == "sent":
+                        result.sent += len(chunk)
+                    elif status == "rejected":
+                        result.rejected += len(chunk)
+                    else:
+                        # The store is unreachable; keep the rest for the next run.
+                        failed = True
+                        remaining.extend(chunk)
+                self._rewrite(path, remaining)
+                result.pending += len(remaining)
+        return result
+
+    @staticmethod
+    def _send(client: Any, body: Dict[str, Any], attempts: int, backoff: float, result: FlushResult) -> str:
+        for attempt in range(max(1, attempts)):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+            result.requests += 1
+            try:
+                client.save_installed_record(body)
+            except StoreRejectedError as exc:
+                # A 200 response whose envelope refuses the body: resending
+                # the same records cannot succeed.
+                result.error = str(exc)
+                return "rejected"
+            except TransportError as exc:
+                result.error = str(exc)
+                if exc.status is not None and 400 <= exc.status < 500 and exc.status not in (408, 429):
+                    return "rejected"
+                continue
+            except RuntimeError as exc:
+                result.error = str(exc)
+                continue
+            return "sent"
+        return "failed"
+
+    def flush_in_background(self, client: Any = None, **kwargs: Any) -> threading.Thread:
+        """Flush on a daemon thread (long-running processes); returns the thread.
+
+        Records the thread does not finish before the process exits stay
+        spooled for the next run.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._thread = threading.Thread(target=self.flush, args=(client,), kwargs=kwargs, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def spawn_flusher(self) -> Optional[subprocess.Popen]:
+        """Start a detached ``flush`` process that outlives the caller (CLI use)."""
+        cmd = [sys.executable, os.path.abspath(__file__), "--spool-dir", self.directory, "flush", "--quiet"]
+        try:
+            return subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError:
+            return None
+
+
+def main() -> int:
+    import argparse
+    from dataclasses import asdict
+
+    parser = argparse.ArgumentParser(description="Spool and deliver Linglong install/uninstall telemetry")
+    parser.add_argument("--spool-dir", help="spool directory (default: $XDG_CACHE_HOME/linglong-store/telemetry)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p_record = subparsers.add_parser("record", help="spool one install/uninstall and flush in the background")
+    p_record.add_argument("--action", choices=ACTIONS, required=True)
+    p_record.add_argument("--app-id", required=True)
+    p_record.add_argument("--name")
+    p_record.add_argument("--version")
+    p_record.add_argument("--arch")
+    p_record.add_argument("--module")
+    p_record.add_argument("--channel")
+    p_record.add_argument("--visitor-id", help=f"default: ${VISITOR_ENV} or a hash of /etc/machine-id")
+    p_record.add_argument("--client-ip")
+    p_record.add_argument("--durable", action="store_true", help="fsync the spool after appending")
+    p_record.add_argument("--no-flush", action="store_true", help="only spool; deliver on the next flush")
+
+    p_flush = subparsers.add_parser("flush", help="deliver every spooled record now")
+    p_flush.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="items per request")
+    p_flush.add_argument("--attempts", type=int, default=DEFAULT_ATTEMPTS, help="tries per request")
+    p_flush.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF, help="first retry delay in seconds")
+    p_flush.add_argument("--quiet", action="store_true")
+
+    subparsers.add_parser("status", help="print the number of undelivered records")
+    args = parser.parse_args()
+
+    spool = TelemetrySpool(args.spool_dir)
+    try:
+        if args.command == "record":
+            spool.visitor_id = args.visitor_id
+            spool.client_ip = args.client_ip
+            spool.durable = args.durable
+            fields = {key: getattr(args, key) for key in ("name", "version", "arch", "module", "channel")}
+            record_id = spool.record(args.action, installed_item(args.app_id, **fields))
+            if not args.no_flush:
+                spool.spawn_flusher()
+            print(json.dumps({"id": record_id, "spooled": True}))
+            return 0
+        if args.command == "flush":
+            result = spool.flush(batch_size=args.batch_size, attempts=args.attempts, backoff=args.backoff)
+            if not args.quiet:
+                print(json.dumps(asdict(result), ensure_ascii=False))
+            return 0 if result.pending == 0 else 1
+        print(json.dumps({"pending": spool.pending(), "directory": spool.directory}, ensure_ascii=False))
+        return 0
+    except (OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
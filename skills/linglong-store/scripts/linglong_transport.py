@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linglong store HTTP transports.
+
+Two interchangeable backends share one request/response contract:
+
+- ``HttpTransport``: stdlib ``http.client`` with keep-alive connections pooled
+  per host, so repeated calls skip process spawn and TLS handshakes.
+- ``CurlTransport``: the original ``curl`` subprocess path, kept as a fallback
+  for hosts where the Python TLS stack is unusable.
+
+Both return a ``TransportResponse`` and raise ``TransportError`` (a
+``RuntimeError``) for network failures and HTTP error statuses. Response bodies
+are decoded with ``decode_json`` regardless of the backend. Each response
+carries a ``RequestTiming`` with the DNS/connect/TLS/TTFB split and wire sizes.
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import http.client
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_IDLE_PER_HOST = 8
+USER_AGENT = "linglong-store-skill"
+TRANSPORT_ENV = "LINGLONG_STORE_TRANSPORT"
+TRANSPORT_NAMES = ("http", "curl")
+
+
+class TransportError(RuntimeError):
+    """Request execution failed (network error, HTTP error status or bad body)."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        url: Optional[str] = None,
+        status: Optional[int] = None,
+        timing: Optional["RequestTiming"] = None,
+    ) -> None:
+        super().__init__(message)
+        self.url = url
+        self.status = status
+        self.timing = timing
+
+
+@dataclass
+class RequestTiming:
+    """Where the time of one request went, in seconds.
+
+    ``dns``, ``connect`` and ``tls`` are phase durations and stay ``None`` on
+    a reused keep-alive connection; ``ttfb`` (first response byte) and
+    ``total`` are measured from the start of the request. Byte counts are
+    on the wire: request line, headers and body sent, compressed body received.
+    """
+
+    dns: Optional[float] = None
+    connect: Optional[float] = None
+    tls: Optional[float] = None
+    ttfb: Optional[float] = None
+    total: Optional[float] = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    reused: bool = False
+    retries: int = 0
+
+
+@dataclass
+class TransportResponse:
+    status: int
+    body: bytes
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    timing: Optional[RequestTiming] = None
+
+    def header(self, name: str) -> Optional[str]:
+        return self.headers.get(name.lower())
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode a response body as JSON, raising ``TransportError`` on failure."""
+    try:
+        return json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as exc:
+        raise TransportError("failed to parse response as JSON") from exc
+
+
+def check_status(status: int, url: str, body: bytes, timing: Optional["RequestTiming"] = None) -> None:
+    if status >= 400:
+        snippet = body[:200].decode("utf-8", errors="replace").strip()
+        message = f"HTTP {status} from {url}"
+        if snippet:
+            message = f"{message}: {snippet}"
+        raise TransportError(message, url=url, status=status, timing=timing)
+
+
+def base_headers(headers: Optional[Dict[str, str]], body: Optional[bytes]) -> Dict[str, str]:
+    merged = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+    if body is not None:
+        merged["Content-Type"] = "application/json"
+    if headers:
+        merged.update(headers)
+    return merged
+
+
+def _open_socket(host: str, port: int, timeout: Any, source_address: Any) -> Tuple[socket.socket, float, float]:
+    """``socket.create_connection`` with the DNS and connect phases timed apart."""
+    start = time.perf_counter()
+    infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    resolved = time.perf_counter()
+    error: Optional[OSError] = None
+    for family, socktype, proto, _, address in infos:
+        sock = socket.socket(family, socktype, proto)
+        try:
+            if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:  # type: ignore[attr-defined]
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(address)
+        except OSError as exc:
+            sock.close()
+            error = exc
+            continue
+        # http.client writes headers and body separately; without TCP_NODELAY
+        # the second write waits on the peer's delayed ACK (~40 ms per POST).
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, resolved - start, time.perf_counter() - resolved
+    raise error or OSError(f"getaddrinfo returned no addresses for {host}")
+
+
+class _TimedConnection:
+    """Mixin recording connection setup phases and the bytes sent."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.phases: Tuple[Optional[float], Optional[float], Optional[float]] = (None, None, None)
+        self.bytes_sent = 0
+
+    def send(self, data: Any) -> None:
+        if isinstance(data, (bytes, bytearray)):
+            self.bytes_sent += len(data)
+        super().send(data)  # type: ignore[misc]
+
+
+class _HTTPConnection(_TimedConnection, http.client.HTTPConnection):
+    def connect(self) -> None:
+        self.sock, dns, connect = _open_socket(self.host, self.port, self.timeout, self.source_address)
+        self.phases = (dns, connect, None)
+
+
+class _HTTPSConnection(_TimedConnection, http.client.HTTPSConnection):
+    def connect(self) -> None:
+        # With ``set_tunnel`` the socket goes to the proxy, which is asked to
+        # CONNECT to the real host; TLS is then negotiated with that host.
+        self.sock, dns, connect = _open_socket(self.host, self.port, self.timeout, self.source_address)
+        if self._tunnel_host:  # type: ignore[attr-defined]
+            self._tunnel()  # type: ignore[attr-defined]
+        start = time.perf_counter()
+        server_hostname = self._tunnel_host or self.host  # type: ignore[attr-defined]
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname)  # type: ignore[attr-defined]
+        self.phases = (dns, connect, time.perf_counter() - start)
+
+
+# (scheme, host, port, proxy URL or None)
+_PoolKey = Tuple[str, str, Optional[int], Optional[str]]
+
+
+def _environment_proxies() -> Dict[str, str]:
+    """``*_proxy`` variables as ``{scheme: url}`` (``no`` holds ``no_proxy``)."""
+    # urllib.request is slow to import; only load it when a proxy is configured.
+    if not any(name.lower().endswith("_proxy") for name in os.environ):
+        return {}
+    from urllib.request import getproxies_environment
+
+    return getproxies_environment()
+
+
+def _proxy_headers(proxy: Any) -> Dict[str, str]:
+    """``Proxy-Authorization`` for ``user:password@`` in the proxy URL."""
+    if proxy.username is None:
+        return {}
+    credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode("utf-8")).decode("ascii")}
+
+
+class HttpTransport:
+    """In-process HTTP/1.1 transport with per-host keep-alive connection pools.
+
+    Safe to share between threads: each request checks out its own connection
+    and returns it to the idle pool when the server keeps it open.
+
+    ``http_proxy``/``https_proxy``/``no_proxy`` (read once, at construction,
+    unless ``proxies`` is given) are honored like curl does: plain HTTP goes
+    to the proxy with an absolute URL, HTTPS is tunneled with ``CONNECT``.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+        proxies: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.proxies = _environment_proxies() if proxies is None else dict(proxies)
+        self._idle: Dict[_PoolKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, key: _PoolKey, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port, proxy_url = key
+        if proxy_url is None:
+            if scheme == "https":
+                return _HTTPSConnection(host, port, timeout=timeout), False
+            return _HTTPConnection(host, port, timeout=timeout), False
+        proxy = urlsplit(proxy_url)
+        proxy_port = proxy.port or (443 if proxy.scheme == "https" else 80)
+        if scheme == "https":
+            conn = _HTTPSConnection(proxy.hostname, proxy_port, timeout=timeout)
+            conn.set_tunnel(host, port, headers=_proxy_headers(proxy))
+            return conn, False
+        return _HTTPConnection(proxy.hostname, proxy_port, timeout=timeout), False
+
+    def proxy_for(self, scheme: str, host: str) -> Optional[str]:
+        """Proxy URL for a request, or ``None`` for a direct connection."""
+        proxy = self.proxies.get(scheme)
+        if not proxy:
+            return None
+        no_proxy = self.proxies.get("no")
+        if no_proxy:
+            from urllib.request import proxy_bypass_environment
+
+            if proxy_bypass_environment(host, {"no": no_proxy}):
+                return None
+        return proxy if "://" in proxy else f"http://{proxy}"
+
+    def _release(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise TransportError(f"unsupported URL: {url}", url=url)
+        proxy_url = self.proxy_for(parts.scheme, parts.hostname)
+        key: _PoolKey = (parts.scheme, parts.hostname, parts.port, proxy_url)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        request_headers = base_headers(headers, body)
+        if proxy_url is not None and parts.scheme == "http":
+            # A plain HTTP proxy takes the absolute URL as the request target.
+            target = f"http://{parts.netloc.rpartition('@')[2]}{target}"
+            request_headers.update(_proxy_headers(urlsplit(proxy_url)))
+        request_headers.setdefault("Accept-Encoding", "gzip")
+        timeout = self.timeout if timeout is None else timeout
+
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh connection before reporting the failure.
+        start = time.perf_counter()
+        for attempt in range(2):
+            conn, reused = self._acquire(key, timeout)
+            conn.phases = (None, None, None)
+            conn.bytes_sent = 0
+            try:
+                conn.request(method, target, body=body, headers=request_headers)
+                resp = conn.getresponse()
+                ttfb = time.perf_counter() - start
+                data = resp.read()
+            except (ConnectionResetError, BrokenPipeError, http.client.BadStatusLine) as exc:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise TransportError(f"request to {url} failed: {exc}", url=url) from exc
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                raise TransportError(f"request to {url} failed: {exc}", url=url) from exc
+            break
+
+        dns, connect, tls = conn.phases
+        timing = RequestTiming(
+            dns=dns,
+            connect=connect,
+            tls=tls,
+            ttfb=ttfb,
+            request_bytes=conn.bytes_sent,
+            response_bytes=len(data),
+            reused=reused,
+            retries=attempt,
+        )
+        response_headers = {name.lower(): value for name, value in resp.getheaders()}
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        if response_headers.get("content-encoding") == "gzip":
+            try:
+                data = gzip.decompress(data)
+            except OSError as exc:
+                raise TransportError(f"failed to decompress response from {url}", url=url) from exc
+        timing.total = time.perf_counter() - start
+        check_status(resp.status, url, data, timing)
+        return TransportResponse(status=resp.status, body=data, url=url, headers=response_headers, timing=timing)
+
+    def close(self) -> None:
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle.clear()
+        for idle in pools:
+            for conn in idle:
+                conn.close()
+
+
+class CurlTransport:
+    """Fallback transport that runs one ``curl`` subprocess per request."""
+
+    name = "curl"
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, curl: str = "curl") -> None:
+        self.timeout = timeout
+        self.curl = curl
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> TransportResponse:
+        timeout = self.timeout if timeout is None else timeout
+        cmd = [
+            self.curl, "-sS", "--compressed", "-D", "-", "-w", _CURL_TIMING_FORMAT,
+            "-X", method, "--max-time", str(timeout),
+        ]
+        for name, value in base_headers(headers, body).items():
+            cmd.extend(["-H", f"{name}: {value}"])
+        if body is not None:
+            cmd.extend(["--data-binary", "@-"])
+        cmd.append(url)
+        try:
+            result = subprocess.run(cmd, input=body, capture_output=True)
+        except FileNotFoundError as exc:
+            raise TransportError(f"{self.curl} not found", url=url) from exc
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", errors="replace").strip()
+            raise TransportError(stderr or "curl failed", url=url)
+        output, timing = _split_curl_timing(result.stdout)
+        status, response_headers, data = _split_curl_output(output)
+        check_status(status, url, data, timing)
+        return TransportResponse(status=status, body=data, url=url, headers=response_headers, timing=timing)
+
+    def close(self) -> None:
+        pass
+
+
+# Appended after the body by ``curl -w``; the marker is searched from the end.
+_CURL_TIMING_MARKER = b"\n\x1fll-timing "
+_CURL_TIMING_FORMAT = (
+    "\n\x1fll-timing %{time_namelookup} %{time_connect} %{time_appconnect} "
+    "%{time_starttransfer} %{time_total} %{size_request} %{size_upload} %{size_download}"
+)
+
+
+def _split_curl_timing(raw: bytes) -> Tuple[bytes, Optional[RequestTiming]]:
+    """Strip the ``-w`` trailer and convert curl's cumulative times to phases."""
+    output, sep, trailer = raw.rpartition(_CURL_TIMING_MARKER)
+    if not sep:
+        return raw, None
+    try:
+        namelookup, connect, appconnect, starttransfer, total = (float(v) for v in trailer.split()[:5])
+        size_request, size_upload, size_download = (int(v) for v in trailer.split()[5:8])
+    except ValueError:
+        return output, None
+    return output, RequestTiming(
+        dns=namelookup,
+        connect=connect - namelookup,
+        tls=appconnect - connect if appconnect else None,
+        ttfb=starttransfer,
+        total=total,
+        request_bytes=size_request + size_upload,
+        response_bytes=size_download,
+    )
+
+
+def _split_curl_output(raw: bytes) -> Tuple[int, Dict[str, str], bytes]:
+    """Split ``curl -D -`` output into status, headers and body.
+
+    Interim responses (``100 Continue``) produce extra header blocks; the last
+    block describes the final response.
+    """
+    status = 0
+    headers: Dict[str, str] = {}
+    while raw.startswith(b"HTTP/"):
+        block, sep, rest = raw.partition(b"\r\n\r\n")
+        if not sep:
+            break
+        lines = block.decode("iso-8859-1").split("\r\n")
+        try:
+            status = int(lines[0].split()[1])
+        except (IndexError, ValueError):
+            status = 0
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        raw = rest
+    return status, headers, raw
+
+
+_default_lock = threading.Lock()
+_default_transports: Dict[str, Any] = {}
+
+
+def get_transport(name: Optional[str] = None) -> Any:
+    """Return the process-wide transport for ``name`` (``http`` or ``curl``).
+
+    Without a name, ``$LINGLONG_STORE_TRANSPORT`` selects the backend and
+    ``http`` is the default. Sharing one instance per process keeps the
+    connection pool warm across clients.
+    """
+    name = (name or os.environ.get(TRANSPORT_ENV) or "http").lower()
+    if name not in TRANSPORT_NAMES:
+        raise ValueError(f"unknown transport: {name} (choose from {', '.join(TRANSPORT_NAMES)})")
+    with _default_lock:
+        transport = _default_transports.get(name)
+        if transport is None:
+            transport = HttpTransport() if name == "http" else CurlTransport()
+            _default_transports[name] = transport
+        return transport
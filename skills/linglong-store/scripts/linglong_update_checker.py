@@ -10,29 +10,112 @@
 4. 执行完整的更新检查流程
 """
 
-import re
+import contextlib
 import json
-import subprocess
+import os
 import sys
-from typing import List, Dict, Optional, Tuple
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Any, List, Dict, Optional
+
+from linglong_installed import InstalledApp, parse_installed_output, read_installed_output
+from linglong_jobs import add_runner_arguments, make_jobs, runner_from_args
+from linglong_metrics import add_stats_arguments, metrics_from_args, report_metrics
+from linglong_store_api import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_RETRIES,
+    DEFAULT_UPDATE_CHUNK_SIZE,
+    LinglongStoreClient,
+)
+from linglong_transport import TRANSPORT_NAMES
+from linglong_update_report import REPORT_FORMATS, UpdateReport, build_report
+from linglong_versions import VersionIndex
 
 
 class LinglongUpdateChecker:
-    """玲珑应用更新检查器"""
+    """玲珑应用更新检查器
+    
+    各阶段之间直接传递数据结构，默认不写任何文件。指定 ``keep_artifacts``
+    时，每次检查在该目录下创建独立的运行目录保存中间产物，多个检查并发执行
+    也不会互相覆盖。
+    """
+    
+    LIST_ARTIFACT = 'll_cli_list.txt'
+    REQUEST_ARTIFACT = 'app_check_update.json'
+    RESULT_ARTIFACT = 'update_check_result.json'
     
-    def __init__(self, temp_dir='/tmp'):
+    def __init__(
+        self,
+        keep_artifacts: Optional[str] = None,
+        client: Optional[LinglongStoreClient] = None,
+        temp_dir: Optional[str] = None,
+        chunk_size: int = DEFAULT_UPDATE_CHUNK_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        retries: int = DEFAULT_RETRIES,
+        version_index: Optional[VersionIndex] = None,
+        sync_versions: bool = True,
+        versions_path: Optional[str] = None,
+    ):
         """
         初始化更新检查器
         
         Args:
-            temp_dir: 临时文件目录
+            keep_artifacts: 保存中间产物的目录，None 表示不落盘
+            client: 商店接口客户端，默认使用共享传输层的新客户端
+            temp_dir: 已废弃，等同于 keep_artifacts
+            chunk_size: 每个更新检查请求包含的应用数
+            max_workers: 并发请求数
+            retries: 失败分块的重试次数
+            version_index: 本地版本索引；指定时在本地判断可更新版本，不调用
+                appCheckUpdate（见 check_with_version_index）
+            sync_versions: 是否为索引中缺失或过期的应用请求版本列表，False 时完全离线
+            versions_path: 同步后保存索引的文件，默认 $XDG_CACHE_HOME/linglong-store/versions/stable.json
         """
-        self.temp_dir = temp_dir
-        self.list_file = f'{temp_dir}/ll_cli_list.txt'
-        self.check_request_file = f'{temp_dir}/app_check_update.json'
-        self.check_result_file = f'{temp_dir}/update_check_result.json'
-        self.api_url = 'https://storeapi.linyaps.org.cn/app/appCheckUpdate'
+        self.keep_artifacts = keep_artifacts or temp_dir
+        self.client = client or LinglongStoreClient()
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.version_index = version_index
+        self.sync_versions = sync_versions
+        self.versions_path = versions_path
         self.default_arch = 'x86_64'
+        self.run_dir: Optional[str] = None
+        self.installed: Optional[List[InstalledApp]] = None
+        self.check_request: Optional[List[Dict[str, str]]] = None
+        self.update_result: Optional[Dict] = None
+        self.report: Optional[UpdateReport] = None
+    
+    def _save_artifact(self, name: str, content: Any) -> Optional[str]:
+        """
+        保存中间产物（仅在指定 keep_artifacts 时）
+        
+        Args:
+            name: 文件名
+            content: 字符串原样写入，其他对象写为 JSON
+            
+        Returns:
+            文件路径，未保存返回None
+        """
+        if not self.keep_artifacts:
+            return None
+        try:
+            if self.run_dir is None:
+                os.makedirs(self.keep_artifacts, exist_ok=True)
+                prefix = time.strftime('update-check-%Y%m%d-%H%M%S-')
+                self.run_dir = tempfile.mkdtemp(prefix=prefix, dir=self.keep_artifacts)
+            path = os.path.join(self.run_dir, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                if isinstance(content, str):
+                    f.write(content)
+                else:
+                    json.dump(content, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"保存 {name} 失败: {e}")
+            return None
+        print(f"已保存 {name} 到 {path}")
+        return path
     
     def get_installed_apps(self) -> bool:
         """
@@ -44,264 +127,192 @@ class LinglongUpdateChecker:
         print("正在获取已安装应用列表...")
         
         try:
-            result = subprocess.run(
-                ['ll-cli', 'list'],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            if result.returncode == 0:
-                with open(self.list_file, 'w', encoding='utf-8') as f:
-                    f.write(result.stdout)
-                print(f"已保存应用列表到 {self.list_file}")
-                return True
-            else:
-                print(f"获取应用列表失败: {result.stderr}")
-                return False
-                
+            content, data = read_installed_output()
         except FileNotFoundError:
             print("错误: 未找到 ll-cli 命令")
             return False
+        except RuntimeError as e:
+            print(f"获取应用列表失败: {e}")
+            return False
         except Exception as e:
             print(f"获取应用列表时出错: {e}")
             return False
+        
+        self.installed = parse_installed_output(content, self.default_arch, data)
+        self._save_artifact(self.LIST_ARTIFACT, content)
+        return True
     
     def extract_installed_apps(self) -> List[Dict[str, str]]:
         """
-        从ll-cli list输出中提取应用信息
+        从已解析的已安装记录生成更新检查请求项
         
         Returns:
             应用列表 [{"appId": "...", "arch": "...", "version": "..."}]
         """
-        try:
-            with open(self.list_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except FileNotFoundError:
-            print(f"错误: 未找到应用列表文件 {self.list_file}")
+        if self.installed is None:
+            print("错误: 尚未获取已安装应用列表")
             return []
-        
-        # 移除ANSI颜色代码
-        content = re.sub(r'\x1b\[[0-9;]*m', '', content)
-        lines = content.split('\n')
-        
-        app_list = []
-        for line in lines:
-            # 跳过标题行和空行
-            if not line.strip() or 'ID' in line or '名称' in line:
-                continue
-            
-            # 匹配应用ID模式（以小写字母开头，包含点号的完整ID）
-            app_match = re.match(r'([a-z][a-z0-9.-]+)', line)
-            if app_match:
-                app_id = app_match.group(1)
-                
-                # 查找版本号（数字.数字.数字模式）
-                version_match = re.search(r'\b(\d+\.\d+[\d\.]*)\b', line)
-                if version_match:
-                    version = version_match.group(1)
-                    
-                    app_list.append({
-                        "appId": app_id,
-                        "arch": self.default_arch,
-                        "version": version
-                    })
-        
-        return app_list
+        return [app.to_check_item() for app in self.installed]
     
     def save_check_request(self, app_list: List[Dict[str, str]]) -> bool:
         """
-        保存更新检查请求到文件
+        记录更新检查请求（指定 keep_artifacts 时同时落盘）
         
         Args:
             app_list: 应用列表
             
         Returns:
-            bool: 是否成功保存
+            bool: 是否成功
         """
-        try:
-            with open(self.check_request_file, 'w', encoding='utf-8') as f:
-                json.dump(app_list, f, ensure_ascii=False, indent=2)
-            print(f"已保存更新检查请求到 {self.check_request_file}")
-            return True
-        except Exception as e:
-            print(f"保存更新检查请求失败: {e}")
-            return False
+        self.check_request = app_list
+        self._save_artifact(self.REQUEST_ARTIFACT, app_list)
+        return True
     
-    def call_update_check_api(self) -> Optional[Dict]:
+    def call_update_check_api(self, app_list: Optional[List[Dict[str, str]]] = None) -> Optional[Dict]:
         """
         调用更新检查接口
         
+        请求按 chunk_size 分块并发提交，失败的分块按指数退避重试。部分分块最终
+        失败时仍返回其余结果，失败分块记录在 ``failed_chunks`` 中；全部失败才
+        返回None。
+        
+        Args:
+            app_list: 应用列表，默认使用 save_check_request 记录的请求
+        
         Returns:
             更新检查结果字典，失败返回None
         """
+        if app_list is None:
+            app_list = self.check_request
+        if app_list is None:
+            print("错误: 没有可提交的更新检查请求")
+            return None
+        if self.version_index is not None:
+            return self.check_with_version_index(app_list)
+        
         print("正在检查更新...")
         
         try:
-            result = subprocess.run([
-                'curl', '-sS', '-X', 'POST',
-                self.api_url,
-                '-H', 'Content-Type: application/json',
-                '-d', f'@{self.check_request_file}'
-            ], capture_output=True, text=True, encoding='utf-8', timeout=30)
-            
-            if result.returncode == 0:
-                try:
-                    update_data = json.loads(result.stdout)
-                    
-                    with open(self.check_result_file, 'w', encoding='utf-8') as f:
-                        json.dump(update_data, f, ensure_ascii=False, indent=2)
-                    
-                    print(f"更新检查完成，状态码: {update_data.get('code')}")
-                    return update_data
-                    
-                except json.JSONDecodeError:
-                    print("更新检查接口返回数据解析失败")
-                    print("返回内容:", result.stdout[:200])
-                    return None
-            else:
-                print(f"更新检查接口调用失败: {result.stderr}")
-                return None
-                
-        except subprocess.TimeoutExpired:
-            print("更新检查接口调用超时")
-            return None
+            batch = self.client.check_updates_batch(
+                app_list,
+                chunk_size=self.chunk_size,
+                max_workers=self.max_workers,
+                retries=self.retries,
+            )
         except Exception as e:
             print(f"调用更新检查接口时出错: {e}")
             return None
+        
+        for chunk in batch.failed:
+            print(f"第 {chunk.index + 1} 个分块（{len(chunk.apps)} 个应用）在 {chunk.attempts} 次尝试后失败: {chunk.error}")
+        if batch.chunks and len(batch.failed) == batch.chunks:
+            print("更新检查接口调用失败")
+            return None
+        if batch.failed:
+            print(f"警告: {len(batch.failed)}/{batch.chunks} 个分块失败，报告只包含部分结果")
+        
+        update_data = {
+            'code': 200,
+            'data': list(batch),
+            'failed_chunks': [asdict(chunk) for chunk in batch.failed],
+        }
+        self.update_result = update_data
+        self._save_artifact(self.RESULT_ARTIFACT, update_data)
+        print(f"更新检查完成，{batch.chunks} 个分块，{len(batch)} 个应用可更新")
+        return update_data
+    
+    def check_with_version_index(self, app_list: List[Dict[str, str]]) -> Optional[Dict]:
+        """
+        用本地版本索引检查更新
+        
+        先为索引中缺失或过期的应用并发请求版本列表（sync_versions 为 False 时跳过），
+        再对每个应用取同架构、渠道、模块下比已安装版本更新的最新版本。结果与
+        call_update_check_api 形状相同；索引中没有版本列表的应用归入一个失败分块，
+        报告中列为未检查。
+        
+        Args:
+            app_list: 应用列表
+        
+        Returns:
+            更新检查结果字典
+        """
+        index = self.version_index
+        # 已安装记录带有渠道与模块，用于区分同一应用的不同版本线
+        installed = {(app.app_id, app.arch, app.version): app for app in self.installed or []}
+        items = []
+        for item in app_list:
+            app = installed.get((item.get('appId'), item.get('arch'), item.get('version')))
+            items.append(dict(item, channel=app.channel, module=app.module) if app is not None else item)
+        
+        errors: Dict[str, str] = {}
+        if self.sync_versions:
+            stale = index.stale(item['appId'] for item in items)
+            if stale:
+                print(f"正在同步 {len(stale)} 个应用的版本列表...")
+                errors = index.sync(self.client, stale, max_workers=self.max_workers)
+                index.save(self.versions_path)
+        
+        updates = index.check_updates(items)
+        unchecked = [item for item in items if item['appId'] not in index]
+        failed_chunks = []
+        if unchecked:
+            reason = next(iter(errors.values()), '版本索引中没有该应用的版本列表')
+            failed_chunks.append({'index': 0, 'apps': unchecked, 'error': reason, 'attempts': 1})
+            print(f"警告: {len(unchecked)} 个应用没有版本列表，报告中列为未检查")
+        
+        update_data = {'code': 200, 'data': updates, 'failed_chunks': failed_chunks}
+        self.update_result = update_data
+        self._save_artifact(self.RESULT_ARTIFACT, update_data)
+        print(f"本地版本索引检查完成，{len(updates)} 个应用可更新")
+        return update_data
     
-    def generate_report(self) -> Optional[Dict]:
+    def generate_report(self, update_result: Optional[Dict] = None, echo: bool = True) -> Optional[Dict]:
         """
         生成应用统计与更新报告
         
+        结构化报告保存在 ``self.report``（UpdateReport），可再渲染为 JSON / NDJSON。
+        
+        Args:
+            update_result: 更新检查结果，默认使用最近一次 call_update_check_api 的结果
+            echo: 是否打印文本报告
+        
         Returns:
             报告字典，失败返回None
         """
-        # 读取更新检查结果
-        try:
-            with open(self.check_result_file, 'r', encoding='utf-8') as f:
-                update_result = json.load(f)
-        except FileNotFoundError:
-            print(f"错误: 未找到更新检查结果文件 {self.check_result_file}")
+        if update_result is None:
+            update_result = self.update_result
+        if update_result is None:
+            print("错误: 尚未执行更新检查")
             return None
         
-        # 读取已安装的应用列表
-        try:
-            with open(self.list_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except FileNotFoundError:
-            print(f"错误: 未找到应用列表文件 {self.list_file}")
+        installed = self.installed
+        if installed is None:
+            print("错误: 尚未获取已安装应用列表")
             return None
         
-        content = re.sub(r'\x1b\[[0-9;]*m', '', content)
-        lines = content.split('\n')
-        
-        # 构建可更新应用的ID集合和版本映射
-        updateable_apps = {
-            app['appId']: app['version'] 
-            for app in update_result.get('data', [])
-        }
-        
-        # 列出所有应用
-        app_list = []
-        for line in lines:
-            if not line.strip() or 'ID' in line or '名称' in line:
-                continue
-            
-            app_match = re.match(r'([a-z][a-z0-9.-]+)', line)
-            if app_match:
-                app_id = app_match.group(1)
-                version_match = re.search(r'\b(\d+\.\d+[\d\.]*)\b', line)
-                if version_match:
-                    version = version_match.group(1)
-                    is_runtime = 'runtime' in app_id.lower()
-                    needs_update = app_id in updateable_apps
-                    new_version = updateable_apps.get(app_id, '')
-                    
-                    app_list.append({
-                        'appId': app_id,
-                        'version': version,
-                        'is_runtime': is_runtime,
-                        'needs_update': needs_update,
-                        'new_version': new_version
-                    })
-        
-        # 按是否需要更新排序
-        app_list.sort(key=lambda x: (not x['needs_update'], x['appId']))
-        
-        # 统计
-        total_apps = len(app_list)
-        runtime_count = sum(1 for app in app_list if app['is_runtime'])
-        updateable_count = sum(1 for app in app_list if app['needs_update'])
-        
-        # 打印报告
-        print('\n' + '=' * 120)
-        print('玲珑应用安装与更新统计报告')
-        print('=' * 120)
-        print(f'\n已安装应用总数: {total_apps} 个')
-        print(f'其中运行时环境: {runtime_count} 个')
-        print(f'应用软件: {total_apps - runtime_count} 个')
-        print(f'需要更新: {updateable_count} 个')
-        
-        # 显示需要更新的应用
-        print('\n' + '=' * 120)
-        print('【需要更新的应用】')
-        print('=' * 120)
-        
-        count = 0
-        for app in app_list:
-            if app['needs_update']:
-                count += 1
-                update_info = next(
-                    (u for u in update_result.get('data', []) 
-                     if u['appId'] == app['appId']), 
-                    None
-                )
-                category = update_info['categoryName'] if update_info else ''
-                print(f'{count}. {app["appId"]} '
-                      f'(当前版本: {app["version"]} → 最新版本: {app["new_version"]}) '
-                      f'- 分类: {category}')
-        
-        # 显示已是最新版本的应用
-        print('\n' + '=' * 120)
-        print('【已是最新版本的应用】')
-        print('=' * 120)
-        
-        count = 0
-        for app in app_list:
-            if not app['needs_update']:
-                count += 1
-                marker = ' [运行时]' if app['is_runtime'] else ''
-                print(f'{count}. {app["appId"]} ({app["version"]}){marker}')
-        
-        # 更新建议
-        print('\n' + '=' * 120)
-        print('更新建议:')
-        print('=' * 120)
-        if updateable_count > 0:
-            print('• 建议优先更新浏览器应用（Chrome、Edge）以获得更好的安全性和性能')
-            print('• 大型应用更新包较大，可在网络空闲时更新')
-            print('• 系统工具更新较小，建议及时更新')
-        else:
-            print('• 所有应用都是最新版本，无需更新')
-        print('=' * 120)
-        
-        return {
-            'total_apps': total_apps,
-            'runtime_count': runtime_count,
-            'updateable_count': updateable_count,
-            'updateable_apps': [app for app in app_list if app['needs_update']],
-            'up_to_date_apps': [app for app in app_list if not app['needs_update']]
-        }
+        report = build_report(
+            installed,
+            update_result.get('data') or [],
+            update_result.get('failed_chunks'),
+        )
+        if echo:
+            print(report.render_text())
+        self.report = report
+        return report.to_dict()
     
-    def run_full_check(self) -> Optional[Dict]:
+    def run_full_check(self, echo: bool = True) -> Optional[Dict]:
         """
         执行完整的更新检查流程
         
+        Args:
+            echo: 是否打印文本报告
+        
         Returns:
             报告字典，失败返回None
         """
+        # 每次检查使用独立的产物目录
+        self.run_dir = None
+        
         # 步骤1: 获取已安装应用列表
         if not self.get_installed_apps():
             return None
@@ -314,18 +325,18 @@ class LinglongUpdateChecker:
         
         print(f"共提取 {len(app_list)} 个应用")
         
-        # 步骤3: 保存更新检查请求
+        # 步骤3: 记录更新检查请求
         if not self.save_check_request(app_list):
             return None
         
         # 步骤4: 调用更新检查接口
-        update_result = self.call_update_check_api()
+        update_result = self.call_update_check_api(app_list)
         if not update_result or update_result.get('code') != 200:
             print("更新检查失败")
             return None
         
         # 步骤5: 生成报告
-        report = self.generate_report()
+        report = self.generate_report(update_result, echo=echo)
         
         if report:
             print(f"\n检查完成！发现 {report['updateable_count']} 个可更新的应用。")
@@ -339,10 +350,9 @@ class LinglongUpdateChecker:
         Returns:
             需要更新的应用ID列表
         """
-        report = self.generate_report()
-        if report:
-            return [app['appId'] for app in report['updateable_apps']]
-        return []
+        if self.report is None and self.generate_report(echo=False) is None:
+            return []
+        return [entry.app_id for entry in self.report.updateable]
     
     def format_size(self, size_bytes: int) -> str:
         """
@@ -365,10 +375,15 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='玲珑应用更新检查工具')
+    parser.add_argument(
+        '--keep-artifacts',
+        metavar='DIR',
+        help='在 DIR 下为本次检查创建独立目录，保存已安装列表、请求与结果（默认不落盘）'
+    )
     parser.add_argument(
         '--temp-dir',
-        default='/tmp',
-        help='临时文件目录（默认: /tmp）'
+        dest='keep_artifacts',
+        help=argparse.SUPPRESS
     )
     parser.add_argument(
         '--arch',
@@ -377,20 +392,107 @@ def main():
     )
     parser.add_argument(
         '--action',
-        choices=['check', 'list', 'ids'],
+        choices=['check', 'list', 'ids', 'upgrade'],
         default='check',
-        help='执行的操作: check(完整检查), list(提取列表), ids(获取更新ID)'
+        help='执行的操作: check(完整检查), list(提取列表), ids(获取更新ID), upgrade(检查后并发升级)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=DEFAULT_UPDATE_CHUNK_SIZE,
+        help=f'每个更新检查请求包含的应用数（默认: {DEFAULT_UPDATE_CHUNK_SIZE}）'
     )
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f'并发请求数（默认: {DEFAULT_MAX_WORKERS}）'
+    )
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f'失败分块的重试次数（默认: {DEFAULT_RETRIES}）'
+    )
+    parser.add_argument(
+        '--format',
+        choices=REPORT_FORMATS,
+        default='text',
+        help='check 的报告格式: text(默认), json, ndjson；非 text 时进度信息输出到 stderr'
+    )
+    parser.add_argument(
+        '--transport',
+        choices=TRANSPORT_NAMES,
+        help='HTTP 后端: http(连接池, 默认) 或 curl(子进程回退)'
+    )
+    parser.add_argument('--no-cache', action='store_true', help='不读写本地响应缓存')
+    parser.add_argument('--refresh', action='store_true', help='忽略未过期缓存，向服务器重新校验')
+    parser.add_argument(
+        '--offline',
+        metavar='SNAPSHOT',
+        help='不访问商店接口，使用离线目录快照检查更新（由 linglong_catalog_sync.py --export 生成）'
+    )
+    parser.add_argument(
+        '--local-versions',
+        action='store_true',
+        help='用本地版本索引判断更新（只为缺失或超过 24 小时的应用请求版本列表），不调用 appCheckUpdate'
+    )
+    parser.add_argument(
+        '--no-sync',
+        action='store_true',
+        help='配合 --local-versions：不访问接口，只用已缓存的版本索引'
+    )
+    parser.add_argument(
+        '--versions-path',
+        metavar='FILE',
+        help='版本索引文件（默认: $XDG_CACHE_HOME/linglong-store/versions/stable.json）'
+    )
+    add_stats_arguments(parser)
+    add_runner_arguments(parser)
     
     args = parser.parse_args()
-    
+    metrics = metrics_from_args(args)
+    try:
+        _run(args, metrics)
+    finally:
+        report_metrics(metrics, args)
+
+
+def _run(args, metrics):
+    """按命令行参数执行操作"""
     # 创建检查器
-    checker = LinglongUpdateChecker(temp_dir=args.temp_dir)
+    if args.offline:
+        from linglong_offline import offline_client
+        client = offline_client(args.offline, metrics=metrics)
+    else:
+        client = LinglongStoreClient(
+            arch=args.arch,
+            transport=args.transport,
+            cache=False if args.no_cache else None,
+            refresh=args.refresh,
+            metrics=metrics,
+        )
+    checker = LinglongUpdateChecker(
+        keep_artifacts=args.keep_artifacts,
+        client=client,
+        chunk_size=args.chunk_size,
+        max_workers=args.max_workers,
+        retries=args.retries,
+        version_index=VersionIndex.load_or_empty(args.versions_path) if args.local_versions else None,
+        sync_versions=not args.no_sync,
+        versions_path=args.versions_path,
+    )
     checker.default_arch = args.arch
     
     # 执行操作
     if args.action == 'check':
-        report = checker.run_full_check()
+        if args.format == 'text':
+            report = checker.run_full_check()
+        else:
+            with contextlib.redirect_stdout(sys.stderr):
+                report = checker.run_full_check(echo=False)
+            if report:
+                print(checker.report.render(args.format))
         sys.exit(0 if report else 1)
     elif args.action == 'list':
         if checker.get_installed_apps():
@@ -404,6 +506,19 @@ def main():
             for app in report['updateable_apps']:
                 print(app['appId'])
         sys.exit(0 if report else 1)
+    elif args.action == 'upgrade':
+        # --events 时 stdout 只输出事件，检查过程的提示转到 stderr
+        with contextlib.redirect_stdout(sys.stderr) if args.events else contextlib.nullcontext():
+            report = checker.run_full_check()
+        if not report:
+            sys.exit(1)
+        entries = checker.report.updateable
+        jobs = make_jobs(
+            [entry.app_id for entry in entries],
+            runtimes=[entry.app_id for entry in entries if entry.is_runtime],
+        )
+        result = runner_from_args(args).run(jobs)
+        sys.exit(0 if result.ok else 1)
 
 
 if __name__ == '__main__':
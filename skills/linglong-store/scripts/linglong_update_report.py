@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+玲珑应用更新报告
+
+把已安装记录与 ``appCheckUpdate`` 结果按 (appId, arch, module) 做一次哈希
+连接，生成结构化的 ``UpdateReport``。报告只构建一次，可直接渲染为文本、JSON
+或 NDJSON，不需要重新遍历原始数据。
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from linglong_installed import InstalledApp
+from linglong_versions import is_newer
+
+
+RULE = '=' * 120
+REPORT_FORMATS = ('text', 'json', 'ndjson')
+
+UpdateKey = Tuple[str, str, str]
+
+
+@dataclass
+class ReportEntry:
+    """报告中的一条已安装记录"""
+
+    app_id: str
+    version: str
+    arch: str
+    module: str
+    is_runtime: bool
+    needs_update: bool = False
+    new_version: str = ''
+    category: str = ''
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'appId': self.app_id,
+            'version': self.version,
+            'arch': self.arch,
+            'module': self.module,
+            'is_runtime': self.is_runtime,
+            'needs_update': self.needs_update,
+            'new_version': self.new_version,
+            'category': self.category,
+        }
+
+
+@dataclass
+class UpdateReport:
+    """结构化更新报告，条目按是否需要更新、appId 排序
+
+    分块请求重试后仍失败时，对应应用归入 ``unchecked``，其余结果照常给出。
+    """
+
+    updateable: List[ReportEntry] = field(default_factory=list)
+    up_to_date: List[ReportEntry] = field(default_factory=list)
+    unchecked: List[ReportEntry] = field(default_factory=list)
+    failed_chunks: List[Dict[str, Any]] = field(default_factory=list)
+    runtime_count: int = 0
+
+    @property
+    def total_apps(self) -> int:
+        return len(self.updateable) + len(self.up_to_date) + len(self.unchecked)
+
+    @property
+    def updateable_count(self) -> int:
+        return len(self.updateable)
+
+    @property
+    def complete(self) -> bool:
+        return not self.unchecked
+
+    def to_dict(self) -> Dict[str, Any]:
+        """与旧版 generate_report 返回值兼容的字典"""
+        return {
+            'total_apps': self.total_apps,
+            'runtime_count': self.runtime_count,
+            'updateable_count': self.updateable_count,
+            'updateable_apps': [entry.to_dict() for entry in self.updateable],
+            'up_to_date_apps': [entry.to_dict() for entry in self.up_to_date],
+            'unchecked_count': len(self.unchecked),
+            'unchecked_apps': [entry.to_dict() for entry in self.unchecked],
+            'failed_chunks': self.failed_chunks,
+        }
+
+    def render_text(self) -> str:
+        lines = [
+            '',
+            RULE,
+            '玲珑应用安装与更新统计报告',
+            RULE,
+            '',
+            f'已安装应用总数: {self.total_apps} 个',
+            f'其中运行时环境: {self.runtime_count} 个',
+            f'应用软件: {self.total_apps - self.runtime_count} 个',
+            f'需要更新: {self.updateable_count} 个',
+        ]
+        if self.unchecked:
+            lines.append(f'未能检查: {len(self.unchecked)} 个（{len(self.failed_chunks)} 个分块请求失败）')
+        lines += ['', RULE, '【需要更新的应用】', RULE]
+        for count, entry in enumerate(self.updateable, 1):
+            lines.append(
+                f'{count}. {entry.app_id} '
+                f'(当前版本: {entry.version} → 最新版本: {entry.new_version}) '
+                f'- 分类: {entry.category}'
+            )
+        lines += ['', RULE, '【已是最新版本的应用】', RULE]
+        for count, entry in enumerate(self.up_to_date, 1):
+            marker = ' [运行时]' if entry.is_runtime else ''
+            lines.append(f'{count}. {entry.app_id} ({entry.version}){marker}')
+        if self.unchecked:
+            lines += ['', RULE, '【未能检查更新的应用】', RULE]
+            for count, entry in enumerate(self.unchecked, 1):
+                lines.append(f'{count}. {entry.app_id} ({entry.version})')
+        lines += ['', RULE, '更新建议:', RULE]
+        if self.updateable:
+            lines += [
+                '• 建议优先更新浏览器应用（Chrome、Edge）以获得更好的安全性和性能',
+                '• 大型应用更新包较大，可在网络空闲时更新',
+                '• 系统工具更新较小，建议及时更新',
+            ]
+        elif not self.unchecked:
+            lines.append('• 所有应用都是最新版本，无需更新')
+        if self.unchecked:
+            lines.append('• 部分应用未能检查更新，可稍后重试或使用 ll-cli upgrade')
+        lines.append(RULE)
+        return '\n'.join(lines)
+
+    def render_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def iter_ndjson(self) -> Iterator[str]:
+        """逐行输出：每条记录一行，最后一行为汇总"""
+        for entry in self.updateable:
+            yield json.dumps(entry.to_dict(), ensure_ascii=False)
+        for entry in self.up_to_date:
+            yield json.dumps(entry.to_dict(), ensure_ascii=False)
+        for entry in self.unchecked:
+            yield json.dumps(dict(entry.to_dict(), unchecked=True), ensure_ascii=False)
+        yield json.dumps(
+            {
+                'summary': True,
+                'total_apps': self.total_apps,
+                'runtime_count': self.runtime_count,
+                'updateable_count': self.updateable_count,
+                'unchecked_count': len(self.unchecked),
+                'failed_chunks': self.failed_chunks,
+            },
+            ensure_ascii=False,
+        )
+
+    def render(self, fmt: str = 'text') -> str:
+        if fmt == 'json':
+            return self.render_json()
+        if fmt == 'ndjson':
+            return '\n'.join(self.iter_ndjson())
+        return self.render_text()
+
+
+def index_updates(updates: Iterable[Dict[str, Any]]) -> Dict[UpdateKey, Dict[str, Any]]:
+    """按 (appId, arch, module) 建立更新结果索引
+
+    接口未返回 arch / module 时以空字符串占位，查找时逐级放宽匹配。
+    """
+    index: Dict[UpdateKey, Dict[str, Any]] = {}
+    for update in updates or []:
+        if not isinstance(update, dict) or not update.get('appId'):
+            continue
+        key = (update['appId'], update.get('arch') or '', update.get('module') or '')
+        index.setdefault(key, update)
+    return index
+
+
+def lookup_update(index: Dict[UpdateKey, Dict[str, Any]], app: InstalledApp) -> Optional[Dict[str, Any]]:
+    return (
+        index.get((app.app_id, app.arch, app.module))
+        or index.get((app.app_id, app.arch, ''))
+        or index.get((app.app_id, '', ''))
+    )
+
+
+def build_report(
+    installed: Iterable[InstalledApp],
+    updates: Iterable[Dict[str, Any]],
+    failed_chunks: Optional[List[Dict[str, Any]]] = None,
+    index: Optional[Dict[UpdateKey, Dict[str, Any]]] = None,
+) -> UpdateReport:
+    """连接已安装记录与更新结果，单次遍历生成报告
+
+    Args:
+        installed: 已安装记录
+        updates: ``appCheckUpdate`` 返回的 ``data`` 列表
+        failed_chunks: 重试后仍失败的分块（``{'index', 'apps', 'error', 'attempts'}``），
+            其中的应用归入 ``unchecked``
+        index: 预先用 index_updates 建好的索引（多份报告共用同一批结果时传入）
+
+    Returns:
+        UpdateReport
+    """
+    if index is None:
+        index = index_updates(updates)
+    report = UpdateReport(failed_chunks=list(failed_chunks or []))
+    unchecked = {
+        (app.get('appId'), app.get('arch'), app.get('version'))
+        for chunk in report.failed_chunks
+        for app in chunk.get('apps', [])
+    }
+    for app in installed:
+        update = lookup_update(index, app)
+        if update is not None and not is_newer(update.get('version'), app.version):
+            # 同一 appId 的结果可能来自其他版本的查询（批量去重检查时），
+            # 已是该版本或更新版本的记录不算需要更新；按版本号数值比较
+            update = None
+        entry = ReportEntry(
+            app_id=app.app_id,
+            version=app.version,
+            arch=app.arch,
+            module=app.module,
+            is_runtime=app.is_runtime,
+        )
+        if update is not None:
+            entry.needs_update = True
+            entry.new_version = str(update.get('version') or '')
+            entry.category = str(update.get('categoryName') or '')
+        if app.is_runtime:
+            report.runtime_count += 1
+        if entry.needs_update:
+            report.updateable.append(entry)
+        elif unchecked and (app.app_id, app.arch, app.version) in unchecked:
+            report.unchecked.append(entry)
+        else:
+            report.up_to_date.append(entry)
+    report.updateable.sort(key=lambda entry: entry.app_id)
+    report.up_to_date.sort(key=lambda entry: entry.app_id)
+    report.unchecked.sort(key=lambda entry: entry.app_id)
+    return report
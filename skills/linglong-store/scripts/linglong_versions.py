@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Version ordering and a local version index for the Linglong store.
+
+Versions are compared by a precomputed tuple key instead of as strings:
+numeric parts compare as numbers (``1.10`` > ``1.9``), and text parts sort
+after numbers at the same position. ``parse_version`` caches parsed
+``Version`` objects, so the many comparisons of an update check parse each
+distinct string once.
+
+``VersionIndex`` holds the ``/visit/getSearchAppVersionList`` records of many
+apps, grouped by ``(appId, arch, channel, module)`` and sorted once by key.
+"Newest compatible version" questions are then answered locally with a
+lookup and a ``bisect``, so an update check over hundreds of installed apps
+needs no ``/app/appCheckUpdate`` round trip. The index is persisted as JSON
+under ``$XDG_CACHE_HOME/linglong-store/versions``; ``sync`` only refetches
+apps that are missing or older than ``max_age``.
+
+    index = VersionIndex.load_or_empty()
+    index.sync(client, ["org.deepin.calculator"])
+    index.newest_compatible("org.deepin.calculator", "5.7.21.3", arch="x86_64")
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import re
+import tempfile
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from linglong_cache import HOUR, cache_home
+
+
+INDEX_VERSION = 1
+DEFAULT_MAX_AGE = 24 * HOUR
+DEFAULT_MAX_WORKERS = 4
+# Record fields kept by ``sync``; the rest (descriptions, screenshots) only bloats the index.
+INDEX_FIELDS = ("appId", "version", "arch", "channel", "module", "repoName", "categoryName", "size")
+
+_VERSION_PART_RE = re.compile(r"\d+|[^\d.]+")
+
+VersionKey = Tuple[Tuple[int, int, str], ...]
+# (arch, channel, module) of one sorted version list.
+GroupKey = Tuple[str, str, str]
+
+
+def version_key(version: Any) -> VersionKey:
+    """Sort key for dotted versions: numeric parts compare as numbers."""
+    return tuple(
+        (0, int(part), "") if part.isdigit() else (1, 0, part)
+        for part in _VERSION_PART_RE.findall(str(version or ""))
+    )
+
+
+@functools.total_ordering
+class Version:
+    """A parsed version string, ordered and hashed by ``version_key``."""
+
+    __slots__ = ("text", "key")
+
+    def __init__(self, text: Any) -> None:
+        self.text = str(text or "")
+        self.key = version_key(self.text)
+
+    @property
+    def major(self) -> Optional[int]:
+        """First numeric component, or ``None`` when the version starts with text."""
+        if self.key and self.key[0][0] == 0:
+            return self.key[0][1]
+        return None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self.key == other.key
+
+    def __lt__(self, other: "Version") -> bool:
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self.key < other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Version({self.text!r})"
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_version(text: Any) -> Version:
+    """Cached ``Version(text)``; versions repeat a lot across records."""
+    return Version(text)
+
+
+def sort_versions(versions: Iterable[Any], reverse: bool = False) -> List[Version]:
+    """Parse and sort version strings in one pass (oldest first)."""
+    return sorted((parse_version(str(v or "")) for v in versions), key=lambda v: v.key, reverse=reverse)
+
+
+def is_newer(candidate: Any, current: Any) -> bool:
+    return parse_version(str(candidate or "")).key > parse_version(str(current or "")).key
+
+
+def _field(record: Dict[str, Any], name: str) -> str:
+    return str(record.get(name) or "")
+
+
+def _matches(value: str, wanted: Optional[str]) -> bool:
+    # An empty field on either side is a wildcard: the store omits module or
+    # channel for some records, and callers may not know them.
+    return not wanted or not value or value == wanted
+
+
+class VersionIndex:
+    """Sorted version lists per app, answering update questions locally."""
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = (), synced: Optional[Dict[str, float]] = None) -> None:
+        # app_id -> group -> (sorted keys, records in the same order)
+        self._groups: Dict[str, Dict[GroupKey, Tuple[List[VersionKey], List[Dict[str, Any]]]]] = {}
+        self.synced: Dict[str, float] = dict(synced or {})
+        by_app: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            app_id = record.get("appId") if isinstance(record, dict) else None
+            if app_id:
+                by_app.setdefault(str(app_id), []).append(record)
+        for app_id, app_records in by_app.items():
+            self.set_versions(app_id, app_records, synced_at=self.synced.get(app_id))
+        for app_id in self.synced:
+            # Synced apps the store had no versions for.
+            self._groups.setdefault(app_id, {})
+
+    def set_versions(self, app_id: str, records: Iterable[Dict[str, Any]], synced_at: Optional[float] = None) -> None:
+        """Replace every version of ``app_id`` (one ``getSearchAppVersionList`` answer)."""
+        groups: Dict[GroupKey, List[Tuple[VersionKey, Dict[str, Any]]]] = {}
+        for record in records:
+            group = (_field(record, "arch"), _field(record, "channel"), _field(record, "module"))
+            groups.setdefault(group, []).append((parse_version(_field(record, "version")).key, record))
+        compiled = {}
+        for group, items in groups.items():
+            items.sort(key=lambda item: item[0])
+            compiled[group] = ([key for key, _ in items], [record for _, record in items])
+        self._groups[app_id] = compiled
+        self.synced[app_id] = time.time() if synced_at is None else synced_at
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __contains__(self, app_id: object) -> bool:
+        return app_id in self._groups
+
+    def app_ids(self) -> List[str]:
+        return list(self._groups)
+
+    def stale(self, app_ids: Iterable[str], max_age: float = DEFAULT_MAX_AGE) -> List[str]:
+        """Ids (deduplicated, in order) that are missing or older than ``max_age``."""
+        cutoff = time.time() - max_age
+        return [app_id for app_id in dict.fromkeys(app_ids) if self.synced.get(app_id, 0.0) < cutoff]
+
+    def versions(
+        self,
+        app_id: str,
+        *,
+        arch: Optional[str] = None,
+        channel: Optional[str] = None,
+        module: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Matching version records of ``app_id``, oldest first."""
+        merged: List[Tuple[VersionKey, Dict[str, Any]]] = []
+        for (g_arch, g_channel, g_module), (keys, records) in self._groups.get(app_id, {}).items():
+            if _matches(g_arch, arch) and _matches(g_channel, channel) and _matches(g_module, module):
+                merged.extend(zip(keys, records))
+        merged.sort(key=lambda item: item[0])
+        return [record for _, record in merged]
+
+    def newest_compatible(
+        self,
+        app_id: str,
+        current: Any = None,
+        *,
+        arch: Optional[str] = None,
+        channel: Optional[str] = None,
+        module: Optional[str] = None,
+        same_major: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """Newest record for the same arch/channel/module newer than ``current``.
+
+        ``current=None`` returns the newest matching version. ``same_major``
+        stays within ``current``'s major version. Empty record fields match
+        anything (see ``_matches``). ``None`` when nothing newer exists.
+        """
+        floor = parse_version(str(current or "")) if current is not None else None
+        ceiling: Optional[VersionKey] = None
+        if same_major and floor is not None and floor.major is not None:
+            ceiling = ((0, floor.major + 1, ""),)
+        best: Optional[Tuple[VersionKey, Dict[str, Any]]] = None
+        for (g_arch, g_channel, g_module), (keys, records) in self._groups.get(app_id, {}).items():
+            if not (_matches(g_arch, arch) and _matches(g_channel, channel) and _matches(g_module, module)):
+                continue
+            # Keys are sorted: the candidate is the last key below the ceiling,
+            # if it is above the floor.
+            end = len(keys) if ceiling is None else bisect_left(keys, ceiling)
+            if not end or (floor is not None and keys[end - 1] <= floor.key):
+                continue
+            key = keys[end - 1]
+            if best is None or key > best[0]:
+                best = (key, records[end - 1])
+        return best[1] if best is not None else None
+
+    def check_updates(self, items: Iterable[Dict[str, Any]], same_major: bool = False) -> List[Dict[str, Any]]:
+        """Local ``/app/appCheckUpdate``: one update record per item with a newer version.
+
+        ``items`` are ``AppCheckVersionBO`` dicts (``appId``/``arch``/``version``,
+        optionally ``channel``/``module``). Apps missing from the index are
+        skipped; use ``stale`` to find them first.
+        """
+        updates = []
+        for item in items:
+            app_id = str(item.get("appId") or "")
+            if app_id not in self._groups:
+                continue
+            record = self.newest_compatible(
+                app_id,
+                item.get("version"),
+                arch=item.get("arch"),
+                channel=item.get("channel"),
+                module=item.get("module"),
+                same_major=same_major,
+            )
+            if record is not None:
+                updates.append({
+                    "appId": app_id,
+                    "arch": item.get("arch") or record.get("arch"),
+                    "version": record.get("version"),
+                    "module": record.get("module"),
+                    "channel": record.get("channel"),
+                    "categoryName": record.get("categoryName"),
+                })
+        return updates
+
+    def sync(
+        self,
+        client: Any,
+        app_ids: Iterable[str],
+        *,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ) -> Dict[str, str]:
+        """Fetch the version lists of stale apps concurrently; ``{app_id: error}`` for failures.
+
+        Apps the store does not know are recorded with no versions, so they
+        are not asked for again until ``max_age`` passes.
+        """
+        pending = self.stale(app_ids, max_age)
+        errors: Dict[str, str] = {}
+        if not pending:
+            return errors
+
+        def fetch(app_id: str) -> Tuple[str, Optional[List[Dict[str, Any]]], Optional[str]]:
+            try:
+                records = [
+                    dict({key: version.raw.get(key) for key in INDEX_FIELDS}, appId=app_id)
+                    for version in client.get_app_versions(app_id)
+                ]
+                return app_id, records, None
+            except RuntimeError as exc:
+                return app_id, None, str(exc)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as pool:
+            for app_id, records, error in pool.map(fetch, pending):
+                if records is None:
+                    errors[app_id] = error or "unknown error"
+                else:
+                    self.set_versions(app_id, records)
+        return errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "synced": self.synced,
+            "records": [
+                record
+                for groups in self._groups.values()
+                for _, records in groups.values()
+                for record in records
+            ],
+        }
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or default_index_path()
+        directory = os.path.dirname(path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self.to_dict(), handle, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["VersionIndex"]:
+        try:
+            with open(path or default_index_path(), "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return None
+        try:
+            synced = {str(app_id): float(ts) for app_id, ts in (data.get("synced") or {}).items()}
+        except (AttributeError, TypeError, ValueError):
+            return None
+        return cls(data.get("records") or [], synced=synced)
+
+    @classmethod
+    def load_or_empty(cls, path: Optional[str] = None) -> "VersionIndex":
+        return cls.load(path) or cls()
+
+
+def default_index_path(repo_name: str = "stable") -> str:
+    return os.path.join(cache_home(), "versions", f"{repo_name}.json")